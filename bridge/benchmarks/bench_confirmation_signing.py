@@ -0,0 +1,92 @@
+"""compare preparing confirmTransfer transactions via web3 with the
+dedicated encoder and signer
+
+run with: python benchmarks/bench_confirmation_signing.py [number of transactions]
+"""
+import sys
+import time
+
+from eth_keys.datatypes import PrivateKey
+from eth_utils import to_canonical_address
+from web3 import Web3
+
+from bridge.confirmation_encoder import encode_confirm_transfer, sign_transaction
+from bridge.constants import CONFIRMATION_TRANSACTION_GAS_LIMIT
+from bridge.contract_abis import HOME_BRIDGE_ABI
+
+HOME_BRIDGE_ADDRESS = "0x731a10897d267e19B34503aD902d0A29173Ba4B1"
+RECIPIENT = "0x7E5F4552091A69125d5DfCb7b8C2659029395Bdf"
+PRIVATE_KEY = b"\x01" * 32
+GAS_PRICE = 10 ** 9
+CHAIN_ID = 4660
+
+
+def sign_with_web3(w3, home_bridge_contract, nonce):
+    transaction = home_bridge_contract.functions.confirmTransfer(
+        transferHash=nonce.to_bytes(32, "big"),
+        transactionHash=b"\x22" * 32,
+        amount=10 ** 25,
+        recipient=RECIPIENT,
+    ).buildTransaction(
+        {
+            "gasPrice": GAS_PRICE,
+            "nonce": nonce,
+            "gas": CONFIRMATION_TRANSACTION_GAS_LIMIT,
+            "chainId": CHAIN_ID,
+        }
+    )
+    return w3.eth.account.sign_transaction(transaction, PRIVATE_KEY)
+
+
+def sign_with_encoder(private_key, nonce):
+    return sign_transaction(
+        private_key,
+        nonce=nonce,
+        gas_price=GAS_PRICE,
+        gas=CONFIRMATION_TRANSACTION_GAS_LIMIT,
+        to=to_canonical_address(HOME_BRIDGE_ADDRESS),
+        data=encode_confirm_transfer(
+            nonce.to_bytes(32, "big"),
+            b"\x22" * 32,
+            10 ** 25,
+            to_canonical_address(RECIPIENT),
+        ),
+        chain_id=CHAIN_ID,
+    )
+
+
+def measure(name, sign, number_of_transactions):
+    start_time = time.perf_counter()
+    signed_transactions = [sign(nonce) for nonce in range(number_of_transactions)]
+    duration = time.perf_counter() - start_time
+    print(
+        f"{name:>8}: {duration:7.3f}s for {number_of_transactions} transactions, "
+        f"{number_of_transactions / duration:8.0f} transactions/s"
+    )
+    return duration, signed_transactions
+
+
+def main():
+    number_of_transactions = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    w3 = Web3()
+    home_bridge_contract = w3.eth.contract(
+        address=HOME_BRIDGE_ADDRESS, abi=HOME_BRIDGE_ABI
+    )
+    private_key = PrivateKey(PRIVATE_KEY)
+
+    web3_duration, web3_transactions = measure(
+        "web3",
+        lambda nonce: sign_with_web3(w3, home_bridge_contract, nonce),
+        number_of_transactions,
+    )
+    encoder_duration, encoder_transactions = measure(
+        "encoder",
+        lambda nonce: sign_with_encoder(private_key, nonce),
+        number_of_transactions,
+    )
+    assert encoder_transactions == web3_transactions
+    print(f"speedup: {web3_duration / encoder_duration:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
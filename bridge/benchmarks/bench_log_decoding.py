@@ -0,0 +1,71 @@
+"""compare web3's log decoding with bridge.log_decoder on synthetic Transfer logs
+
+run with: python benchmarks/bench_log_decoding.py [number of logs]
+"""
+import sys
+import time
+
+from eth_abi import encode_abi
+from eth_utils import encode_hex, int_to_big_endian, keccak
+from hexbytes import HexBytes
+from web3 import Web3
+from web3.datastructures import AttributeDict
+
+from bridge.contract_abis import MINIMAL_ERC20_TOKEN_ABI
+from bridge.log_decoder import TRANSFER_EVENT_TOPIC, decode_log
+
+TOKEN_ADDRESS = "0x731a10897d267e19B34503aD902d0A29173Ba4B1"
+
+
+def make_transfer_logs(number_of_logs):
+    receiver_topic = HexBytes(b"\x00" * 12 + b"\xb4" * 20)
+    return [
+        AttributeDict(
+            {
+                "address": TOKEN_ADDRESS,
+                "topics": [
+                    HexBytes(TRANSFER_EVENT_TOPIC),
+                    HexBytes(keccak(int_to_big_endian(i))[:20].rjust(32, b"\x00")),
+                    receiver_topic,
+                ],
+                "data": encode_hex(encode_abi(["uint256"], [i + 1])),
+                "blockNumber": i // 10,
+                "blockHash": HexBytes(keccak(int_to_big_endian(i // 10))),
+                "transactionHash": HexBytes(keccak(int_to_big_endian(i))),
+                "transactionIndex": i % 10,
+                "logIndex": i % 10,
+                "removed": False,
+            }
+        )
+        for i in range(number_of_logs)
+    ]
+
+
+def measure(name, decode, logs):
+    start_time = time.perf_counter()
+    for log in logs:
+        decode(log)
+    duration = time.perf_counter() - start_time
+    print(
+        f"{name:>12}: {duration:7.3f}s for {len(logs)} logs, "
+        f"{len(logs) / duration:10.0f} logs/s"
+    )
+    return duration
+
+
+def main():
+    number_of_logs = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    logs = make_transfer_logs(number_of_logs)
+    transfer_event = (
+        Web3()
+        .eth.contract(address=TOKEN_ADDRESS, abi=MINIMAL_ERC20_TOKEN_ABI)
+        .events.Transfer()
+    )
+
+    web3_duration = measure("web3", transfer_event.processLog, logs)
+    record_duration = measure("log_decoder", decode_log, logs)
+    print(f"speedup: {web3_duration / record_duration:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
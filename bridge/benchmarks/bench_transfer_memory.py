@@ -0,0 +1,73 @@
+"""report the memory needed to keep a pending transfer around, for the
+AttributeDicts returned by web3 and the compact TransferEvent records
+
+run with: python benchmarks/bench_transfer_memory.py [number of transfers]
+"""
+import sys
+import tracemalloc
+
+from bench_log_decoding import TOKEN_ADDRESS, make_transfer_logs
+from web3 import Web3
+
+from bridge.contract_abis import MINIMAL_ERC20_TOKEN_ABI
+from bridge.events import BalanceCheck, IsValidatorCheck
+from bridge.log_decoder import compact_transfer_event
+from bridge.transfer_recorder import TransferRecorder
+
+MINIMUM_BALANCE = 10 ** 18
+
+
+def measure(name, make_objects, number_of_transfers):
+    tracemalloc.start()
+    start_size, _ = tracemalloc.get_traced_memory()
+    objects = make_objects()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    per_transfer = (size - start_size) / number_of_transfers
+    print(f"{name:>35}: {per_transfer:6.0f} bytes per transfer")
+    del objects
+    return per_transfer
+
+
+def main():
+    number_of_transfers = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    process_log = (
+        Web3()
+        .eth.contract(address=TOKEN_ADDRESS, abi=MINIMAL_ERC20_TOKEN_ABI)
+        .events.Transfer()
+        .processLog
+    )
+    web3_events = [process_log(log) for log in make_transfer_logs(number_of_transfers)]
+
+    # the logs are released again, only the decoded events are retained
+    web3_size = measure(
+        "web3 AttributeDict",
+        lambda: [process_log(log) for log in make_transfer_logs(number_of_transfers)],
+        number_of_transfers,
+    )
+    compact_size = measure(
+        "TransferEvent",
+        lambda: [compact_transfer_event(event) for event in web3_events],
+        number_of_transfers,
+    )
+
+    def make_recorder():
+        recorder = TransferRecorder(minimum_balance=MINIMUM_BALANCE)
+        recorder.apply_event(BalanceCheck(MINIMUM_BALANCE))
+        recorder.apply_event(IsValidatorCheck(True))
+        for event in web3_events:
+            recorder.apply_event(event)
+        recorder.pull_transfers_to_confirm()
+        return recorder
+
+    recorder_size = measure(
+        "TransferRecorder (scheduled transfers)", make_recorder, number_of_transfers
+    )
+    print(
+        f"TransferRecorder storing web3 AttributeDicts would need about "
+        f"{recorder_size - compact_size + web3_size:.0f} bytes per transfer"
+    )
+
+
+if __name__ == "__main__":
+    main()
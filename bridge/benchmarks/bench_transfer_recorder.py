@@ -0,0 +1,144 @@
+"""compare recomputing the transfers to confirm from the full history with
+the incrementally maintained ready index of TransferRecorder
+
+run with: python benchmarks/bench_transfer_recorder.py [number of transfers]
+"""
+import sys
+import time
+
+from eth_utils import int_to_big_endian, keccak
+from hexbytes import HexBytes
+
+from bridge.events import BalanceCheck, CompletionEvent, IsValidatorCheck, TransferEvent
+from bridge.transfer_recorder import TransferRecorder
+from bridge.utils import compute_transfer_hash, sort_events
+
+NEW_TRANSFERS_PER_PULL = 100
+NUMBER_OF_PULLS = 20
+MINIMUM_BALANCE = 10 ** 18
+
+
+class SetDifferenceRecorder:
+    """the transfer bookkeeping of TransferRecorder before the ready index"""
+
+    def __init__(self):
+        self.transfer_events = {}
+        self.transfer_hashes = set()
+        self.confirmation_hashes = set()
+        self.completion_hashes = set()
+        self.scheduled_hashes = set()
+
+    def apply_event(self, event):
+        if isinstance(event, TransferEvent):
+            transfer_hash = compute_transfer_hash(event)
+            self.transfer_hashes.add(transfer_hash)
+            self.transfer_events[transfer_hash] = event
+        else:
+            self.completion_hashes.add(bytes(event.transferHash))
+
+    def pull_transfers_to_confirm(self):
+        unconfirmed_transfer_hashes = (
+            self.transfer_hashes
+            - self.confirmation_hashes
+            - self.completion_hashes
+            - self.scheduled_hashes
+        )
+        self.scheduled_hashes |= unconfirmed_transfer_hashes
+        confirmation_tasks = [
+            self.transfer_events[transfer_hash]
+            for transfer_hash in unconfirmed_transfer_hashes
+        ]
+
+        transfer_hashes_to_remove = self.transfer_hashes & self.completion_hashes
+        self.transfer_hashes -= transfer_hashes_to_remove
+        self.confirmation_hashes -= transfer_hashes_to_remove
+        self.completion_hashes -= transfer_hashes_to_remove
+        self.scheduled_hashes -= transfer_hashes_to_remove
+        for transfer_hash in transfer_hashes_to_remove:
+            self.transfer_events.pop(transfer_hash, None)
+
+        sort_events(confirmation_tasks)
+        return confirmation_tasks
+
+
+def make_transfer(i):
+    return TransferEvent(
+        transactionHash=HexBytes(keccak(int_to_big_endian(i))),
+        blockNumber=i // 10,
+        transactionIndex=i % 10,
+        logIndex=0,
+        sender=keccak(int_to_big_endian(i))[:20],
+        receiver=b"\xb4" * 20,
+        value=i + 1,
+    )
+
+
+def make_completion(transfer):
+    return CompletionEvent(
+        transactionHash=HexBytes(b"\x22" * 32),
+        blockNumber=transfer.blockNumber,
+        transactionIndex=0,
+        logIndex=0,
+        transferHash=HexBytes(compute_transfer_hash(transfer)),
+        transferTransactionHash=transfer.transactionHash,
+        amount=transfer.value,
+        recipient=transfer.receiver,
+        coinTransferSuccessful=True,
+    )
+
+
+def make_history(number_of_transfers):
+    """transfers that will be scheduled, but are not completed yet, and
+    completions of transfers that have not been fetched"""
+    transfers = [make_transfer(i) for i in range(number_of_transfers)]
+    completions = [
+        make_completion(make_transfer(2 * number_of_transfers + i))
+        for i in range(number_of_transfers // 10)
+    ]
+    return transfers, completions
+
+
+def measure(name, recorder, history):
+    transfers, completions = history
+    for event in transfers + completions:
+        recorder.apply_event(event)
+    recorder.pull_transfers_to_confirm()
+
+    new_transfers = [
+        make_transfer(i)
+        for i in range(
+            len(transfers), len(transfers) + NUMBER_OF_PULLS * NEW_TRANSFERS_PER_PULL
+        )
+    ]
+    start_time = time.perf_counter()
+    for pull in range(NUMBER_OF_PULLS):
+        start = pull * NEW_TRANSFERS_PER_PULL
+        for transfer in new_transfers[start : start + NEW_TRANSFERS_PER_PULL]:
+            recorder.apply_event(transfer)
+        assert len(recorder.pull_transfers_to_confirm()) == NEW_TRANSFERS_PER_PULL
+    duration = (time.perf_counter() - start_time) / NUMBER_OF_PULLS
+    print(
+        f"{name:>15}: {duration * 1000:9.3f}ms per pull of "
+        f"{NEW_TRANSFERS_PER_PULL} new transfers after {len(transfers)} transfers"
+    )
+    return duration
+
+
+def main():
+    number_of_transfers = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    history = make_history(number_of_transfers)
+
+    set_difference_duration = measure(
+        "set difference", SetDifferenceRecorder(), history
+    )
+
+    recorder = TransferRecorder(minimum_balance=MINIMUM_BALANCE)
+    recorder.apply_event(BalanceCheck(MINIMUM_BALANCE))
+    recorder.apply_event(IsValidatorCheck(True))
+    ready_index_duration = measure("ready index", recorder, history)
+
+    print(f"speedup: {set_difference_duration / ready_index_duration:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+import collections
+import logging
+from typing import Callable, Deque, List, Optional, Tuple
+
+import gevent.event
+import tenacity
+
+from bridge import node_status
+from bridge.events import ChainRole
+from bridge.node_status import NodeStatus
+from bridge.webservice import get_internal_state_summary
+
+# number of heads whose time of arrival is remembered
+HEAD_HISTORY_SIZE = 1024
+
+
+class ChainHeadTracker:
+    """keep track of the head and sync state of a chain's node
+
+    The node status is polled every poll_interval seconds, or right away
+    when notify_new_head is called, e.g. by a new heads subscription.
+    Components share the tracker instead of querying the node on their
+    own: they can read the latest node status, wait for the next update
+    or register a listener that is called with every new node status.
+
+    The time at which a block has first been seen as head is remembered
+    for the last HEAD_HISTORY_SIZE heads. It serves as block time for
+    measuring how long the bridge takes to handle events.
+    """
+
+    def __init__(self, w3, *, poll_interval: float, chain_role: ChainRole) -> None:
+        if poll_interval <= 0:
+            raise ValueError("Can not poll with a zero or negative poll interval!")
+
+        self.w3 = w3
+        self.poll_interval = poll_interval
+        self.chain_role = chain_role
+        self.logger = logging.getLogger(f"{__name__}.{chain_role.name}")
+
+        self.node_status: Optional[NodeStatus] = None
+        self.listeners: List[Callable[[NodeStatus], None]] = []
+        # (block number, time first seen) of the heads in ascending order
+        self._head_times: Deque[Tuple[int, float]] = collections.deque(
+            maxlen=HEAD_HISTORY_SIZE
+        )
+
+        self._has_node_status = gevent.event.Event()
+        # replaced by a fresh event after each update, so that everyone
+        # waiting for the next update gets woken up exactly once
+        self._next_update = gevent.event.Event()
+        self._new_head = gevent.event.Event()
+
+        self._retrying = tenacity.Retrying(
+            wait=tenacity.wait_exponential(multiplier=1, min=5, max=120),
+            before_sleep=tenacity.before_sleep_log(self.logger, logging.WARN),
+        )
+
+    @property
+    def latest_block_number(self) -> Optional[int]:
+        if self.node_status is None:
+            return None
+        return self.node_status.latest_synced_block
+
+    def add_listener(self, listener: Callable[[NodeStatus], None]) -> None:
+        self.listeners.append(listener)
+
+    def notify_new_head(self, block_number: int) -> None:
+        """request an update, as the node has announced a new block"""
+        latest_block_number = self.latest_block_number
+        if latest_block_number is None or block_number > latest_block_number:
+            self._new_head.set()
+
+    def get_block_time(self, block_number: int) -> Optional[float]:
+        """return the time the block or a later one has first been seen as head
+
+        Returns None if the block has been seen before the remembered heads
+        or has not been seen yet.
+        """
+        block_time = None
+        for head_block_number, head_time in reversed(self._head_times):
+            if head_block_number < block_number:
+                break
+            block_time = head_time
+        if block_time is not None and self._head_times[0][0] >= block_number:
+            # the block might have been seen before the oldest remembered head
+            return None
+        return block_time
+
+    def get_node_status(self) -> NodeStatus:
+        """return the latest node status, waiting for the first update if necessary"""
+        self._has_node_status.wait()
+        assert self.node_status is not None
+        return self.node_status
+
+    def wait_for_next_block(self, block_number: int, timeout: float) -> None:
+        """wait until the head is above block_number, but at most timeout seconds"""
+        with gevent.Timeout(timeout, False):
+            while (
+                self.latest_block_number is None
+                or self.latest_block_number <= block_number
+            ):
+                self._next_update.wait()
+
+    def update(self) -> None:
+        self._new_head.clear()
+        self.node_status = self._retrying.call(node_status.get_node_status, self.w3)
+        block_number = self.node_status.latest_synced_block
+        if not self._head_times or block_number > self._head_times[-1][0]:
+            self._head_times.append((block_number, self.node_status.timestamp))
+        self.logger.debug(f"New node status: {self.node_status}")
+        self._has_node_status.set()
+
+        next_update, self._next_update = self._next_update, gevent.event.Event()
+        next_update.set()
+        for listener in self.listeners:
+            listener(self.node_status)
+
+    def run(self) -> None:
+        while True:
+            self.update()
+            self._new_head.wait(self.poll_interval)
+
+
+@get_internal_state_summary.register(ChainHeadTracker)
+def get_state_summary(chain_head_tracker):
+    status = chain_head_tracker.node_status
+    return {
+        "chain_role": chain_head_tracker.chain_role.value,
+        "latest_block_number": chain_head_tracker.latest_block_number,
+        "is_syncing": status.is_syncing if status is not None else None,
+        "timestamp": status.timestamp if status is not None else None,
+    }
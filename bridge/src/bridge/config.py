@@ -129,32 +129,92 @@ class WebserviceSchema(Schema):
                 )
 
 
+class PersistenceSchema(Schema):
+    # path of the event journal, no journal is kept if not given
+    journal_path = fields.String()
+    # path of the recorder snapshot, no snapshot is written if not given
+    snapshot_path = fields.String()
+    # interval in seconds in which the snapshot is written
+    snapshot_interval = fields.Float(missing=300, validate=validate.Range(min=1))
+
+
 class ChainSchema(Schema):
     rpc_url = fields.Url(required=True, require_tld=False)
     rpc_timeout = fields.Integer(missing=180, validate=validate_non_negative)
+    ws_url = fields.Url(require_tld=False, schemes={"ws", "wss"})
+    fallback_rpc_urls = fields.List(fields.Url(require_tld=False), missing=list)
+    hedge_requests = fields.Boolean(missing=False)
+    # number of blocks an endpoint may be behind the best one before it is
+    # no longer used
+    max_endpoint_head_lag = fields.Integer(missing=10, validate=validate_non_negative)
     bridge_contract_address = AddressField(required=True)
     max_reorg_depth = fields.Integer(validate=validate_non_negative)
     event_poll_interval = fields.Float(validate=validate_non_negative)
     event_fetch_start_block_number = fields.Integer(
         missing=0, validate=validate_non_negative
     )
+    # initial and maximum number of blocks to fetch events for in one request,
+    # the range does not grow if no maximum is given
+    event_fetch_limit = fields.Integer(missing=950, validate=validate.Range(min=1))
+    max_event_fetch_limit = fields.Integer(validate=validate.Range(min=1))
+    # maximum number of block ranges to fetch events for at the same time
+    event_fetch_concurrency = fields.Integer(
+        missing=1, validate=validate.Range(min=1, max=32)
+    )
+    max_concurrent_requests = fields.Integer(missing=16, validate=validate.Range(min=1))
+
+    @validates_schema
+    def validate_event_fetch_limits(self, in_data, **kwargs):
+        if (
+            in_data.get("max_event_fetch_limit", in_data["event_fetch_limit"])
+            < in_data["event_fetch_limit"]
+        ):
+            raise ValidationError(
+                "'max_event_fetch_limit' must not be smaller than 'event_fetch_limit'"
+            )
 
 
 class ForeignChainSchema(ChainSchema):
     max_reorg_depth = fields.Integer(missing=10, validate=validate_non_negative)
     event_poll_interval = fields.Float(missing=10, validate=validate_non_negative)
     token_contract_address = AddressField(required=True)
+    # seconds the fetched foreign blocks have to be mined after a confirmation
+    # or completion without a transfer before it is forgotten
+    orphan_eviction_margin = fields.Integer(
+        missing=3600, validate=validate_non_negative
+    )
 
 
 class HomeChainSchema(ChainSchema):
     max_reorg_depth = fields.Integer(missing=10, validate=validate_non_negative)
     event_poll_interval = fields.Float(missing=5, validate=validate_non_negative)
     gas_price = fields.Integer(missing=10 * denoms.gwei, validate=validate_non_negative)
+    # gas price up to which stuck confirmation transactions are replaced,
+    # transactions are never replaced if not given
+    max_gas_price = fields.Integer(validate=validate_non_negative)
+    # number of blocks without inclusion after which a transaction is replaced
+    transaction_replacement_blocks = fields.Integer(
+        missing=20, validate=validate.Range(min=1)
+    )
+    # gas price increase in percent of replacement transactions
+    gas_price_bump_percent = fields.Integer(missing=25, validate=validate.Range(min=10))
+    # address of the validator set contract, whose changes are followed via its
+    # events instead of polling the validator proxy if given
+    validator_set_contract_address = AddressField()
+    validator_status_reconciliation_interval = fields.Float(
+        missing=600, validate=validate_non_negative
+    )
+    # number of blocks after which transactions the node dropped are sent again
+    # and the node is checked for gaps in the nonces of our transactions
+    transaction_rebroadcast_blocks = fields.Integer(
+        missing=10, validate=validate.Range(min=1)
+    )
     # disable type check as type hint in eth_utils is wrong, (see
     # https://github.com/ethereum/eth-utils/issues/168)
     minimum_validator_balance = fields.Integer(
         missing=to_wei(0.04, "ether"), validate=validate_non_negative  # type: ignore
     )
+    # interval in seconds in which the validator balance is checked
     balance_warn_poll_interval = fields.Float(
         missing=60, validate=validate_non_negative
     )
@@ -163,6 +223,21 @@ class HomeChainSchema(ChainSchema):
     max_pending_transactions_per_block = fields.Integer(
         missing=16, validate=validate.Range(min=1, max=128)
     )
+    # number of workers sending confirmation transactions concurrently
+    confirmation_sender_workers = fields.Integer(
+        missing=4, validate=validate.Range(min=1, max=64)
+    )
+    # maximum number of ready confirmation transactions sent in one batch request
+    confirmation_batch_size = fields.Integer(
+        missing=16, validate=validate.Range(min=1, max=128)
+    )
+
+    @validates_schema
+    def validate_max_gas_price(self, in_data, **kwargs):
+        if in_data.get("max_gas_price", in_data["gas_price"]) < in_data["gas_price"]:
+            raise ValidationError(
+                "'max_gas_price' must not be smaller than 'gas_price'"
+            )
 
 
 class ConfigSchema(Schema):
@@ -172,6 +247,7 @@ class ConfigSchema(Schema):
     validator_private_key = fields.Nested(PrivateKeySchema, required=True)
     logging = LoggingField(missing=lambda: dict(FORCED_LOGGING_CONFIG))
     webservice = fields.Nested(WebserviceSchema, missing=dict)
+    persistence = fields.Nested(PersistenceSchema, missing=dict)
 
 
 def load_config(path: str) -> Dict[str, Any]:
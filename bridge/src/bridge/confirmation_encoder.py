@@ -0,0 +1,85 @@
+from typing import Dict
+
+import rlp
+from eth_account.datastructures import SignedTransaction
+from eth_keys.datatypes import PrivateKey
+from eth_utils import big_endian_to_int, keccak
+from hexbytes import HexBytes
+
+CONFIRM_TRANSFER_SELECTOR = keccak(
+    text="confirmTransfer(bytes32,bytes32,uint256,address)"
+)[:4]
+
+
+def encode_confirm_transfer(
+    transfer_hash: bytes, transaction_hash: bytes, amount: int, recipient: bytes
+) -> bytes:
+    """encode the calldata of confirmTransfer
+
+    All four arguments are static, so they are simply packed into
+    32-byte words after the function selector. recipient is the
+    canonical 20-byte address.
+    """
+    if len(transfer_hash) != 32 or len(transaction_hash) != 32:
+        raise ValueError("transfer and transaction hash must have 32 bytes")
+    if len(recipient) != 20:
+        raise ValueError("recipient must be a canonical address")
+    if not 0 <= amount < 2 ** 256:
+        raise ValueError(f"amount {amount} does not fit into uint256")
+    return b"".join(
+        [
+            CONFIRM_TRANSFER_SELECTOR,
+            transfer_hash,
+            transaction_hash,
+            amount.to_bytes(32, "big"),
+            recipient.rjust(32, b"\x00"),
+        ]
+    )
+
+
+def sign_transaction(
+    private_key: PrivateKey,
+    *,
+    nonce: int,
+    gas_price: int,
+    gas: int,
+    to: bytes,
+    data: bytes,
+    chain_id: int,
+) -> SignedTransaction:
+    """sign a legacy transaction without value with EIP-155 replay protection
+
+    This produces the same signed transaction as web3's
+    w3.eth.account.sign_transaction.
+    """
+    message_hash = keccak(
+        rlp.encode([nonce, gas_price, gas, to, 0, data, chain_id, 0, 0])
+    )
+    signature = private_key.sign_msg_hash(message_hash)
+    v = signature.v + 35 + 2 * chain_id
+    raw_transaction = rlp.encode(
+        [nonce, gas_price, gas, to, 0, data, v, signature.r, signature.s]
+    )
+    return SignedTransaction(
+        rawTransaction=HexBytes(raw_transaction),
+        hash=HexBytes(keccak(raw_transaction)),
+        r=signature.r,
+        s=signature.s,
+        v=v,
+    )
+
+
+def decode_transaction(raw_transaction: bytes) -> Dict:
+    """return the fields of a legacy transaction signed by sign_transaction
+
+    These are the keyword arguments to sign the same transaction again,
+    apart from the private key and chain id.
+    """
+    nonce, gas_price, gas, to, _, data, _, _, _ = rlp.decode(bytes(raw_transaction))
+    return {
+        "nonce": big_endian_to_int(nonce),
+        "gas_price": big_endian_to_int(gas_price),
+        "gas": big_endian_to_int(gas),
+        "to": to,
+        "data": data,
+    }
@@ -1,26 +1,69 @@
 import logging
-from typing import Callable
+import time
+from typing import Any, Callable, Dict, List, Optional
 
+import attr
 import gevent
+import requests
 import tenacity
+from eth_account import Account
+from eth_account.datastructures import SignedTransaction
 from eth_keys.datatypes import PrivateKey
-from eth_utils import is_checksum_address, to_checksum_address
-from gevent.queue import Queue
+from eth_utils import (
+    is_checksum_address,
+    keccak,
+    to_canonical_address,
+    to_checksum_address,
+)
+from gevent.queue import Empty, Queue
+from hexbytes import HexBytes
 from web3 import types as web3types
 from web3.contract import Contract
 from web3.datastructures import AttributeDict
 from web3.exceptions import TransactionNotFound
 
+from bridge.chain_head_tracker import ChainHeadTracker
+from bridge.confirmation_encoder import (
+    decode_transaction,
+    encode_confirm_transfer,
+    sign_transaction,
+)
 from bridge.constants import (
     CONFIRMATION_TRANSACTION_GAS_LIMIT,
     HOME_CHAIN_STEP_DURATION,
+    NOOP_TRANSACTION_GAS_LIMIT,
 )
 from bridge.contract_validation import is_bridge_validator
+from bridge.event_journal import EventJournal
+from bridge.events import TransferEvent
+from bridge.metrics import (
+    CONFIRMATION_LATENCY_BUCKETS,
+    Histogram,
+    MetricFamily,
+    collect_metrics,
+)
+from bridge.nonce_manager import NonceManager
+from bridge.rpc_batch import (
+    BatchRequestRejectedException,
+    make_raw_batch_request,
+    supports_batch_requests,
+)
 from bridge.service import Service
 from bridge.utils import compute_transfer_hash
+from bridge.webservice import get_internal_state_summary
 
 logger = logging.getLogger(__name__)
 
+# number of times a transaction rejected by the node is sent again before its
+# nonce is filled with a no-op transaction
+MAX_REJECTED_SEND_ATTEMPTS = 3
+
+# minimum gas price increase in percent nodes accept for replacement transactions
+MIN_GAS_PRICE_BUMP_PERCENT = 10
+
+# maximum number of pending confirmation transactions whose latency is measured
+MAX_MEASURED_TRANSACTIONS = 10_000
+
 
 def make_sanity_check_transfer(foreign_bridge_contract_address):
     """return a function that checks the final transfer right before it is confirmed
@@ -31,8 +74,8 @@ def make_sanity_check_transfer(foreign_bridge_contract_address):
     assert is_checksum_address(foreign_bridge_contract_address)
 
     def sanity_check_transfer(transfer_event):
-        if not isinstance(transfer_event, AttributeDict):
-            raise ValueError("not an AttributeDict")
+        if not isinstance(transfer_event, (AttributeDict, TransferEvent)):
+            raise ValueError("not an AttributeDict or TransferEvent")
         if transfer_event.args["to"] != foreign_bridge_contract_address:
             raise ValueError("Transfer was not sent to the foreign bridge")
 
@@ -50,10 +93,111 @@ def is_nonce_too_low_exception(exception):
     )
 
 
+def is_known_transaction_exception(exception):
+    """check if the error thrown by web3 means the node already has the transaction
+
+    This happens if we send a transaction again after a request timed
+    out, but the node received it the first time.
+    """
+    if not isinstance(exception, ValueError) or not isinstance(exception.args[0], dict):
+        return False
+    message = exception.args[0].get("message", "")
+    return (
+        "already known" in message
+        or "known transaction" in message
+        or "Transaction with the same hash was already imported" in message
+    )
+
+
+def is_rejected_transaction_exception(exception):
+    """check if the error thrown by web3 is a JSON RPC error returned by the node"""
+    return isinstance(exception, ValueError) and isinstance(exception.args[0], dict)
+
+
+def is_transport_exception(exception):
+    """check if a request failed on the way to the node or back
+
+    It is unknown whether the node received the request, so it can only
+    be sent again as it is.
+    """
+    return isinstance(
+        exception,
+        (
+            requests.exceptions.ConnectionError,
+            requests.exceptions.Timeout,
+            ConnectionError,
+            TimeoutError,
+        ),
+    )
+
+
 class NonceTooLowException(ValueError):
     pass
 
 
+class TransactionRejectedException(ValueError):
+    pass
+
+
+class ConfirmationLatencies:
+    """measure the time from the block of a transfer until its confirmation
+
+    The time until the confirmation transaction has been sent and until it
+    has been included in a home chain block are recorded. Block times are
+    taken from the chain head trackers. Transfers in blocks seen before
+    the remembered heads, e.g. while catching up after a restart, are not
+    measured. Transactions that are never mined have to be forgotten, at
+    most MAX_MEASURED_TRANSACTIONS are remembered.
+    """
+
+    def __init__(
+        self,
+        *,
+        foreign_chain_head_tracker: ChainHeadTracker,
+        home_chain_head_tracker: ChainHeadTracker,
+    ) -> None:
+        self.foreign_chain_head_tracker = foreign_chain_head_tracker
+        self.home_chain_head_tracker = home_chain_head_tracker
+        self.until_sent = Histogram(CONFIRMATION_LATENCY_BUCKETS)
+        self.until_mined = Histogram(CONFIRMATION_LATENCY_BUCKETS)
+        # transfer block times of the measured pending confirmation transactions
+        self._transfer_block_times: Dict[bytes, float] = {}
+
+    def record_sent(self, transaction_hash, transfer_block_number: int) -> None:
+        transfer_block_time = self.foreign_chain_head_tracker.get_block_time(
+            transfer_block_number
+        )
+        if transfer_block_time is None:
+            return
+        self.until_sent.observe(time.time() - transfer_block_time)
+        if len(self._transfer_block_times) >= MAX_MEASURED_TRANSACTIONS:
+            # forget the oldest one, it most likely got lost
+            del self._transfer_block_times[next(iter(self._transfer_block_times))]
+        self._transfer_block_times[bytes(transaction_hash)] = transfer_block_time
+
+    def forget(self, transaction_hash) -> None:
+        """stop measuring a transaction that will not be mined"""
+        self._transfer_block_times.pop(bytes(transaction_hash), None)
+
+    def record_mined(self, transaction_hash, block_number: int) -> None:
+        transfer_block_time = self._transfer_block_times.pop(
+            bytes(transaction_hash), None
+        )
+        if transfer_block_time is None:
+            return
+        block_time = self.home_chain_head_tracker.get_block_time(block_number)
+        if block_time is None:
+            block_time = time.time()
+        self.until_mined.observe(block_time - transfer_block_time)
+
+
+def _stop_after_rejected_attempts(retry_state):
+    return (
+        isinstance(retry_state.outcome.exception(), TransactionRejectedException)
+        and retry_state.attempt_number >= MAX_REJECTED_SEND_ATTEMPTS
+    )
+
+
 class ConfirmationSender:
     def __init__(
         self,
@@ -65,10 +209,17 @@ class ConfirmationSender:
         max_reorg_depth: int,
         pending_transaction_queue: Queue,
         sanity_check_transfer: Callable,
+        journal: Optional[EventJournal] = None,
+        num_workers: int = 1,
+        batch_size: int = 1,
+        gas_price_bump_percent: int = 25,
+        max_gas_price: Optional[web3types.Wei] = None,
+        confirmation_latencies: Optional[ConfirmationLatencies] = None,
     ):
         self.private_key = private_key
-        self.address = PrivateKey(self.private_key).public_key.to_canonical_address()
-        self.address_hex = PrivateKey(self.private_key).public_key.to_checksum_address()
+        self._private_key = PrivateKey(self.private_key)
+        self.address = self._private_key.public_key.to_canonical_address()
+        self.address_hex = self._private_key.public_key.to_checksum_address()
         if not is_bridge_validator(home_bridge_contract, self.address):
             logger.warning(
                 f"The address {to_checksum_address(self.address)} is not a bridge validator to confirm "
@@ -77,23 +228,50 @@ class ConfirmationSender:
 
         self.transfer_event_queue = transfer_event_queue
         self.home_bridge_contract = home_bridge_contract
+        self.home_bridge_address = to_canonical_address(home_bridge_contract.address)
         self.gas_price = gas_price
+        if gas_price_bump_percent < MIN_GAS_PRICE_BUMP_PERCENT:
+            raise ValueError(
+                f"gas_price_bump_percent must be at least {MIN_GAS_PRICE_BUMP_PERCENT}"
+            )
+        self.gas_price_bump_percent = gas_price_bump_percent
+        self.max_gas_price = max_gas_price if max_gas_price is not None else gas_price
         self.max_reorg_depth = max_reorg_depth
         self.w3 = self.home_bridge_contract.web3
         self.pending_transaction_queue = pending_transaction_queue
         self.sanity_check_transfer = sanity_check_transfer
+        self.confirmation_latencies = confirmation_latencies
         self.chain_id = int(self.w3.eth.chainId)
 
+        if num_workers < 1:
+            raise ValueError("num_workers must be at least 1")
+        self.num_workers = num_workers
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        # send transactions one by one if the provider can't do batch requests
+        self.batch_size = (
+            batch_size
+            if supports_batch_requests(self.w3, ["eth_sendRawTransaction"])
+            else 1
+        )
         self.services = [
             Service(
-                "send-confirmation-transactions", self.send_confirmation_transactions
+                f"send-confirmation-transactions-{worker_index}",
+                self.send_confirmation_transactions,
             )
+            for worker_index in range(num_workers)
         ]
+        self.num_filled_nonces = 0
+        self.num_replacements = 0
 
         self.is_parity = self.w3.clientVersion.startswith(
             "Parity"
         ) or self.w3.clientVersion.startswith("OpenEthereum")
 
+        self.nonce_manager = NonceManager(
+            self.get_next_nonce, address=self.address, journal=journal
+        )
+
     @tenacity.retry(
         wait=tenacity.wait_exponential(multiplier=1, min=5, max=120),
         before_sleep=tenacity.before_sleep_log(logger, logging.WARN),
@@ -101,16 +279,75 @@ class ConfirmationSender:
             lambda exc: isinstance(exc, Exception)
             and not isinstance(exc, NonceTooLowException)
         ),
+        stop=_stop_after_rejected_attempts,
+        reraise=True,
     )
     def _rpc_send_raw_transaction(self, raw_transaction):
+        """send the raw transaction to the node
+
+        Connection errors are retried forever. Errors returned by the node
+        are retried MAX_REJECTED_SEND_ATTEMPTS times before a
+        TransactionRejectedException is raised.
+        """
         try:
             return self.w3.eth.sendRawTransaction(raw_transaction)
         except ValueError as exc:
             if is_nonce_too_low_exception(exc):
                 raise NonceTooLowException("nonce too low") from exc
+            elif is_known_transaction_exception(exc):
+                return HexBytes(keccak(raw_transaction))
+            elif is_rejected_transaction_exception(exc):
+                raise TransactionRejectedException(exc.args[0]) from exc
             else:
                 raise exc
 
+    def _rpc_send_raw_transactions(self, raw_transactions):
+        """send the raw transactions to the node with a single batch request
+
+        Returns the response object for every transaction. If the node
+        rejects the batch request as a whole or answers it malformed, the
+        transactions are sent one by one instead.
+        """
+        try:
+            return self._rpc_send_raw_transaction_batch(raw_transactions)
+        except (BatchRequestRejectedException, requests.exceptions.HTTPError) as exc:
+            logger.warning(
+                f"Batch request with {len(raw_transactions)} transactions failed, "
+                f"sending them one by one: {exc}"
+            )
+            return [
+                self._rpc_send_raw_transaction_response(raw_transaction)
+                for raw_transaction in raw_transactions
+            ]
+
+    @tenacity.retry(
+        wait=tenacity.wait_exponential(multiplier=1, min=5, max=120),
+        before_sleep=tenacity.before_sleep_log(logger, logging.WARN),
+        retry=tenacity.retry_if_exception(is_transport_exception),
+        reraise=True,
+    )
+    def _rpc_send_raw_transaction_batch(self, raw_transactions):
+        return make_raw_batch_request(
+            self.w3,
+            [
+                ("eth_sendRawTransaction", [HexBytes(raw_transaction).hex()])
+                for raw_transaction in raw_transactions
+            ],
+        )
+
+    @tenacity.retry(
+        wait=tenacity.wait_exponential(multiplier=1, min=5, max=120),
+        before_sleep=tenacity.before_sleep_log(logger, logging.WARN),
+        retry=tenacity.retry_if_exception(is_transport_exception),
+        reraise=True,
+    )
+    def _rpc_send_raw_transaction_response(self, raw_transaction):
+        """send the raw transaction on its own and return a batch response object"""
+        try:
+            return {"result": self.w3.eth.sendRawTransaction(raw_transaction).hex()}
+        except ValueError as exc:
+            return {"error": exc.args[0] if exc.args else str(exc)}
+
     @tenacity.retry(
         wait=tenacity.wait_exponential(multiplier=1, min=5, max=120),
         before_sleep=tenacity.before_sleep_log(logger, logging.WARN),
@@ -134,26 +371,162 @@ class ConfirmationSender:
         ),
     )
     def send_confirmation_from_transfer_event(self, transfer_event):
-        nonce = self.get_next_nonce()
-        transaction = self.prepare_confirmation_transaction(
-            transfer_event=transfer_event, nonce=nonce, chain_id=self.chain_id
-        )
-        assert transaction is not None
-        self.send_confirmation_transaction(transaction)
+        nonce = self.nonce_manager.allocate()
+        try:
+            transaction = self.prepare_confirmation_transaction(
+                transfer_event=transfer_event, nonce=nonce, chain_id=self.chain_id
+            )
+            assert transaction is not None
+            try:
+                self.send_confirmation_transaction(transaction, transfer_event)
+            except NonceTooLowException:
+                self.nonce_manager.resync()
+                raise
+            except TransactionRejectedException as exc:
+                logger.error(
+                    f"Confirmation transaction {transaction.hash.hex()} for transfer "
+                    f"{compute_transfer_hash(transfer_event).hex()} has been "
+                    f"rejected: {exc}"
+                )
+                self.fill_nonce(nonce)
+        finally:
+            self.nonce_manager.release([nonce])
+
+    def send_confirmations_from_transfer_events(self, transfer_events):
+        """confirm the transfers with a single batch request
+
+        The transactions get consecutive nonces. Transactions rejected by
+        the node are sent again in a batch of their own, until they have
+        been rejected MAX_REJECTED_SEND_ATTEMPTS times and their nonce is
+        filled. Transfers whose transactions had a too low nonce are sent
+        again one by one with new nonces.
+        """
+        nonces = self.nonce_manager.allocate_many(len(transfer_events))
+        try:
+            nonce_too_low_transfer_events = self._send_confirmation_batch(
+                transfer_events, nonces
+            )
+        finally:
+            self.nonce_manager.release(nonces)
+
+        for transfer_event in nonce_too_low_transfer_events:
+            self.send_confirmation_from_transfer_event(transfer_event)
+
+    def _send_confirmation_batch(self, transfer_events, nonces):
+        """send the transactions with the given nonces and fill rejected nonces
+
+        Return the transfer events whose transactions had a too low nonce.
+        """
+        unsent = [
+            (
+                transfer_event,
+                nonce,
+                self.prepare_confirmation_transaction(
+                    transfer_event=transfer_event, nonce=nonce, chain_id=self.chain_id
+                ),
+            )
+            for transfer_event, nonce in zip(transfer_events, nonces)
+        ]
+        nonce_too_low_transfer_events = []
+        for attempt in range(MAX_REJECTED_SEND_ATTEMPTS):
+            if not unsent:
+                break
+            if attempt > 0:
+                gevent.sleep(HOME_CHAIN_STEP_DURATION)
+            responses = self._rpc_send_raw_transactions(
+                [transaction.rawTransaction for _, _, transaction in unsent]
+            )
+            rejected = []
+            for (transfer_event, nonce, transaction), response in zip(
+                unsent, responses
+            ):
+                if "error" not in response:
+                    self._add_pending_transaction(transaction, transfer_event)
+                    continue
+                error = response["error"]
+                exc = ValueError(
+                    error if isinstance(error, dict) else {"message": error}
+                )
+                if is_known_transaction_exception(exc):
+                    self._add_pending_transaction(transaction, transfer_event)
+                elif is_nonce_too_low_exception(exc):
+                    nonce_too_low_transfer_events.append(transfer_event)
+                else:
+                    logger.warning(
+                        f"Confirmation transaction {transaction.hash.hex()} has been "
+                        f"rejected: {error}"
+                    )
+                    rejected.append((transfer_event, nonce, transaction))
+            unsent = rejected
+
+        for transfer_event, nonce, transaction in unsent:
+            logger.error(
+                f"Confirmation transaction {transaction.hash.hex()} for transfer "
+                f"{compute_transfer_hash(transfer_event).hex()} has been rejected"
+            )
+            self.fill_nonce(nonce)
+
+        if nonce_too_low_transfer_events:
+            self.nonce_manager.resync()
+        return nonce_too_low_transfer_events
+
+    def fill_nonce(self, nonce):
+        """send a no-op transaction with the nonce of a rejected transaction
+
+        The nonce has been allocated already and other workers may have sent
+        transactions with higher nonces. None of them can be included until a
+        transaction with this nonce is.
+        """
+        transaction = self.prepare_noop_transaction(nonce=nonce, chain_id=self.chain_id)
+        try:
+            tx_hash = self._rpc_send_raw_transaction(transaction.rawTransaction)
+        except NonceTooLowException:
+            # the nonce is used already, there is no gap to fill
+            return
+        except TransactionRejectedException as exc:
+            logger.error(
+                f"Could not fill nonce {nonce} with a no-op transaction: {exc}"
+            )
+            self.nonce_manager.resync()
+            return
+        self.pending_transaction_queue.put((transaction, None))
+        self.num_filled_nonces += 1
+        logger.info(f"Sent no-op transaction {tx_hash.hex()} with nonce {nonce}")
 
     def send_confirmation_transactions(self):
+        """send confirmation transactions for the transfers in the queue
+
+        The sender runs num_workers of these loops. Nonces are allocated
+        right after taking a transfer from the queue, so transfers get
+        consecutive nonces in queue order while the workers wait for the
+        node concurrently.
+        """
         while True:
-            transfer_event = self.transfer_event_queue.get()
-            try:
-                self.sanity_check_transfer(transfer_event)
-            except Exception as exc:
-                raise SystemExit(
-                    f"Internal error: sanity check failed for {transfer_event}: {exc}"
-                ) from exc
-            self.send_confirmation_from_transfer_event(transfer_event)
+            transfer_events = self.get_transfer_event_batch()
+            for transfer_event in transfer_events:
+                try:
+                    self.sanity_check_transfer(transfer_event)
+                except Exception as exc:
+                    raise SystemExit(
+                        f"Internal error: sanity check failed for {transfer_event}: {exc}"
+                    ) from exc
+            if len(transfer_events) == 1:
+                self.send_confirmation_from_transfer_event(transfer_events[0])
+            else:
+                self.send_confirmations_from_transfer_events(transfer_events)
 
     run = send_confirmation_transactions
 
+    def get_transfer_event_batch(self):
+        """wait for a transfer and take up to batch_size ready ones from the queue"""
+        transfer_events = [self.transfer_event_queue.get()]
+        while len(transfer_events) < self.batch_size:
+            try:
+                transfer_events.append(self.transfer_event_queue.get_nowait())
+            except Empty:
+                break
+        return transfer_events
+
     def prepare_confirmation_transaction(
         self, transfer_event, nonce: web3types.Nonce, chain_id: int
     ):
@@ -173,30 +546,79 @@ class ConfirmationSender:
         )
         # hard code gas limit to avoid executing the transaction (which would fail as the sender
         # address is not defined before signing the transaction, but the contract asserts that
-        # it's a validator)
-        transaction = self.home_bridge_contract.functions.confirmTransfer(
-            transferHash=transfer_hash,
-            transactionHash=transaction_hash,
-            amount=amount,
-            recipient=recipient,
-        ).buildTransaction(
-            {
-                "gasPrice": self.gas_price,
-                "nonce": nonce,
-                "gas": CONFIRMATION_TRANSACTION_GAS_LIMIT,  # type: ignore
-                "chainId": chain_id,
-            }
-        )
-        signed_transaction = self.w3.eth.account.sign_transaction(
-            transaction, self.private_key
+        # it's a validator). The transaction is encoded and signed directly instead of going
+        # through web3's contract and account APIs, which is a lot faster.
+        signed_transaction = sign_transaction(
+            self._private_key,
+            nonce=nonce,
+            gas_price=self.gas_price,
+            gas=CONFIRMATION_TRANSACTION_GAS_LIMIT,
+            to=self.home_bridge_address,
+            data=encode_confirm_transfer(
+                transfer_hash, transaction_hash, amount, to_canonical_address(recipient)
+            ),
+            chain_id=chain_id,
         )
 
         return signed_transaction
 
-    def send_confirmation_transaction(self, transaction):
+    def prepare_noop_transaction(self, nonce: web3types.Nonce, chain_id: int):
+        return sign_transaction(
+            self._private_key,
+            nonce=nonce,
+            gas_price=self.gas_price,
+            gas=NOOP_TRANSACTION_GAS_LIMIT,
+            to=self.address,
+            data=b"",
+            chain_id=chain_id,
+        )
+
+    def bump_gas_price(self, gas_price: int) -> int:
+        return min(
+            self.max_gas_price,
+            gas_price + -(-gas_price * self.gas_price_bump_percent // 100),
+        )
+
+    def replace_transaction(self, transaction):
+        """send the transaction again with the same nonce and a higher gas price
+
+        Returns the replacement transaction, or None if the gas price can't be
+        raised anymore or the node did not accept the replacement, e.g.
+        because the nonce has been used in the meantime.
+        """
+        fields = decode_transaction(transaction.rawTransaction)
+        gas_price = self.bump_gas_price(fields["gas_price"])
+        if gas_price <= fields["gas_price"]:
+            return None
+        fields["gas_price"] = gas_price
+        replacement = sign_transaction(
+            self._private_key, chain_id=self.chain_id, **fields
+        )
+        try:
+            self._rpc_send_raw_transaction(replacement.rawTransaction)
+        except (NonceTooLowException, TransactionRejectedException) as exc:
+            logger.warning(
+                f"Could not replace transaction {transaction.hash.hex()}: {exc}"
+            )
+            return None
+        self.num_replacements += 1
+        logger.info(
+            f"Replaced transaction {transaction.hash.hex()} with "
+            f"{replacement.hash.hex()} with gas price {gas_price}"
+        )
+        return replacement
+
+    def _add_pending_transaction(self, transaction, transfer_event=None):
+        if self.confirmation_latencies is not None and transfer_event is not None:
+            self.confirmation_latencies.record_sent(
+                transaction.hash, transfer_event.blockNumber
+            )
+        self.pending_transaction_queue.put((transaction, transfer_event))
+        logger.info(f"Sent confirmation transaction {transaction.hash.hex()}")
+
+    def send_confirmation_transaction(self, transaction, transfer_event=None):
         tx_hash = self._rpc_send_raw_transaction(transaction.rawTransaction)
-        self.pending_transaction_queue.put(transaction)
-        logger.info(f"Sent confirmation transaction {tx_hash.hex()}")
+        self._add_pending_transaction(transaction, transfer_event)
         return tx_hash
 
 
@@ -206,11 +628,65 @@ watcher_retry = tenacity.retry(
 )
 
 
+@attr.s(auto_attribs=True)
+class PendingTransaction:
+    """a sent transaction together with its replacements"""
+
+    transactions: List[SignedTransaction]
+    first_block: int
+    last_sent_block: int
+    # last block at which the node knew one of the transactions
+    last_seen_block: int
+    # the transfer confirmed by the transactions, None for no-op transactions
+    transfer_event: Optional[Any] = None
+
+
 class ConfirmationWatcher:
-    def __init__(self, *, w3, pending_transaction_queue: Queue, max_reorg_depth: int):
+    """wait for the sent transactions to be included in reorg-safe blocks
+
+    All pending transactions are tracked together. Every new reorg-safe
+    block is fetched once and all pending transactions included in it are
+    resolved. The pending_transaction_queue is emptied on every new block,
+    its size is the only bound on the transactions sent ahead of the watcher.
+    The queue holds (transaction, transfer event) pairs. If the nonce of a
+    pending transaction has been used by another transaction, the transfer
+    is put into the transfer_event_queue to be confirmed again.
+    """
+
+    def __init__(
+        self,
+        *,
+        w3,
+        pending_transaction_queue: Queue,
+        max_reorg_depth: int,
+        chain_head_tracker: Optional[ChainHeadTracker] = None,
+        nonce_manager: Optional[NonceManager] = None,
+        replace_transaction: Optional[Callable] = None,
+        replacement_blocks: int = 20,
+        rebroadcast_blocks: int = 10,
+        confirmation_latencies: Optional[ConfirmationLatencies] = None,
+        transfer_event_queue: Optional[Queue] = None,
+    ):
         self.w3 = w3
         self.max_reorg_depth = max_reorg_depth
         self.pending_transaction_queue = pending_transaction_queue
+        self.chain_head_tracker = chain_head_tracker
+        self.nonce_manager = nonce_manager
+        self.replace_transaction = replace_transaction
+        self.replacement_blocks = replacement_blocks
+        self.rebroadcast_blocks = rebroadcast_blocks
+        self.confirmation_latencies = confirmation_latencies
+        self.transfer_event_queue = transfer_event_queue
+        self.num_dropped_transactions = 0
+        self.num_rebroadcasts = 0
+        self.num_replaced_transactions = 0
+        self.last_nonce_gap_check_block: Optional[int] = None
+
+        self.pending_transactions: List[PendingTransaction] = []
+        # maps the hashes of all pending transactions and their replacements
+        self._pending_transactions_by_hash: Dict[bytes, PendingTransaction] = {}
+        self.last_scanned_block: Optional[int] = None
+        self._pending_transaction_queue_was_full = False
 
         self.services = [
             Service("watch-pending-transactions", self.watch_pending_transactions)
@@ -233,30 +709,343 @@ class ConfirmationWatcher:
         except TransactionNotFound:
             return None
 
+    @watcher_retry
+    def _rpc_get_block_transaction_hashes(self, block_number):
+        return self.w3.eth.getBlock(block_number).transactions
+
+    @watcher_retry
+    def _rpc_get_transaction(self, txhash):
+        try:
+            return self.w3.eth.getTransaction(txhash)
+        except TransactionNotFound:
+            return None
+
+    @watcher_retry
+    def _rpc_get_transaction_count(self, address):
+        return self.w3.eth.getTransactionCount(address, "latest")
+
+    @tenacity.retry(
+        wait=tenacity.wait_exponential(multiplier=1, min=5, max=120),
+        before_sleep=tenacity.before_sleep_log(logger, logging.WARN),
+        retry=tenacity.retry_if_exception(lambda exc: not isinstance(exc, ValueError)),
+    )
+    def _rpc_send_raw_transaction(self, raw_transaction):
+        return self.w3.eth.sendRawTransaction(raw_transaction)
+
     @watcher_retry
     def _rpc_latest_block(self):
+        if self.chain_head_tracker is not None:
+            return self.chain_head_tracker.get_node_status().block_number
         return self.w3.eth.blockNumber
 
-    def _wait_for_next_block(self):
+    def _wait_for_next_block(self, block_number):
         logger.debug("_wait_for_next_block: %s", HOME_CHAIN_STEP_DURATION)
-        gevent.sleep(HOME_CHAIN_STEP_DURATION)
+        if self.chain_head_tracker is not None:
+            self.chain_head_tracker.wait_for_next_block(
+                block_number, timeout=HOME_CHAIN_STEP_DURATION
+            )
+        else:
+            gevent.sleep(HOME_CHAIN_STEP_DURATION)
 
-    def watch_pending_transactions(self):
+    @watcher_retry
+    def _check_for_nonce_gap(self):
+        return self.nonce_manager.check_for_gap()
+
+    def _add_pending_transaction(self, transaction, transfer_event, block_number):
+        logger.debug("waiting for transaction %s", transaction.hash.hex())
+        pending_transaction = PendingTransaction(
+            transactions=[transaction],
+            first_block=block_number,
+            last_sent_block=block_number,
+            last_seen_block=block_number,
+            transfer_event=transfer_event,
+        )
+        self.pending_transactions.append(pending_transaction)
+        self._pending_transactions_by_hash[
+            bytes(transaction.hash)
+        ] = pending_transaction
+        return pending_transaction
+
+    def _remove_pending_transaction(self, pending_transaction):
+        self.pending_transactions.remove(pending_transaction)
+        for transaction in pending_transaction.transactions:
+            del self._pending_transactions_by_hash[bytes(transaction.hash)]
+
+    def track_new_transactions(self, block_number):
+        """take all sent transactions from the pending transaction queue
+
+        Senders put their transactions into the queue after sending them. If
+        the queue has been full, they may have been blocked while their
+        transactions got included in blocks that have been scanned already.
+        These transactions are resolved by their receipts.
+        """
+        look_up_receipts = self._pending_transaction_queue_was_full
+        self._pending_transaction_queue_was_full = self.pending_transaction_queue.full()
         while True:
-            oldest_pending_transaction = self.pending_transaction_queue.get()
-            logger.debug(
-                "waiting for transaction %s", oldest_pending_transaction.hash.hex()
+            try:
+                (
+                    transaction,
+                    transfer_event,
+                ) = self.pending_transaction_queue.get_nowait()
+            except Empty:
+                break
+            pending_transaction = self._add_pending_transaction(
+                transaction, transfer_event, block_number
             )
-            receipt = self.wait_for_transaction(oldest_pending_transaction)
-            self._log_txreceipt(receipt)
+            if look_up_receipts:
+                self._resolve_if_mined(pending_transaction)
 
-    run = watch_pending_transactions
+    def _resolve_mined_transaction(self, pending_transaction, block_number):
+        self._remove_pending_transaction(pending_transaction)
+        if self.confirmation_latencies is not None:
+            # measured under the hash of the originally sent transaction
+            self.confirmation_latencies.record_mined(
+                pending_transaction.transactions[0].hash, block_number
+            )
+
+    def _resolve_if_mined(self, pending_transaction):
+        """resolve a pending transaction mined in a block scanned already
+
+        Returns whether one of its transactions has been mined. Transactions
+        mined in later blocks are resolved once these are reorg-safe.
+        """
+        for transaction in pending_transaction.transactions:
+            receipt = self._rpc_get_receipt(transaction.hash)
+            if receipt is None:
+                continue
+            if receipt.blockNumber <= self.last_scanned_block:
+                self._resolve_mined_transaction(
+                    pending_transaction, receipt.blockNumber
+                )
+                self._log_txreceipt(receipt)
+            return True
+        return False
+
+    def resolve_transactions(self, latest_block):
+        """resolve the pending transactions included in new reorg-safe blocks"""
+        safe_block = latest_block - self.max_reorg_depth
+        while self.last_scanned_block < safe_block:
+            block_number = self.last_scanned_block + 1
+            for transaction_hash in self._rpc_get_block_transaction_hashes(
+                block_number
+            ):
+                pending_transaction = self._pending_transactions_by_hash.get(
+                    bytes(transaction_hash)
+                )
+                if pending_transaction is None:
+                    continue
+                self._resolve_mined_transaction(pending_transaction, block_number)
+                receipt = self._rpc_get_receipt(transaction_hash)
+                if receipt is not None:
+                    self._log_txreceipt(receipt)
+            self.last_scanned_block = block_number
+
+    def rebroadcast_dropped_transactions(self, latest_block):
+        """send transactions the node does not know anymore again
+
+        Nodes drop transactions from their pool, e.g. when they restart.
+        Every rebroadcast_blocks blocks, the node is asked whether it still
+        knows the pending transactions. If it knows none of the transactions
+        of a pending transaction, the latest one is sent again from its raw
+        bytes. If the node does not accept it anymore, the pending
+        transaction is resolved if it has been mined or its nonce has been
+        used by another transaction. A transaction the node knows from a
+        block that has been scanned before it was tracked is resolved by its
+        receipt.
+        """
+        for pending_transaction in list(self.pending_transactions):
+            if (
+                latest_block - pending_transaction.last_seen_block
+                < self.rebroadcast_blocks
+            ):
+                continue
+            pending_transaction.last_seen_block = latest_block
+            known_transactions = [
+                known_transaction
+                for known_transaction in (
+                    self._rpc_get_transaction(transaction.hash)
+                    for transaction in pending_transaction.transactions
+                )
+                if known_transaction is not None
+            ]
+            if any(
+                known_transaction.blockNumber is not None
+                and known_transaction.blockNumber <= self.last_scanned_block
+                for known_transaction in known_transactions
+            ):
+                self._resolve_if_mined(pending_transaction)
+                continue
+            if known_transactions:
+                continue
+
+            transaction = pending_transaction.transactions[-1]
+            self.num_dropped_transactions += 1
+            logger.warning(
+                f"Transaction {transaction.hash.hex()} has been dropped, sending it again"
+            )
+            try:
+                self._rpc_send_raw_transaction(transaction.rawTransaction)
+            except ValueError as exc:
+                # e.g. the nonce has been used by another transaction already
+                logger.warning(
+                    f"Could not send transaction {transaction.hash.hex()} again: {exc}"
+                )
+                self.resolve_unsendable_transaction(pending_transaction)
+                continue
+            self.num_rebroadcasts += 1
+
+    def resolve_unsendable_transaction(self, pending_transaction):
+        """stop waiting for a pending transaction whose nonce has been used
+
+        If one of its transactions has been mined, it is resolved like any
+        mined transaction. If another transaction with the same nonce has
+        been included in a block, the transfer is confirmed again with a new
+        nonce. Confirming a transfer twice is
+        harmless, the home bridge counts the confirmation of a validator only
+        once. Otherwise the transaction stays pending.
+        """
+        if self._resolve_if_mined(pending_transaction):
+            return
+
+        transaction = pending_transaction.transactions[-1]
+        nonce = decode_transaction(transaction.rawTransaction)["nonce"]
+        sender = Account.recover_transaction(transaction.rawTransaction)
+        if self._rpc_get_transaction_count(sender) <= nonce:
+            return
 
-    def wait_for_transaction(self, pending_transaction):
+        self._remove_pending_transaction(pending_transaction)
+        if self.confirmation_latencies is not None:
+            self.confirmation_latencies.forget(pending_transaction.transactions[0].hash)
+        self.num_replaced_transactions += 1
+        logger.warning(
+            f"Nonce {nonce} of transaction {transaction.hash.hex()} has been used "
+            f"by another transaction"
+        )
+        if (
+            pending_transaction.transfer_event is not None
+            and self.transfer_event_queue is not None
+        ):
+            self.transfer_event_queue.put(pending_transaction.transfer_event)
+
+    def check_for_nonce_gap(self, latest_block):
+        """check the node for a gap in our nonces every rebroadcast_blocks blocks
+
+        The pending transactions might be stuck behind a nonce the node
+        never saw. This is only checked if a transaction has been pending
+        for rebroadcast_blocks blocks, i.e. after it had the chance to be
+        sent again.
+        """
+        if self.nonce_manager is None:
+            return
+        if (
+            self.last_nonce_gap_check_block is not None
+            and latest_block - self.last_nonce_gap_check_block < self.rebroadcast_blocks
+        ):
+            return
+        if any(
+            latest_block - pending_transaction.first_block >= self.rebroadcast_blocks
+            for pending_transaction in self.pending_transactions
+        ):
+            self.last_nonce_gap_check_block = latest_block
+            self._check_for_nonce_gap()
+
+    def handle_stuck_transactions(self, latest_block):
+        """replace transactions that are not included"""
+        if self.replace_transaction is None:
+            return
+        for pending_transaction in list(self.pending_transactions):
+            if (
+                latest_block - pending_transaction.last_sent_block
+                < self.replacement_blocks
+            ):
+                continue
+            replacement = self.replace_transaction(pending_transaction.transactions[-1])
+            if replacement is not None:
+                pending_transaction.transactions.append(replacement)
+                self._pending_transactions_by_hash[
+                    bytes(replacement.hash)
+                ] = pending_transaction
+            pending_transaction.last_sent_block = latest_block
+
+    def watch_pending_transactions(self):
+        latest_block = self._rpc_latest_block()
+        self.last_scanned_block = latest_block
         while True:
-            confirmation_threshold = self._rpc_latest_block() - self.max_reorg_depth
-            receipt = self._rpc_get_receipt(pending_transaction.hash)
-            if receipt and receipt.blockNumber <= confirmation_threshold:
-                return receipt
-            else:
-                self._wait_for_next_block()
+            if not self.pending_transactions:
+                # transactions sent from now on are included in later blocks
+                self.last_scanned_block = max(self.last_scanned_block, latest_block)
+                self.pending_transaction_queue.peek()
+            latest_block = self._rpc_latest_block()
+            self.track_new_transactions(latest_block)
+            self.resolve_transactions(latest_block)
+            self.rebroadcast_dropped_transactions(latest_block)
+            self.check_for_nonce_gap(latest_block)
+            self.handle_stuck_transactions(latest_block)
+            if self.pending_transactions:
+                self._wait_for_next_block(latest_block)
+
+    run = watch_pending_transactions
+
+
+@get_internal_state_summary.register(ConfirmationSender)
+def get_state_summary(confirmation_sender):
+    return {
+        "num_workers": confirmation_sender.num_workers,
+        "batch_size": confirmation_sender.batch_size,
+        "num_filled_nonces": confirmation_sender.num_filled_nonces,
+        "num_replacements": confirmation_sender.num_replacements,
+    }
+
+
+@get_internal_state_summary.register(ConfirmationWatcher)
+def get_watcher_state_summary(confirmation_watcher):
+    return {
+        "num_pending_transactions": len(confirmation_watcher.pending_transactions),
+        "num_dropped_transactions": confirmation_watcher.num_dropped_transactions,
+        "num_rebroadcasts": confirmation_watcher.num_rebroadcasts,
+        "num_replaced_transactions": confirmation_watcher.num_replaced_transactions,
+    }
+
+
+@collect_metrics.register(ConfirmationWatcher)
+def collect_watcher_metrics(confirmation_watcher):
+    return [
+        MetricFamily(
+            "bridge_pending_transactions",
+            "gauge",
+            "Number of sent transactions waiting to be included in a reorg-safe block",
+        ).add(len(confirmation_watcher.pending_transactions)),
+        MetricFamily(
+            "bridge_dropped_transactions_total",
+            "counter",
+            "Number of pending transactions the node did not know anymore",
+        ).add(confirmation_watcher.num_dropped_transactions),
+        MetricFamily(
+            "bridge_rebroadcast_transactions_total",
+            "counter",
+            "Number of dropped transactions that have been sent again",
+        ).add(confirmation_watcher.num_rebroadcasts),
+        MetricFamily(
+            "bridge_replaced_transactions_total",
+            "counter",
+            "Number of pending transactions whose nonce has been used by another "
+            "transaction",
+        ).add(confirmation_watcher.num_replaced_transactions),
+    ]
+
+
+@collect_metrics.register(ConfirmationLatencies)
+def collect_confirmation_latency_metrics(confirmation_latencies):
+    return [
+        MetricFamily(
+            "bridge_transfer_to_confirmation_sent_seconds",
+            "histogram",
+            "Time from the block of a transfer until its confirmation has been sent",
+        ).add(confirmation_latencies.until_sent),
+        MetricFamily(
+            "bridge_transfer_to_confirmation_mined_seconds",
+            "histogram",
+            "Time from the block of a transfer until its confirmation has been "
+            "included in a block",
+        ).add(confirmation_latencies.until_mined),
+    ]
@@ -1,7 +1,7 @@
 import logging
 import time
 
-from gevent.queue import Queue
+from gevent.queue import Empty, Queue
 
 from bridge.event_fetcher import FetcherReachedHeadEvent
 from bridge.events import ChainRole
@@ -10,6 +10,9 @@ from bridge.transfer_recorder import TransferRecorder
 
 logger = logging.getLogger(__name__)
 
+# maximum number of events taken from a queue and applied at once
+MAX_EVENT_BATCH_SIZE = 1000
+
 
 class ConfirmationTaskPlanner:
     def __init__(
@@ -20,9 +23,13 @@ class ConfirmationTaskPlanner:
         transfer_event_queue: Queue,
         home_bridge_event_queue: Queue,
         confirmation_task_queue: Queue,
+        max_event_batch_size: int = MAX_EVENT_BATCH_SIZE,
     ) -> None:
+        if max_event_batch_size <= 0:
+            raise ValueError("max_event_batch_size must be positive")
         self.recorder = recorder
         self.sync_persistence_time = sync_persistence_time
+        self.max_event_batch_size = max_event_batch_size
 
         self.control_queue = control_queue
         self.transfer_event_queue = transfer_event_queue
@@ -51,14 +58,44 @@ class ConfirmationTaskPlanner:
     def run(self):
         run_services(self.services)
 
+    def get_event_batch(self, queue) -> list:
+        """wait for an event and take all further events available in the queue
+
+        The events are returned in the order of the queue. At most
+        max_event_batch_size events are taken, unless further events
+        belong to the same block as the last one. The fetchers put all
+        events of a block into the queue at once, so a batch always ends
+        with all events of its last block and the recorder never has
+        applied only some of the events of a block.
+        """
+        events = [queue.get()]
+        while True:
+            try:
+                event = queue.peek_nowait()
+            except Empty:
+                break
+            if len(events) >= self.max_event_batch_size:
+                block_number = getattr(event, "blockNumber", None)
+                if block_number is None or block_number != getattr(
+                    events[-1], "blockNumber", None
+                ):
+                    break
+            events.append(queue.get_nowait())
+        return events
+
     def process_events_from_queue(self, queue) -> None:
         while True:
-            event = queue.get()
-            self.recorder.apply_event(event)
-            if (
-                isinstance(event, FetcherReachedHeadEvent)
+            events = self.get_event_batch(queue)
+            self.recorder.apply_events(events)
+
+            home_reached_head_events = [
+                event
+                for event in events
+                if isinstance(event, FetcherReachedHeadEvent)
                 and event.chain_role == ChainRole.home
-            ):
+            ]
+            if home_reached_head_events:
+                event = home_reached_head_events[-1]
                 logger.debug(
                     "Home bridge is in sync now, last fetched reorg-safe block: %s",
                     event.last_fetched_block_number,
@@ -103,3 +103,15 @@ MINIMAL_VALIDATOR_PROXY_ABI = [
         "type": "function",
     }
 ]
+
+MINIMAL_VALIDATOR_SET_ABI = [
+    {
+        "anonymous": False,
+        "inputs": [
+            {"indexed": True, "name": "_parentHash", "type": "bytes32"},
+            {"indexed": False, "name": "_newSet", "type": "address[]"},
+        ],
+        "name": "InitiateChange",
+        "type": "event",
+    }
+]
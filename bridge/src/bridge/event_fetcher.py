@@ -1,18 +1,133 @@
 import logging
 import time
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 
+import gevent.event
+import gevent.pool
+import requests
 import tenacity
+from eth_utils import decode_hex
 from web3 import Web3
+from web3._utils.events import construct_event_topic_set
 from web3.contract import Contract
 from web3.datastructures import AttributeDict
 
 from bridge import node_status
+from bridge.chain_head_tracker import ChainHeadTracker
+from bridge.event_journal import EventJournal
 from bridge.events import ChainRole, FetcherReachedHeadEvent
+from bridge.log_decoder import decode_log
+from bridge.metrics import MetricFamily, collect_metrics
 from bridge.utils import sort_events
+from bridge.webservice import get_internal_state_summary
 
 NODE_STATUS_CACHE_TIME_SECONDS = 1
 
+# substrings of error messages nodes and hosted providers use to reject a
+# getLogs request because the range contains too many logs
+RANGE_TOO_LARGE_MESSAGES = (
+    "query returned more than",
+    "block range",
+    "too many",
+    "limit exceeded",
+    "response size exceeded",
+    "timeout",
+    "timed out",
+)
+
+
+def is_block_range_too_large_exception(exception):
+    """check if the error thrown by web3 says that the range given to getLogs was too large"""
+    if isinstance(exception, requests.exceptions.Timeout):
+        return True
+    if not isinstance(exception, ValueError) or not exception.args:
+        return False
+    if not isinstance(exception.args[0], dict):
+        return False
+    message = exception.args[0].get("message", "").lower()
+    return any(s in message for s in RANGE_TOO_LARGE_MESSAGES)
+
+
+class BlockRangeTooLargeException(Exception):
+    pass
+
+
+class AdaptiveBlockRange:
+    """size of the block range the event fetcher requests in one go
+
+    The size is doubled while the node answers fast with only a few
+    events and is halved when answers get slow or dense. When the node
+    rejects a range, the range is bisected and the size above which we
+    only grow slowly is lowered, so that we do not immediately run into
+    the same limit again.
+    """
+
+    def __init__(
+        self,
+        *,
+        initial_size: int,
+        max_size: int,
+        min_size: int = 1,
+        target_latency: float = 2.0,
+        max_events: int = 1000,
+    ):
+        if not 0 < min_size <= initial_size <= max_size:
+            raise ValueError(
+                "Block range sizes must satisfy 0 < min_size <= initial_size <= max_size!"
+            )
+
+        self.size = initial_size
+        self.initial_size = initial_size
+        self.min_size = min_size
+        self.max_size = max_size
+        self.target_latency = target_latency
+        self.max_events = max_events
+        self.fast_growth_limit = max_size
+        self.last_latency: Optional[float] = None
+
+    def record_success(self, *, num_blocks: int, num_events: int, latency: float):
+        self.last_latency = latency
+        if latency > self.target_latency or num_events > self.max_events:
+            self.size = max(self.size // 2, self.min_size)
+        elif (
+            num_blocks >= self.size
+            and 2 * latency <= self.target_latency
+            and 2 * num_events <= self.max_events
+        ):
+            if self.size < self.fast_growth_limit:
+                self.size = min(2 * self.size, self.fast_growth_limit)
+            else:
+                self.size += self.initial_size
+            self.size = min(self.size, self.max_size)
+
+    def record_range_too_large(self, num_blocks: int):
+        self.size = max(min(self.size, num_blocks) // 2, self.min_size)
+        self.fast_growth_limit = self.size
+
+
+def combine_topic_sets(topic_sets: List[List[Any]]) -> List[Any]:
+    """combine the topic filters of multiple events into a single one
+
+    The first topic of the result matches the signature of any of the
+    events. Further topics are only restricted if all events restrict
+    them, otherwise they match anything and the restriction has to be
+    checked locally.
+    """
+    combined: List[Any] = [list(dict.fromkeys(ts[0] for ts in topic_sets))]
+    for position in range(1, max(len(ts) for ts in topic_sets)):
+        values: Optional[List[Any]] = []
+        for topic_set in topic_sets:
+            value = topic_set[position] if position < len(topic_set) else None
+            if value is None or values is None:
+                values = None
+            else:
+                values += value if isinstance(value, list) else [value]
+        combined.append(list(dict.fromkeys(values)) if values is not None else None)
+
+    while combined[-1] is None:
+        combined.pop()
+    return combined
+
 
 class EventFetcher:
     def __init__(
@@ -22,17 +137,43 @@ class EventFetcher:
         contract: Contract,
         filter_definition: Dict[str, Dict[str, Any]],
         event_fetch_limit: int = 950,
+        max_event_fetch_limit: Optional[int] = None,
         event_queue: Any,
         max_reorg_depth: int,
         start_block_number: int,
         chain_role: ChainRole,
+        combine_filters: bool = False,
+        fetch_concurrency: int = 1,
+        journal: Optional[EventJournal] = None,
+        chain_head_tracker: Optional[ChainHeadTracker] = None,
+        report_reached_head: bool = True,
     ):
+        """fetch the events given by filter_definition from the contract
+
+        If combine_filters is set, all events of a range are fetched with
+        a single getLogs request and are decoded locally, into event
+        records for the events of the bridge. While catching up, up to
+        fetch_concurrency consecutive ranges are fetched at the same time.
+
+        If a journal is given, fetched events are recorded in it before
+        they are put on the event queue.
+
+        If a chain head tracker is given, the head and sync state of the
+        node are taken from it instead of being queried by the fetcher,
+        and every update of the tracker wakes up fetch_events.
+
+        Unless report_reached_head is False, a FetcherReachedHeadEvent is
+        put on the event queue whenever the fetcher has caught up.
+        """
         if event_fetch_limit <= 0:
             raise ValueError("Can not fetch events with zero or negative limit!")
 
         if max_reorg_depth < 0:
             raise ValueError("Invalid maximum reorg depth with a negative value!")
 
+        if fetch_concurrency <= 0:
+            raise ValueError("Can not fetch events with zero or negative concurrency!")
+
         if start_block_number < 0:
             raise ValueError(
                 "Can not fetch events starting from a negative block number!"
@@ -43,12 +184,33 @@ class EventFetcher:
         self.web3 = web3
         self.contract = contract
         self.filter_definition = filter_definition
-        self.event_fetch_limit = event_fetch_limit
+        self.block_range = AdaptiveBlockRange(
+            initial_size=event_fetch_limit,
+            max_size=max_event_fetch_limit or event_fetch_limit,
+        )
         self.event_queue = event_queue
         self.max_reorg_depth = max_reorg_depth
         self.last_fetched_block_number = start_block_number - 1
+        self.fetch_concurrency = fetch_concurrency
+        self._fetch_pool = gevent.pool.Pool(fetch_concurrency)
+        self.journal = journal
+        self._journaled_block_number = self.last_fetched_block_number
 
         self._node_status = None
+        # (block number, timestamp) of the last block whose timestamp was fetched
+        self._block_timestamp: Optional[Tuple[int, int]] = None
+        # set when a new block has become reorg safe, see notify_new_block
+        self._new_block_event = gevent.event.Event()
+        self.chain_head_tracker = chain_head_tracker
+        self.report_reached_head = report_reached_head
+        if chain_head_tracker is not None:
+            chain_head_tracker.add_listener(
+                lambda status: self.notify_new_block(status.latest_synced_block)
+            )
+
+        self.combined_log_filter: Optional[Dict[str, Any]] = None
+        if combine_filters:
+            self._init_combined_log_filter()
 
         # We can't use the tenacity decorator because we're using an
         # instance local logger So, we instantiate the Retrying object
@@ -57,8 +219,64 @@ class EventFetcher:
             wait=tenacity.wait_exponential(multiplier=1, min=5, max=120),
             before_sleep=tenacity.before_sleep_log(self.logger, logging.WARN),
         )
+        # a range rejected by the node is bisected instead of retried
+        self._retrying_get_logs = self._retrying.copy(
+            retry=tenacity.retry_if_exception(
+                lambda exc: not isinstance(exc, BlockRangeTooLargeException)
+            )
+        )
+
+    def _init_combined_log_filter(self):
+        # maps the signature topic to the event used for decoding and the
+        # topic restrictions a log must match
+        self._combined_events: Dict[bytes, Any] = {}
+        topic_sets = []
+        for event_name, argument_filters in self.filter_definition.items():
+            contract_event = self.contract.events[event_name]()
+            topic_set = construct_event_topic_set(
+                contract_event.abi, self.web3.codec, argument_filters
+            )
+            topic_sets.append(topic_set)
+
+            restrictions = [
+                (
+                    position,
+                    {
+                        decode_hex(topic)
+                        for topic in (value if isinstance(value, list) else [value])
+                    },
+                )
+                for position, value in enumerate(topic_set)
+                if value is not None and position > 0
+            ]
+            self._combined_events[decode_hex(topic_set[0])] = (
+                contract_event,
+                restrictions,
+            )
+
+        self.combined_log_filter = {
+            "address": self.contract.address,
+            "topics": combine_topic_sets(topic_sets),
+        }
+
+    def _decode_combined_log(self, log):
+        """decode a log fetched with the combined filter
+
+        Our own events are decoded into compact event records, others
+        with web3. Returns None if the log does not match the argument
+        filters of its event."""
+        contract_event, restrictions = self._combined_events[bytes(log.topics[0])]
+        for position, topics in restrictions:
+            if position >= len(log.topics) or bytes(log.topics[position]) not in topics:
+                return None
+        event = decode_log(log)
+        if event is None:
+            event = contract_event.processLog(log)
+        return event
 
     def _rpc_get_cached_node_status(self):
+        if self.chain_head_tracker is not None:
+            return self.chain_head_tracker.get_node_status()
         if (
             self._node_status is None
             or time.time() - self._node_status.timestamp
@@ -76,6 +294,31 @@ class EventFetcher:
     def _rpc_cached_is_syncing(self):
         return self._rpc_get_cached_node_status().is_syncing
 
+    def _rpc_get_block_timestamp(self, block_number: int) -> Optional[int]:
+        if block_number < 0:
+            return None
+        if self._block_timestamp is None or self._block_timestamp[0] != block_number:
+            timestamp = self._retrying.call(
+                lambda: self.web3.eth.getBlock(block_number).timestamp
+            )
+            self._block_timestamp = (block_number, timestamp)
+        return self._block_timestamp[1]
+
+    def _retry_get_logs(self, get_logs, from_block_number, to_block_number):
+        def call():
+            try:
+                return get_logs()
+            except Exception as exc:
+                # a range of a single block can not be split any further
+                if (
+                    from_block_number < to_block_number
+                    and is_block_range_too_large_exception(exc)
+                ):
+                    raise BlockRangeTooLargeException("block range too large") from exc
+                raise exc
+
+        return self._retrying_get_logs.call(call)
+
     def _rpc_get_logs(
         self,
         event_name: str,
@@ -83,13 +326,52 @@ class EventFetcher:
         to_block_number: int,
         argument_filters,
     ):
-        return self._retrying.call(
-            self.contract.events[event_name].getLogs,
-            fromBlock=from_block_number,
-            toBlock=to_block_number,
-            argument_filters=argument_filters,
+        return self._retry_get_logs(
+            lambda: self.contract.events[event_name].getLogs(
+                fromBlock=from_block_number,
+                toBlock=to_block_number,
+                argument_filters=argument_filters,
+            ),
+            from_block_number,
+            to_block_number,
         )
 
+    def _rpc_get_combined_logs(self, from_block_number: int, to_block_number: int):
+        combined_log_filter = self.combined_log_filter
+        assert combined_log_filter is not None
+        return self._retry_get_logs(
+            lambda: self.web3.eth.getLogs(
+                {
+                    **combined_log_filter,
+                    "fromBlock": from_block_number,
+                    "toBlock": to_block_number,
+                }
+            ),
+            from_block_number,
+            to_block_number,
+        )
+
+    def _log_number_of_found_events(self, event_name: str, number_of_events: int):
+        if number_of_events > 0:
+            self.logger.info(f"Found {number_of_events} {event_name} events.")
+        else:
+            self.logger.debug(f"Found {number_of_events} {event_name} events.")
+
+    def _fetch_combined_events_in_range(
+        self, from_block_number: int, to_block_number: int
+    ) -> List:
+        logs = self._rpc_get_combined_logs(from_block_number, to_block_number)
+        events = [
+            event
+            for event in (self._decode_combined_log(log) for log in logs)
+            if event is not None
+        ]
+        for event_name in self.filter_definition:
+            self._log_number_of_found_events(
+                event_name, sum(1 for event in events if event.event == event_name)
+            )
+        return events
+
     def fetch_events_in_range(
         self, from_block_number: int, to_block_number: int
     ) -> List:
@@ -104,23 +386,90 @@ class EventFetcher:
         )
 
         events: List[AttributeDict] = []
-        for event_name, argument_filters in self.filter_definition.items():
-            fetched_events = self._rpc_get_logs(
-                event_name=event_name,
-                from_block_number=from_block_number,
-                to_block_number=to_block_number,
-                argument_filters=argument_filters,
+        if self.combined_log_filter is not None:
+            events = self._fetch_combined_events_in_range(
+                from_block_number, to_block_number
             )
-            events += fetched_events
-
-            if len(fetched_events) > 0:
-                self.logger.info(f"Found {len(fetched_events)} {event_name} events.")
-            else:
-                self.logger.debug(f"Found {len(fetched_events)} {event_name} events.")
+        else:
+            for event_name, argument_filters in self.filter_definition.items():
+                fetched_events = self._rpc_get_logs(
+                    event_name=event_name,
+                    from_block_number=from_block_number,
+                    to_block_number=to_block_number,
+                    argument_filters=argument_filters,
+                )
+                events += fetched_events
+                self._log_number_of_found_events(event_name, len(fetched_events))
 
         sort_events(events)
         return events
 
+    def _fetch_events_in_adaptive_range(
+        self, from_block_number: int, to_block_number: int
+    ) -> List:
+        """fetch events in the given range and adapt the block range size
+
+        If the node rejects the range, it is bisected and both halves
+        are fetched one after another.
+        """
+        num_blocks = to_block_number - from_block_number + 1
+        start_time = time.monotonic()
+        try:
+            events = self.fetch_events_in_range(from_block_number, to_block_number)
+        except BlockRangeTooLargeException:
+            self.block_range.record_range_too_large(num_blocks)
+            middle_block_number = from_block_number + num_blocks // 2
+            self.logger.warning(
+                f"Range from block {from_block_number} to {to_block_number} is too large, "
+                f"bisecting it. Reduced block range size to {self.block_range.size}."
+            )
+            return self._fetch_events_in_adaptive_range(
+                from_block_number, middle_block_number - 1
+            ) + self._fetch_events_in_adaptive_range(
+                middle_block_number, to_block_number
+            )
+
+        self.block_range.record_success(
+            num_blocks=num_blocks,
+            num_events=len(events),
+            latency=time.monotonic() - start_time,
+        )
+        return events
+
+    def _next_block_ranges(self, reorg_safe_block_number: int) -> List[Tuple[int, int]]:
+        """return up to fetch_concurrency consecutive ranges of blocks to fetch next"""
+        block_ranges: List[Tuple[int, int]] = []
+        from_block_number = self.last_fetched_block_number + 1
+        while (
+            len(block_ranges) < self.fetch_concurrency
+            and from_block_number <= reorg_safe_block_number
+        ):
+            to_block_number = min(
+                from_block_number + self.block_range.size - 1, reorg_safe_block_number
+            )
+            block_ranges.append((from_block_number, to_block_number))
+            from_block_number = to_block_number + 1
+        return block_ranges
+
+    def _fetch_events_in_block_ranges(
+        self, block_ranges: List[Tuple[int, int]]
+    ) -> List:
+        """fetch the events of consecutive ranges concurrently
+
+        The events are returned in the order of the ranges and thereby in
+        the order they have been emitted.
+        """
+        if len(block_ranges) == 1:
+            return self._fetch_events_in_adaptive_range(*block_ranges[0])
+
+        from_block_numbers, to_block_numbers = zip(*block_ranges)
+        events: List = []
+        for events_in_range in self._fetch_pool.imap(
+            self._fetch_events_in_adaptive_range, from_block_numbers, to_block_numbers
+        ):
+            events += events_in_range
+        return events
+
     def fetch_some_events(self) -> List:
         """fetch some events starting from the last_fetched_block_number
 
@@ -132,20 +481,24 @@ class EventFetcher:
         for new blocks to come in.
         """
         while True:
-            from_block_number = self.last_fetched_block_number + 1
             reorg_safe_block_number = (
                 self._rpc_cached_latest_block() - self.max_reorg_depth
             )
-            to_block_number = min(
-                from_block_number + self.event_fetch_limit - 1, reorg_safe_block_number
-            )
-            if to_block_number < from_block_number:
+            block_ranges = self._next_block_ranges(reorg_safe_block_number)
+            if not block_ranges:
                 return []
-            events = self.fetch_events_in_range(from_block_number, to_block_number)
-            self.last_fetched_block_number = to_block_number
+            events = self._fetch_events_in_block_ranges(block_ranges)
+            self.last_fetched_block_number = block_ranges[-1][1]
             if events:
                 return events
 
+    def _record_in_journal(self, events: List) -> None:
+        if self.journal is None:
+            return
+        if events or self.last_fetched_block_number != self._journaled_block_number:
+            self.journal.record(self.chain_role, events, self.last_fetched_block_number)
+            self._journaled_block_number = self.last_fetched_block_number
+
     def fetch_events(self, poll_interval: int) -> None:
         if poll_interval <= 0:
             raise ValueError(
@@ -155,18 +508,71 @@ class EventFetcher:
         self.logger.debug("Start event fetcher.")
 
         while True:
+            self._new_block_event.clear()
             events = self.fetch_some_events()
+            self._record_in_journal(events)
             for event in events:
                 self.event_queue.put(event)
 
             if not events:
-                # instantiate this event here in order to use the
-                # current time as timestamp
-                reached_head_event = FetcherReachedHeadEvent(
-                    timestamp=time.time(),
-                    chain_role=self.chain_role,
-                    last_fetched_block_number=self.last_fetched_block_number,
-                )
-                if not self._rpc_cached_is_syncing():
-                    self.event_queue.put(reached_head_event)
-                time.sleep(poll_interval)
+                # take the current time before querying the node
+                timestamp = time.time()
+                if self.report_reached_head and not self._rpc_cached_is_syncing():
+                    self.event_queue.put(
+                        FetcherReachedHeadEvent(
+                            timestamp=timestamp,
+                            chain_role=self.chain_role,
+                            last_fetched_block_number=self.last_fetched_block_number,
+                            last_fetched_block_timestamp=self._rpc_get_block_timestamp(
+                                self.last_fetched_block_number
+                            ),
+                        )
+                    )
+                self._new_block_event.wait(poll_interval)
+
+    def notify_new_block(self, block_number: int) -> None:
+        """wake up fetch_events if the new block makes more blocks reorg safe
+
+        This is called by a new heads subscription. fetch_events keeps
+        polling every poll_interval seconds without notifications.
+        """
+        if block_number - self.max_reorg_depth > self.last_fetched_block_number:
+            self._new_block_event.set()
+
+
+@get_internal_state_summary.register(EventFetcher)
+def get_state_summary(event_fetcher):
+    return {
+        "chain_role": event_fetcher.chain_role.value,
+        "last_fetched_block_number": event_fetcher.last_fetched_block_number,
+        "block_range_size": event_fetcher.block_range.size,
+        "last_fetch_latency": event_fetcher.block_range.last_latency,
+    }
+
+
+@collect_metrics.register(EventFetcher)
+def collect_event_fetcher_metrics(event_fetcher):
+    labels = {"chain": event_fetcher.chain_role.value}
+    families = [
+        MetricFamily(
+            "bridge_event_fetcher_last_fetched_block",
+            "gauge",
+            "Number of the last block the events have been fetched from",
+        ).add(event_fetcher.last_fetched_block_number, **labels)
+    ]
+    if event_fetcher.chain_head_tracker is not None:
+        status = event_fetcher.chain_head_tracker.node_status
+    else:
+        status = event_fetcher._node_status
+    if status is not None:
+        families.append(
+            MetricFamily(
+                "bridge_event_fetcher_lag_blocks",
+                "gauge",
+                "Number of blocks the event fetcher is behind the head of the chain",
+            ).add(
+                status.latest_synced_block - event_fetcher.last_fetched_block_number,
+                **labels,
+            )
+        )
+    return families
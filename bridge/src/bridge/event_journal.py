@@ -0,0 +1,196 @@
+import json
+import logging
+import sqlite3
+from typing import Any, Iterator, List, Mapping, Optional
+
+import attr
+from eth_utils import decode_hex, encode_hex
+from hexbytes import HexBytes
+from web3.datastructures import AttributeDict
+
+from bridge.constants import (
+    COMPLETION_EVENT_NAME,
+    CONFIRMATION_EVENT_NAME,
+    TRANSFER_EVENT_NAME,
+)
+from bridge.events import (
+    ChainRole,
+    CompletionEvent,
+    ConfirmationEvent,
+    ContractEvent,
+    TransferEvent,
+)
+from bridge.utils import compute_transfer_hash
+
+logger = logging.getLogger(__name__)
+
+EVENT_RECORD_CLASSES = {
+    cls.__name__: cls for cls in (TransferEvent, ConfirmationEvent, CompletionEvent)
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    chain_role TEXT PRIMARY KEY,
+    last_fetched_block_number INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS events (
+    chain_role TEXT NOT NULL,
+    block_number INTEGER NOT NULL,
+    transaction_index INTEGER NOT NULL,
+    log_index INTEGER NOT NULL,
+    event_name TEXT NOT NULL,
+    transfer_hash BLOB,
+    data TEXT NOT NULL,
+    PRIMARY KEY (chain_role, block_number, transaction_index, log_index)
+);
+CREATE INDEX IF NOT EXISTS events_by_transfer_hash ON events (transfer_hash);
+CREATE TABLE IF NOT EXISTS nonces (
+    address BLOB PRIMARY KEY,
+    next_nonce INTEGER NOT NULL
+);
+"""
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, bytes):
+        return {"bytes": encode_hex(value)}
+    elif isinstance(value, ContractEvent):
+        return {
+            "record": type(value).__name__,
+            "fields": {
+                field.name: _encode_value(getattr(value, field.name))
+                for field in attr.fields(type(value))
+            },
+        }
+    elif isinstance(value, Mapping):
+        return {"dict": {key: _encode_value(item) for key, item in value.items()}}
+    else:
+        return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict) and "bytes" in value:
+        return HexBytes(decode_hex(value["bytes"]))
+    elif isinstance(value, dict) and "record" in value:
+        return EVENT_RECORD_CLASSES[value["record"]](
+            **{key: _decode_value(item) for key, item in value["fields"].items()}
+        )
+    elif isinstance(value, dict) and "dict" in value:
+        return AttributeDict(
+            {key: _decode_value(item) for key, item in value["dict"].items()}
+        )
+    else:
+        return value
+
+
+def encode_event(event: Any) -> str:
+    return json.dumps(_encode_value(event))
+
+
+def decode_event(data: str) -> Any:
+    return _decode_value(json.loads(data))
+
+
+def get_transfer_hash(event: Any) -> Optional[bytes]:
+    """return the hash of the transfer an event is about or None for unrelated events"""
+    if event.event == TRANSFER_EVENT_NAME:
+        return compute_transfer_hash(event)
+    elif event.event in (CONFIRMATION_EVENT_NAME, COMPLETION_EVENT_NAME):
+        return bytes(event.args.transferHash)
+    else:
+        return None
+
+
+class EventJournal:
+    """on-disk journal of the reorg-safe events the event fetchers have fetched
+
+    The event fetchers record the events of each range together with
+    the block number they have fetched up to in a single transaction
+    before they put the events on their queue. On startup the journal is
+    replayed and the fetchers resume after their checkpoints. If the
+    bridge stops after writing to the journal, but before the events have
+    been applied, they are applied when the journal is replayed.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def record(
+        self, chain_role: ChainRole, events: List, last_fetched_block_number: int
+    ) -> None:
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO events VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        chain_role.value,
+                        event.blockNumber,
+                        event.transactionIndex,
+                        event.logIndex,
+                        event.event,
+                        get_transfer_hash(event),
+                        encode_event(event),
+                    )
+                    for event in events
+                ],
+            )
+            self.connection.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?)",
+                (chain_role.value, last_fetched_block_number),
+            )
+
+    def get_checkpoint(self, chain_role: ChainRole) -> Optional[int]:
+        """return the block number up to which events have been recorded for the chain"""
+        row = self.connection.execute(
+            "SELECT last_fetched_block_number FROM checkpoints WHERE chain_role = ?",
+            (chain_role.value,),
+        ).fetchone()
+        return row[0] if row is not None else None
+
+    def record_next_nonce(self, address: bytes, next_nonce: Optional[int]) -> None:
+        """record the next nonce allocated for the address, None forgets it"""
+        with self.connection:
+            if next_nonce is None:
+                self.connection.execute(
+                    "DELETE FROM nonces WHERE address = ?", (address,)
+                )
+            else:
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO nonces VALUES (?, ?)", (address, next_nonce)
+                )
+
+    def get_next_nonce(self, address: bytes) -> Optional[int]:
+        row = self.connection.execute(
+            "SELECT next_nonce FROM nonces WHERE address = ?", (address,)
+        ).fetchone()
+        return row[0] if row is not None else None
+
+    def get_events(self) -> Iterator[Any]:
+        """return the recorded events of each chain in the order they have been emitted"""
+        cursor = self.connection.execute(
+            "SELECT data FROM events "
+            "ORDER BY chain_role, block_number, transaction_index, log_index"
+        )
+        for (data,) in cursor:
+            yield decode_event(data)
+
+    def compact(self) -> int:
+        """remove the events of completed transfers from the journal
+
+        These would be dropped by the transfer recorder anyway. Returns
+        the number of removed events.
+        """
+        with self.connection:
+            cursor = self.connection.execute(
+                "DELETE FROM events WHERE transfer_hash IN ("
+                "SELECT transfer_hash FROM events WHERE event_name = ? "
+                "INTERSECT "
+                "SELECT transfer_hash FROM events WHERE event_name = ?)",
+                (COMPLETION_EVENT_NAME, TRANSFER_EVENT_NAME),
+            )
+        return cursor.rowcount
@@ -1,12 +1,22 @@
 from abc import ABC
 from enum import Enum
+from typing import ClassVar, Optional
 
 import attr
+from eth_utils import to_checksum_address
+from hexbytes import HexBytes
 from web3.datastructures import AttributeDict
 
+from bridge.constants import (
+    COMPLETION_EVENT_NAME,
+    CONFIRMATION_EVENT_NAME,
+    TRANSFER_EVENT_NAME,
+)
+
 
 class Event(ABC):
-    pass
+    # allow subclasses to get rid of the instance dict
+    __slots__ = ()
 
 
 # Register AttributeDict as a subclass of Event as it is used to represent contract events in
@@ -28,6 +38,8 @@ class FetcherReachedHeadEvent(Event):
     timestamp: float
     chain_role: ChainRole
     last_fetched_block_number: int
+    # timestamp of the last fetched block, None if unknown
+    last_fetched_block_timestamp: Optional[int] = None
 
 
 class ControlEvent(Event, ABC):
@@ -42,3 +54,86 @@ class BalanceCheck(ControlEvent):
 @attr.s(auto_attribs=True)
 class IsValidatorCheck(ControlEvent):
     is_validator: bool
+
+
+@attr.s(auto_attribs=True, slots=True, frozen=True)
+class ContractEvent(Event):
+    """compact representation of a contract event we're interested in
+
+    Subclasses provide the same attributes as the AttributeDict web3
+    returns for our events, with their arguments available as attributes
+    of the record itself. Addresses are kept as canonical bytes and are
+    only converted to checksum addresses when accessed via args.
+    """
+
+    event: ClassVar[str]
+
+    transactionHash: HexBytes
+    blockNumber: int
+    transactionIndex: int
+    logIndex: int
+
+
+@attr.s(auto_attribs=True, slots=True, frozen=True)
+class TransferEvent(ContractEvent):
+    event: ClassVar[str] = TRANSFER_EVENT_NAME
+
+    sender: bytes
+    receiver: bytes
+    value: int
+
+    @property
+    def args(self) -> AttributeDict:
+        return AttributeDict(
+            {
+                "from": to_checksum_address(self.sender),
+                "to": to_checksum_address(self.receiver),
+                "value": self.value,
+            }
+        )
+
+
+@attr.s(auto_attribs=True, slots=True, frozen=True)
+class ConfirmationEvent(ContractEvent):
+    event: ClassVar[str] = CONFIRMATION_EVENT_NAME
+
+    transferHash: HexBytes
+    transferTransactionHash: HexBytes
+    amount: int
+    recipient: bytes
+    validator: bytes
+
+    @property
+    def args(self) -> AttributeDict:
+        return AttributeDict(
+            {
+                "transferHash": self.transferHash,
+                "transactionHash": self.transferTransactionHash,
+                "amount": self.amount,
+                "recipient": to_checksum_address(self.recipient),
+                "validator": to_checksum_address(self.validator),
+            }
+        )
+
+
+@attr.s(auto_attribs=True, slots=True, frozen=True)
+class CompletionEvent(ContractEvent):
+    event: ClassVar[str] = COMPLETION_EVENT_NAME
+
+    transferHash: HexBytes
+    transferTransactionHash: HexBytes
+    amount: int
+    recipient: bytes
+    coinTransferSuccessful: bool
+
+    @property
+    def args(self) -> AttributeDict:
+        return AttributeDict(
+            {
+                "transferHash": self.transferHash,
+                "transactionHash": self.transferTransactionHash,
+                "amount": self.amount,
+                "recipient": to_checksum_address(self.recipient),
+                "coinTransferSuccessful": self.coinTransferSuccessful,
+            }
+        )
@@ -0,0 +1,98 @@
+import json
+import logging
+from typing import Callable, List, Optional, Union
+
+import gevent
+import websocket
+
+logger = logging.getLogger(__name__)
+
+
+class NewHeadsSubscription:
+    """subscribe to the newHeads notifications of a node via WebSocket
+
+    Each listener is called with the block number of every new head the
+    node announces. If the connection drops, the subscription is
+    re-established after reconnect_interval seconds. Listeners are
+    expected to keep polling on their own while the subscription is
+    down.
+    """
+
+    def __init__(
+        self,
+        ws_url: str,
+        *,
+        timeout: float = 60,
+        reconnect_interval: float = 5,
+        chain_name: str = "",
+    ) -> None:
+        self.ws_url = ws_url
+        self.timeout = timeout
+        self.reconnect_interval = reconnect_interval
+        self.logger = logging.getLogger(f"{__name__}.{chain_name}".rstrip("."))
+        self.listeners: List[Callable[[int], None]] = []
+        self.is_connected = False
+        self.latest_block_number: Optional[int] = None
+
+    def add_listener(self, listener: Callable[[int], None]) -> None:
+        self.listeners.append(listener)
+
+    def _subscribe(self, connection) -> str:
+        connection.send(
+            json.dumps(
+                {
+                    "jsonrpc": "2.0",
+                    "id": 1,
+                    "method": "eth_subscribe",
+                    "params": ["newHeads"],
+                }
+            )
+        )
+        response = json.loads(connection.recv())
+        if "result" not in response:
+            raise websocket.WebSocketException(
+                f"Could not subscribe to new heads: {response.get('error')}"
+            )
+        return response["result"]
+
+    def _handle_message(self, subscription_id: str, message: Union[str, bytes]) -> None:
+        notification = json.loads(message)
+        params = notification.get("params", {})
+        if (
+            notification.get("method") != "eth_subscription"
+            or params.get("subscription") != subscription_id
+        ):
+            return
+
+        block_number = int(params["result"]["number"], 16)
+        self.latest_block_number = block_number
+        for listener in self.listeners:
+            listener(block_number)
+
+    def _receive_heads(self) -> None:
+        connection = websocket.create_connection(self.ws_url, timeout=self.timeout)
+        try:
+            subscription_id = self._subscribe(connection)
+            self.is_connected = True
+            self.logger.info(f"Subscribed to new heads at {self.ws_url}")
+            while True:
+                self._handle_message(subscription_id, connection.recv())
+        finally:
+            self.is_connected = False
+            connection.close()
+
+    def run(self) -> None:
+        while True:
+            try:
+                self._receive_heads()
+            except (
+                OSError,
+                KeyError,
+                ValueError,
+                websocket.WebSocketException,
+            ) as exception:
+                self.logger.warning(
+                    f"New heads subscription at {self.ws_url} failed, "
+                    f"falling back to polling: {exception!r}"
+                )
+            gevent.sleep(self.reconnect_interval)
@@ -0,0 +1,116 @@
+from typing import Any, Callable, Dict, Optional
+
+from eth_utils import decode_hex, keccak, to_canonical_address
+from hexbytes import HexBytes
+
+from bridge.events import (
+    CompletionEvent,
+    ConfirmationEvent,
+    ContractEvent,
+    TransferEvent,
+)
+
+TRANSFER_EVENT_TOPIC = keccak(text="Transfer(address,address,uint256)")
+CONFIRMATION_EVENT_TOPIC = keccak(
+    text="Confirmation(bytes32,bytes32,uint256,address,address)"
+)
+COMPLETION_EVENT_TOPIC = keccak(
+    text="TransferCompleted(bytes32,bytes32,uint256,address,bool)"
+)
+
+
+def _to_bytes(value: Any) -> bytes:
+    if isinstance(value, str):
+        return decode_hex(value)
+    return bytes(value)
+
+
+def _to_int(value: bytes) -> int:
+    return int.from_bytes(value, "big")
+
+
+def _decode_transfer_log(log, topics, data) -> Optional[TransferEvent]:
+    if len(topics) != 3 or len(data) != 32:
+        return None
+    return TransferEvent(
+        transactionHash=HexBytes(log["transactionHash"]),
+        blockNumber=log["blockNumber"],
+        transactionIndex=log["transactionIndex"],
+        logIndex=log["logIndex"],
+        sender=_to_bytes(topics[1])[12:],
+        receiver=_to_bytes(topics[2])[12:],
+        value=_to_int(data),
+    )
+
+
+def _decode_confirmation_log(log, topics, data) -> Optional[ConfirmationEvent]:
+    if len(topics) != 2 or len(data) != 128:
+        return None
+    return ConfirmationEvent(
+        transactionHash=HexBytes(log["transactionHash"]),
+        blockNumber=log["blockNumber"],
+        transactionIndex=log["transactionIndex"],
+        logIndex=log["logIndex"],
+        transferHash=HexBytes(data[:32]),
+        transferTransactionHash=HexBytes(data[32:64]),
+        amount=_to_int(data[64:96]),
+        recipient=data[108:128],
+        validator=_to_bytes(topics[1])[12:],
+    )
+
+
+def _decode_completion_log(log, topics, data) -> Optional[CompletionEvent]:
+    if len(topics) != 1 or len(data) != 160:
+        return None
+    return CompletionEvent(
+        transactionHash=HexBytes(log["transactionHash"]),
+        blockNumber=log["blockNumber"],
+        transactionIndex=log["transactionIndex"],
+        logIndex=log["logIndex"],
+        transferHash=HexBytes(data[:32]),
+        transferTransactionHash=HexBytes(data[32:64]),
+        amount=_to_int(data[64:96]),
+        recipient=data[108:128],
+        coinTransferSuccessful=_to_int(data[128:160]) != 0,
+    )
+
+
+LOG_DECODERS: Dict[bytes, Callable[..., Optional[ContractEvent]]] = {
+    TRANSFER_EVENT_TOPIC: _decode_transfer_log,
+    CONFIRMATION_EVENT_TOPIC: _decode_confirmation_log,
+    COMPLETION_EVENT_TOPIC: _decode_completion_log,
+}
+
+
+def decode_log(log) -> Optional[ContractEvent]:
+    """decode a log as returned by getLogs into an event record
+
+    This avoids web3's ABI based decoding into nested AttributeDicts with
+    checksum addresses, which is the major cost of fetching events. Our
+    events have a fixed layout, so their fields are sliced directly out of
+    the topics and data.
+
+    Returns None if the log is not one of our events or does not have
+    the expected layout. Only the topics and data are checked, the
+    caller is responsible for fetching logs from the right contract.
+    """
+    topics = log["topics"]
+    if not topics:
+        return None
+    decoder = LOG_DECODERS.get(_to_bytes(topics[0]))
+    if decoder is None:
+        return None
+    return decoder(log, topics, _to_bytes(log["data"]))
+
+
+def compact_transfer_event(event) -> TransferEvent:
+    """convert a Transfer event decoded by web3 into a TransferEvent record"""
+    return TransferEvent(
+        transactionHash=HexBytes(event.transactionHash),
+        blockNumber=event.blockNumber,
+        transactionIndex=event.transactionIndex,
+        logIndex=event.logIndex,
+        sender=to_canonical_address(event.args["from"]),
+        receiver=to_canonical_address(event.args["to"]),
+        value=event.args.value,
+    )
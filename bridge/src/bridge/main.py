@@ -3,6 +3,7 @@ import logging.config
 import os
 import signal
 import sys
+from typing import Callable, Dict, List, Set, Tuple
 
 import click
 import gevent
@@ -12,12 +13,15 @@ from eth_utils import to_checksum_address
 from gevent.queue import Queue
 from marshmallow.exceptions import ValidationError
 from toml.decoder import TomlDecodeError
-from web3 import HTTPProvider, Web3
+from web3 import Web3
+from web3.providers import BaseProvider
 
 import bridge.node_status
 import bridge.version
+from bridge.chain_head_tracker import ChainHeadTracker
 from bridge.config import load_config
 from bridge.confirmation_sender import (
+    ConfirmationLatencies,
     ConfirmationSender,
     ConfirmationWatcher,
     make_sanity_check_transfer,
@@ -28,19 +32,34 @@ from bridge.constants import (
     COMPLETION_EVENT_NAME,
     CONFIRMATION_EVENT_NAME,
     HOME_CHAIN_STEP_DURATION,
+    INITIATE_CHANGE_EVENT_NAME,
     TRANSFER_EVENT_NAME,
 )
-from bridge.contract_abis import HOME_BRIDGE_ABI, MINIMAL_ERC20_TOKEN_ABI
+from bridge.contract_abis import (
+    HOME_BRIDGE_ABI,
+    MINIMAL_ERC20_TOKEN_ABI,
+    MINIMAL_VALIDATOR_SET_ABI,
+)
 from bridge.contract_validation import (
     get_validator_proxy_contract,
+    retrying,
     validate_contract_existence,
 )
 from bridge.event_fetcher import EventFetcher
+from bridge.event_journal import EventJournal
 from bridge.events import ChainRole
+from bridge.head_subscription import NewHeadsSubscription
+from bridge.metrics import Metrics
+from bridge.recorder_snapshot import (
+    read_snapshot,
+    restore_snapshot,
+    save_recorder_snapshot,
+)
+from bridge.rpc_provider import FailoverProvider, PooledHTTPProvider
 from bridge.service import Service, start_services
 from bridge.transfer_recorder import TransferRecorder
 from bridge.utils import get_validator_private_key
-from bridge.validator_balance_watcher import ValidatorBalanceWatcher
+from bridge.validator_state_sampler import ValidatorStateSampler
 from bridge.validator_status_watcher import ValidatorStatusWatcher
 from bridge.webservice import InternalState, Webservice
 
@@ -67,13 +86,47 @@ def configure_logging(config):
     )
 
 
-def make_w3(config, chain: ChainRole):
+# providers shared by all components talking to the same nodes
+_providers: Dict[Tuple, BaseProvider] = {}
+
+
+def make_provider(config, chain: ChainRole) -> BaseProvider:
+    """return the provider for the chain, which is created once per node
+
+    If fallback endpoints are configured, the provider fails over between
+    the primary and the fallback endpoints.
+    """
     chaincfg = config[chain.configuration_key]
-    return Web3(
-        HTTPProvider(
-            chaincfg["rpc_url"], request_kwargs={"timeout": chaincfg["rpc_timeout"]}
-        )
+    rpc_urls = [chaincfg["rpc_url"]] + chaincfg["fallback_rpc_urls"]
+    key = (
+        tuple(rpc_urls),
+        chaincfg["rpc_timeout"],
+        chaincfg["max_concurrent_requests"],
+        chaincfg["hedge_requests"],
+        chaincfg["max_endpoint_head_lag"],
     )
+    if key not in _providers:
+        providers = [
+            PooledHTTPProvider(
+                rpc_url,
+                max_concurrent_requests=chaincfg["max_concurrent_requests"],
+                request_kwargs={"timeout": chaincfg["rpc_timeout"]},
+            )
+            for rpc_url in rpc_urls
+        ]
+        if len(providers) == 1:
+            _providers[key] = providers[0]
+        else:
+            _providers[key] = FailoverProvider(
+                providers,
+                hedge_requests=chaincfg["hedge_requests"],
+                max_head_lag=chaincfg["max_endpoint_head_lag"],
+            )
+    return _providers[key]
+
+
+def make_w3(config, chain: ChainRole):
+    return Web3(make_provider(config, chain))
 
 
 def make_w3_home(config):
@@ -97,7 +150,16 @@ def make_validator_address(config):
     return PrivateKey(private_key_bytes).public_key.to_canonical_address()
 
 
+# home bridge contracts that have passed the sanity checks, by provider and address
+_sanity_checked_home_bridge_contracts: Set[Tuple[BaseProvider, str]] = set()
+
+
 def sanity_check_home_bridge_contracts(home_bridge_contract):
+    """check the home bridge contracts, once per provider and bridge address"""
+    key = (home_bridge_contract.web3.provider, home_bridge_contract.address)
+    if key in _sanity_checked_home_bridge_contracts:
+        return
+
     validate_contract_existence(home_bridge_contract)
 
     validator_proxy_contract = get_validator_proxy_contract(home_bridge_contract)
@@ -114,8 +176,104 @@ def sanity_check_home_bridge_contracts(home_bridge_contract):
     if balance == 0:
         raise SetupError("Serious bridge setup error. The bridge has no funds.")
 
+    _sanity_checked_home_bridge_contracts.add(key)
+
+
+def make_journal(config):
+    journal_path = config["persistence"].get("journal_path")
+    if journal_path is None:
+        return None
+    logger.info(f"Using event journal at {journal_path}")
+    return EventJournal(journal_path)
+
+
+def replay_journal(journal, recorder):
+    """apply the events recorded in the journal to the recorder"""
+    num_removed_events = journal.compact()
+    logger.info(
+        f"Removed {num_removed_events} events of completed transfers from the journal"
+    )
+    num_replayed_events = 0
+    for event in journal.get_events():
+        recorder.apply_event(event)
+        num_replayed_events += 1
+    logger.info(f"Replayed {num_replayed_events} events from the journal")
+
+
+def load_snapshot(config, recorder):
+    """restore the recorder from the snapshot, if there is one"""
+    snapshot_path = config["persistence"].get("snapshot_path")
+    if snapshot_path is None:
+        return
+    snapshot = read_snapshot(snapshot_path)
+    if snapshot is None:
+        logger.info(f"No snapshot found at {snapshot_path}")
+        return
+    restore_snapshot(recorder, snapshot)
+    logger.info(
+        f"Restored {len(snapshot.transfer_states)} transfer states from the "
+        f"snapshot at {snapshot_path}, fetched blocks: "
+        + ", ".join(
+            f"{chain_role.name} {block_number}"
+            for chain_role, block_number in snapshot.fetched_block_numbers.items()
+        )
+    )
+
 
-def make_transfer_event_fetcher(config, transfer_event_queue):
+def save_snapshot(config, recorder):
+    snapshot_path = config["persistence"].get("snapshot_path")
+    if snapshot_path is None:
+        logger.info("Not writing a snapshot, no snapshot_path configured")
+        return
+    try:
+        save_recorder_snapshot(recorder, snapshot_path)
+    except OSError as error:
+        # this function is being called as signal handler, too
+        logger.error(f"Error while writing the snapshot to {snapshot_path}: {error}")
+
+
+def write_snapshots_periodically(config, recorder):
+    while True:
+        gevent.sleep(config["persistence"]["snapshot_interval"])
+        save_snapshot(config, recorder)
+
+
+def get_event_fetch_start_block_number(
+    config, chain_role, journal, fetched_block_number=None
+):
+    """return the block number to start fetching events from
+
+    The fetcher resumes after the checkpoint recorded in the journal or
+    the block number the recorder has applied all events of, whatever is
+    further.
+    """
+    start_block_number = config[chain_role.configuration_key][
+        "event_fetch_start_block_number"
+    ]
+    if journal is not None:
+        checkpoint = journal.get_checkpoint(chain_role)
+        if checkpoint is not None:
+            start_block_number = max(start_block_number, checkpoint + 1)
+    if fetched_block_number is not None:
+        start_block_number = max(start_block_number, fetched_block_number + 1)
+    return start_block_number
+
+
+def make_chain_head_tracker(config, chain_role):
+    return ChainHeadTracker(
+        make_w3(config, chain_role),
+        poll_interval=config[chain_role.configuration_key]["event_poll_interval"],
+        chain_role=chain_role,
+    )
+
+
+def make_transfer_event_fetcher(
+    config,
+    transfer_event_queue,
+    journal=None,
+    chain_head_tracker=None,
+    fetched_block_number=None,
+):
     w3_foreign = make_w3_foreign(config)
     token_contract = w3_foreign.eth.contract(
         address=config["foreign_chain"]["token_contract_address"],
@@ -129,14 +287,28 @@ def make_transfer_event_fetcher(config, transfer_event_queue):
                 "to": config["foreign_chain"]["bridge_contract_address"]
             }
         },
+        combine_filters=True,
         event_queue=transfer_event_queue,
         max_reorg_depth=config["foreign_chain"]["max_reorg_depth"],
-        start_block_number=config["foreign_chain"]["event_fetch_start_block_number"],
+        start_block_number=get_event_fetch_start_block_number(
+            config, ChainRole.foreign, journal, fetched_block_number
+        ),
+        event_fetch_limit=config["foreign_chain"]["event_fetch_limit"],
+        max_event_fetch_limit=config["foreign_chain"].get("max_event_fetch_limit"),
+        fetch_concurrency=config["foreign_chain"]["event_fetch_concurrency"],
         chain_role=ChainRole.foreign,
+        journal=journal,
+        chain_head_tracker=chain_head_tracker,
     )
 
 
-def make_home_bridge_event_fetcher(config, home_bridge_event_queue):
+def make_home_bridge_event_fetcher(
+    config,
+    home_bridge_event_queue,
+    journal=None,
+    chain_head_tracker=None,
+    fetched_block_number=None,
+):
     w3_home = make_w3_home(config)
     home_bridge_contract = w3_home.eth.contract(
         address=config["home_chain"]["bridge_contract_address"], abi=HOME_BRIDGE_ABI
@@ -150,16 +322,77 @@ def make_home_bridge_event_fetcher(config, home_bridge_event_queue):
             CONFIRMATION_EVENT_NAME: {"validator": validator_address},
             COMPLETION_EVENT_NAME: {},
         },
+        combine_filters=True,
         event_queue=home_bridge_event_queue,
         max_reorg_depth=config["home_chain"]["max_reorg_depth"],
-        start_block_number=config["home_chain"]["event_fetch_start_block_number"],
+        start_block_number=get_event_fetch_start_block_number(
+            config, ChainRole.home, journal, fetched_block_number
+        ),
+        event_fetch_limit=config["home_chain"]["event_fetch_limit"],
+        max_event_fetch_limit=config["home_chain"].get("max_event_fetch_limit"),
+        fetch_concurrency=config["home_chain"]["event_fetch_concurrency"],
         chain_role=ChainRole.home,
+        journal=journal,
+        chain_head_tracker=chain_head_tracker,
     )
 
 
+def make_validator_set_event_fetcher(
+    config, validator_set_event_queue, chain_head_tracker=None
+):
+    """return a fetcher for the changes of the validator set, if it is configured
+
+    Events are fetched from the current head on without waiting for them
+    to become reorg safe. They only make the validator status watcher
+    check the validator proxy.
+    """
+    validator_set_contract_address = config["home_chain"].get(
+        "validator_set_contract_address"
+    )
+    if validator_set_contract_address is None:
+        return None
+    w3_home = make_w3_home(config)
+    validator_set_contract = w3_home.eth.contract(
+        address=validator_set_contract_address, abi=MINIMAL_VALIDATOR_SET_ABI
+    )
+    validate_contract_existence(validator_set_contract)
+
+    return EventFetcher(
+        web3=w3_home,
+        contract=validator_set_contract,
+        filter_definition={INITIATE_CHANGE_EVENT_NAME: {}},
+        event_queue=validator_set_event_queue,
+        max_reorg_depth=0,
+        start_block_number=retrying(lambda: w3_home.eth.blockNumber)(),
+        event_fetch_limit=config["home_chain"]["event_fetch_limit"],
+        max_event_fetch_limit=config["home_chain"].get("max_event_fetch_limit"),
+        chain_role=ChainRole.home,
+        chain_head_tracker=chain_head_tracker,
+        # only the InitiateChange events wake up the validator status watcher
+        report_reached_head=False,
+    )
+
+
+def make_new_heads_subscription(config, chain_role, chain_head_tracker):
+    """subscribe the chain head tracker to new heads if a WebSocket URL is configured"""
+    ws_url = config[chain_role.configuration_key].get("ws_url")
+    if ws_url is None:
+        return None
+    subscription = NewHeadsSubscription(
+        ws_url,
+        timeout=config[chain_role.configuration_key]["rpc_timeout"],
+        chain_name=chain_role.name,
+    )
+    subscription.add_listener(chain_head_tracker.notify_new_head)
+    return subscription
+
+
 def make_recorder(config):
     minimum_balance = config["home_chain"]["minimum_validator_balance"]
-    return TransferRecorder(minimum_balance)
+    return TransferRecorder(
+        minimum_balance,
+        orphan_eviction_margin=config["foreign_chain"]["orphan_eviction_margin"],
+    )
 
 
 def make_confirmation_task_planner(
@@ -181,7 +414,12 @@ def make_confirmation_task_planner(
 
 
 def make_confirmation_sender(
-    *, config, pending_transaction_queue, confirmation_task_queue
+    *,
+    config,
+    pending_transaction_queue,
+    confirmation_task_queue,
+    journal=None,
+    confirmation_latencies=None,
 ):
     w3_home = make_w3_home(config)
 
@@ -196,25 +434,49 @@ def make_confirmation_sender(
         gas_price=config["home_chain"]["gas_price"],
         max_reorg_depth=config["home_chain"]["max_reorg_depth"],
         pending_transaction_queue=pending_transaction_queue,
+        num_workers=config["home_chain"]["confirmation_sender_workers"],
+        batch_size=config["home_chain"]["confirmation_batch_size"],
+        gas_price_bump_percent=config["home_chain"]["gas_price_bump_percent"],
+        max_gas_price=config["home_chain"].get("max_gas_price"),
         sanity_check_transfer=make_sanity_check_transfer(
             foreign_bridge_contract_address=to_checksum_address(
                 config["foreign_chain"]["bridge_contract_address"]
             )
         ),
+        journal=journal,
+        confirmation_latencies=confirmation_latencies,
     )
 
 
-def make_confirmation_watcher(*, config, pending_transaction_queue):
+def make_confirmation_watcher(
+    *,
+    config,
+    pending_transaction_queue,
+    chain_head_tracker=None,
+    nonce_manager=None,
+    replace_transaction=None,
+    confirmation_latencies=None,
+    transfer_event_queue=None,
+):
     w3_home = make_w3_home(config)
     max_reorg_depth = config["home_chain"]["max_reorg_depth"]
     return ConfirmationWatcher(
         w3=w3_home,
         pending_transaction_queue=pending_transaction_queue,
         max_reorg_depth=max_reorg_depth,
+        chain_head_tracker=chain_head_tracker,
+        nonce_manager=nonce_manager,
+        replace_transaction=replace_transaction,
+        replacement_blocks=config["home_chain"]["transaction_replacement_blocks"],
+        rebroadcast_blocks=config["home_chain"]["transaction_rebroadcast_blocks"],
+        confirmation_latencies=confirmation_latencies,
+        transfer_event_queue=transfer_event_queue,
     )
 
 
-def make_validator_status_watcher(config, control_queue):
+def make_validator_status_watcher(
+    config, control_queue, validator_set_event_queue=None
+):
     w3_home = make_w3_home(config)
 
     home_bridge_contract = w3_home.eth.contract(
@@ -231,21 +493,20 @@ def make_validator_status_watcher(config, control_queue):
         poll_interval=HOME_CHAIN_STEP_DURATION,
         control_queue=control_queue,
         stop_validating_callback=shutdown,
+        validator_set_event_queue=validator_set_event_queue,
+        reconciliation_interval=config["home_chain"][
+            "validator_status_reconciliation_interval"
+        ],
     )
 
 
-def make_validator_balance_watcher(config, control_queue):
-    w3 = make_w3_home(config)
-
-    validator_address = make_validator_address(config)
-
-    poll_interval = config["home_chain"]["balance_warn_poll_interval"]
-
-    return ValidatorBalanceWatcher(
-        w3=w3,
-        validator_address=validator_address,
-        poll_interval=poll_interval,
+def make_validator_state_sampler(config, control_queue, chain_head_tracker=None):
+    return ValidatorStateSampler(
+        w3=make_w3_home(config),
+        validator_address=make_validator_address(config),
         control_queue=control_queue,
+        poll_interval=config["home_chain"]["balance_warn_poll_interval"],
+        chain_head_tracker=chain_head_tracker,
     )
 
 
@@ -268,18 +529,36 @@ def make_webservice(*, config, recorder):
     public_config = {k: encode_address(config[k]) for k in public_config_keys}
 
     ws.enable_internal_state(InternalState(recorder=recorder, config=public_config))
+    ws.enable_metrics(Metrics())
     return ws
 
 
-def make_main_services(config, recorder):
+def make_main_services(
+    config, recorder, internal_state=None, journal=None, metrics=None
+):
     control_queue = Queue()
     transfer_event_queue = Queue()
     home_bridge_event_queue = Queue()
     confirmation_task_queue = Queue()
 
-    transfer_event_fetcher = make_transfer_event_fetcher(config, transfer_event_queue)
+    chain_head_trackers = {
+        chain_role: make_chain_head_tracker(config, chain_role)
+        for chain_role in ChainRole
+    }
+
+    transfer_event_fetcher = make_transfer_event_fetcher(
+        config,
+        transfer_event_queue,
+        journal,
+        chain_head_trackers[ChainRole.foreign],
+        recorder.fetched_block_numbers.get(ChainRole.foreign),
+    )
     home_bridge_event_fetcher = make_home_bridge_event_fetcher(
-        config, home_bridge_event_queue
+        config,
+        home_bridge_event_queue,
+        journal,
+        chain_head_trackers[ChainRole.home],
+        recorder.fetched_block_numbers.get(ChainRole.home),
     )
 
     confirmation_task_planner = make_confirmation_task_planner(
@@ -291,21 +570,109 @@ def make_main_services(config, recorder):
         confirmation_task_queue=confirmation_task_queue,
     )
 
-    validator_status_watcher = make_validator_status_watcher(config, control_queue)
+    validator_set_event_queue = Queue()
+    validator_set_event_fetcher = make_validator_set_event_fetcher(
+        config, validator_set_event_queue, chain_head_trackers[ChainRole.home]
+    )
+    validator_status_watcher = make_validator_status_watcher(
+        config,
+        control_queue,
+        validator_set_event_queue if validator_set_event_fetcher is not None else None,
+    )
 
     max_pending_transactions = get_max_pending_transactions(config)
     logger.info("maximum number of pending transactions: %s", max_pending_transactions)
     pending_transaction_queue = Queue(max_pending_transactions)
+    confirmation_latencies = None
+    if metrics is not None:
+        confirmation_latencies = ConfirmationLatencies(
+            foreign_chain_head_tracker=chain_head_trackers[ChainRole.foreign],
+            home_chain_head_tracker=chain_head_trackers[ChainRole.home],
+        )
     sender = make_confirmation_sender(
         config=config,
         pending_transaction_queue=pending_transaction_queue,
         confirmation_task_queue=confirmation_task_queue,
+        journal=journal,
+        confirmation_latencies=confirmation_latencies,
     )
     watcher = make_confirmation_watcher(
-        config=config, pending_transaction_queue=pending_transaction_queue
+        config=config,
+        pending_transaction_queue=pending_transaction_queue,
+        chain_head_tracker=chain_head_trackers[ChainRole.home],
+        nonce_manager=sender.nonce_manager,
+        # replacing stuck transactions spends more on gas, it is opt-in
+        replace_transaction=(
+            sender.replace_transaction
+            if "max_gas_price" in config["home_chain"]
+            else None
+        ),
+        confirmation_latencies=confirmation_latencies,
+        transfer_event_queue=confirmation_task_queue,
     )
 
-    validator_balance_watcher = make_validator_balance_watcher(config, control_queue)
+    validator_state_sampler = make_validator_state_sampler(
+        config, control_queue, chain_head_trackers[ChainRole.home]
+    )
+
+    chain_head_services = []
+    for chain_role, chain_head_tracker in chain_head_trackers.items():
+        chain_head_services.append(
+            Service(f"track-{chain_role.name}-chain-head", chain_head_tracker.run)
+        )
+        subscription = make_new_heads_subscription(
+            config, chain_role, chain_head_tracker
+        )
+        if subscription is not None:
+            chain_head_services.append(
+                Service(f"subscribe-{chain_role.name}-new-heads", subscription.run)
+            )
+
+    if internal_state is not None:
+        internal_state.add_reporter("transfer_event_fetcher", transfer_event_fetcher)
+        internal_state.add_reporter(
+            "home_bridge_event_fetcher", home_bridge_event_fetcher
+        )
+        for chain_role, chain_head_tracker in chain_head_trackers.items():
+            internal_state.add_reporter(
+                f"{chain_role.name}_chain_head", chain_head_tracker
+            )
+            internal_state.add_reporter(
+                f"{chain_role.name}_rpc", make_provider(config, chain_role)
+            )
+        internal_state.add_reporter("nonce_manager", sender.nonce_manager)
+        internal_state.add_reporter("confirmation_sender", sender)
+        internal_state.add_reporter("confirmation_watcher", watcher)
+
+    if metrics is not None:
+        for chain_role in ChainRole:
+            metrics.add_collector(
+                make_provider(config, chain_role), chain=chain_role.value
+            )
+        metrics.add_collector(transfer_event_fetcher, fetcher="transfer")
+        metrics.add_collector(home_bridge_event_fetcher, fetcher="home_bridge")
+        if validator_set_event_fetcher is not None:
+            metrics.add_collector(validator_set_event_fetcher, fetcher="validator_set")
+        for name, queue in [
+            ("transfer_event_queue", transfer_event_queue),
+            ("home_bridge_event_queue", home_bridge_event_queue),
+            ("control_queue", control_queue),
+            ("confirmation_task_queue", confirmation_task_queue),
+            ("pending_transaction_queue", pending_transaction_queue),
+        ]:
+            metrics.add_collector(queue, queue=name)
+        metrics.add_collector(watcher)
+        metrics.add_collector(confirmation_latencies)
+
+    validator_set_services = []
+    if validator_set_event_fetcher is not None:
+        validator_set_services.append(
+            Service(
+                "fetch-validator-set-events",
+                validator_set_event_fetcher.fetch_events,
+                config["home_chain"]["event_poll_interval"],
+            )
+        )
 
     return (
         [
@@ -320,9 +687,11 @@ def make_main_services(config, recorder):
                 config["home_chain"]["event_poll_interval"],
             ),
             Service("validator-status-watcher", validator_status_watcher.run),
-            Service("validator_balance_watcher", validator_balance_watcher.run),
+            Service("validator-state-sampler", validator_state_sampler.run),
             Service("log-internal-state", log_internal_state, recorder),
         ]
+        + chain_head_services
+        + validator_set_services
         + sender.services
         + watcher.services
         + confirmation_task_planner.services
@@ -361,6 +730,11 @@ def log_internal_state(recorder):
 
 main_pool = gevent.pool.Pool()
 
+# called by shutdown_raw after the main pool has been stopped. They are not
+# subject to the cleanup timeout, so that e.g. the snapshot is written
+# completely.
+shutdown_callbacks: List[Callable[[], None]] = []
+
 
 def shutdown_raw(timeout=APPLICATION_CLEANUP_TIMEOUT, exitcode=0):
     """gracefully shut down the application"""
@@ -376,11 +750,17 @@ def shutdown_raw(timeout=APPLICATION_CLEANUP_TIMEOUT, exitcode=0):
             logger.error("Catched wrong timeout exception, exciting anyway")
         else:
             logger.error("Bridge didn't clean up in time, doing a hard exit")
+        exitcode = os.EX_SOFTWARE
+    finally:
+        timeout.cancel()
 
-        sys.stderr.flush()
-        sys.stdout.flush()
+    # the state of the recorder is consistent between the applied events,
+    # even if the services did not stop in time
+    for callback in shutdown_callbacks:
+        callback()
 
-        os._exit(os.EX_SOFTWARE)
+    sys.stderr.flush()
+    sys.stdout.flush()
     os._exit(exitcode)
 
 
@@ -448,9 +828,17 @@ def wait_until_foreign_node_is_ready(config):
 
 def start_system(config):
     recorder = make_recorder(config)
+    load_snapshot(config, recorder)
+    journal = make_journal(config)
+    if journal is not None:
+        replay_journal(journal, recorder)
     install_signal_handler(
         signal.SIGUSR1, "report-internal-state", recorder.log_current_state
     )
+    install_signal_handler(
+        signal.SIGUSR2, "write-snapshot", save_snapshot, config, recorder
+    )
+    shutdown_callbacks.append(lambda: save_snapshot(config, recorder))
 
     webservice = make_webservice(config=config, recorder=recorder)
     if webservice is not None:
@@ -465,7 +853,15 @@ def start_system(config):
         start_services_in_main_pool(wait_node_ready_services), raise_error=True
     )
 
-    main_services = make_main_services(config, recorder)
+    internal_state = webservice.internal_state if webservice is not None else None
+    metrics = webservice.metrics if webservice is not None else None
+    main_services = make_main_services(
+        config, recorder, internal_state, journal, metrics
+    )
+    if config["persistence"].get("snapshot_path") is not None:
+        main_services.append(
+            Service("write-snapshots", write_snapshots_periodically, config, recorder)
+        )
     start_services_in_main_pool(main_services)
 
 
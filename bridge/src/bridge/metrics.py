@@ -0,0 +1,187 @@
+import bisect
+import functools
+import math
+import types
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+import attr
+from gevent.queue import Queue
+
+# content type of version 0.0.4 of the prometheus text format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+RPC_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# a transfer needs at least max_reorg_depth foreign blocks to be confirmed
+CONFIRMATION_LATENCY_BUCKETS = (
+    30.0,
+    60.0,
+    120.0,
+    180.0,
+    300.0,
+    600.0,
+    1200.0,
+    1800.0,
+    3600.0,
+    7200.0,
+)
+
+
+class Histogram:
+    """count observed values in buckets with fixed upper bounds
+
+    The bucket counts are allocated once, observing a value only
+    increments counters. The bridge runs in a single thread, so no
+    locking is needed.
+    """
+
+    __slots__ = ("bounds", "bucket_counts", "count", "sum")
+
+    def __init__(self, bounds: Sequence[float]) -> None:
+        if list(bounds) != sorted(bounds):
+            raise ValueError("Histogram bounds must be sorted")
+        self.bounds = tuple(bounds)
+        # the last bucket counts the values above the highest bound
+        self.bucket_counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.bucket_counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative_counts(self) -> List[Tuple[float, int]]:
+        """return the (upper bound, number of values <= bound) pairs of all buckets"""
+        result = []
+        total = 0
+        for bound, count in zip(self.bounds + (math.inf,), self.bucket_counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+
+@attr.s(auto_attribs=True)
+class MetricFamily:
+    name: str
+    type: str
+    help: str
+    # (labels, value) pairs, the value of histograms is a Histogram
+    samples: List[Tuple[Dict[str, str], Any]] = attr.Factory(list)
+
+    def add(self, value: Any, **labels: str) -> "MetricFamily":
+        self.samples.append((labels, value))
+        return self
+
+
+@functools.singledispatch
+def collect_metrics(obj) -> Iterable[MetricFamily]:
+    raise NotImplementedError()
+
+
+@collect_metrics.register(types.FunctionType)
+def _collect_function_metrics(f):
+    return f()
+
+
+@collect_metrics.register(Queue)
+def _collect_queue_metrics(queue):
+    return [
+        MetricFamily(
+            "bridge_queue_size", "gauge", "Number of items waiting in the queue"
+        ).add(queue.qsize())
+    ]
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, bool):
+        return str(int(value))
+    return repr(value)
+
+
+def _escape_label_value(value: Any) -> str:
+    return str(value).replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def _format_labels(labels: Dict[str, Any]) -> str:
+    if not labels:
+        return ""
+    return (
+        "{"
+        + ",".join(
+            f'{name}="{_escape_label_value(value)}"' for name, value in labels.items()
+        )
+        + "}"
+    )
+
+
+def _format_samples(family: MetricFamily) -> Iterable[str]:
+    for labels, value in family.samples:
+        if family.type != "histogram":
+            yield f"{family.name}{_format_labels(labels)} {_format_value(value)}"
+            continue
+        for bound, count in value.cumulative_counts():
+            bucket_labels = {**labels, "le": _format_value(bound)}
+            yield f"{family.name}_bucket{_format_labels(bucket_labels)} {count}"
+        yield f"{family.name}_sum{_format_labels(labels)} {_format_value(value.sum)}"
+        yield f"{family.name}_count{_format_labels(labels)} {value.count}"
+
+
+def format_metrics(families: Iterable[MetricFamily]) -> str:
+    """render the metric families in the prometheus text format
+
+    Families of the same name, e.g. reported for both chains, are
+    rendered together.
+    """
+    merged: Dict[str, MetricFamily] = {}
+    for family in families:
+        if family.name in merged:
+            merged[family.name].samples.extend(family.samples)
+        else:
+            merged[family.name] = MetricFamily(
+                family.name, family.type, family.help, list(family.samples)
+            )
+
+    lines = []
+    for family in merged.values():
+        lines.append(f"# HELP {family.name} {family.help}")
+        lines.append(f"# TYPE {family.name} {family.type}")
+        lines.extend(_format_samples(family))
+    return "\n".join(lines) + "\n"
+
+
+class Metrics:
+    """serve the metrics of the registered collectors in the prometheus format
+
+    The metrics are only collected and rendered when they are requested.
+    The labels given to add_collector are added to all metrics of the
+    collector.
+    """
+
+    def __init__(self) -> None:
+        self.collectors: List[Tuple[Any, Dict[str, str]]] = []
+
+    def add_collector(self, collector, **labels: str) -> None:
+        self.collectors.append((collector, labels))
+
+    def collect(self) -> List[MetricFamily]:
+        families = []
+        for collector, labels in self.collectors:
+            for family in collect_metrics(collector):
+                families.append(
+                    MetricFamily(
+                        family.name,
+                        family.type,
+                        family.help,
+                        [
+                            ({**labels, **sample_labels}, value)
+                            for sample_labels, value in family.samples
+                        ],
+                    )
+                )
+        return families
+
+    def on_get(self, req, resp):
+        resp.body = format_metrics(self.collect())
+        resp.content_type = CONTENT_TYPE
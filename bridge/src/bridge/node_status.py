@@ -1,13 +1,24 @@
 import logging
 import time
-from typing import Dict, List, Optional
+import weakref
+from typing import Any, Dict, List, Optional, Tuple
 
 import attr
 import gevent
 import tenacity
+from eth_utils import to_int
+from web3.datastructures import AttributeDict
+
+from bridge.rpc_batch import make_batch_request, supports_batch_requests
 
 logger = logging.getLogger(__name__)
 
+PARITY_STATUS_METHODS = ["parity_chainStatus", "parity_nodeKind"]
+
+# the client version of a node does not change, so we only fetch it once
+# per provider
+_client_versions: "weakref.WeakKeyDictionary[Any, str]" = weakref.WeakKeyDictionary()
+
 
 @attr.s(auto_attribs=True)
 class NodeStatus:
@@ -21,13 +32,55 @@ class NodeStatus:
     timestamp: float
 
 
-def _get_node_status_parity(w3, *, client_version):
-    block_number = w3.eth.blockNumber
+def _format_syncing_map(syncing):
+    if not syncing:
+        return None
+    return AttributeDict(
+        {
+            key: to_int(hexstr=value)
+            if isinstance(value, str) and value.startswith("0x")
+            else value
+            for key, value in syncing.items()
+        }
+    )
+
 
-    syncing_map = w3.eth.syncing or None
+def _request_status(w3, extra_methods: List[str]) -> Tuple[int, Any, List[Any]]:
+    """return block number, syncing map and results of the extra methods
+
+    All of them are fetched with a single batch request if the provider
+    supports it.
+    """
+    methods = ["eth_blockNumber", "eth_syncing"] + extra_methods
+    if supports_batch_requests(w3, methods):
+        block_number, syncing, *extra_results = make_batch_request(
+            w3, [(method, []) for method in methods]
+        )
+        return (
+            to_int(hexstr=block_number),
+            _format_syncing_map(syncing),
+            [AttributeDict.recursive(result) for result in extra_results],
+        )
+    else:
+        return (
+            w3.eth.blockNumber,
+            w3.eth.syncing or None,
+            [w3.manager.request_blocking(method, []) for method in extra_methods],
+        )
+
+
+def get_client_version(w3) -> str:
+    try:
+        return _client_versions[w3.provider]
+    except KeyError:
+        client_version = _client_versions[w3.provider] = w3.clientVersion
+        return client_version
 
-    chain_status = w3.manager.request_blocking("parity_chainStatus", [])
-    node_kind = w3.manager.request_blocking("parity_nodeKind", [])
+
+def _get_node_status_parity(w3, *, client_version):
+    block_number, syncing_map, (chain_status, node_kind) = _request_status(
+        w3, PARITY_STATUS_METHODS
+    )
 
     if chain_status.blockGap is not None:
         block_gap = [int(x, 16) for x in chain_status.blockGap]
@@ -59,8 +112,7 @@ def _get_node_status_parity(w3, *, client_version):
 
 
 def _get_node_status_geth(w3, *, client_version):
-    block_number = w3.eth.blockNumber
-    syncing_map = w3.eth.syncing or None
+    block_number, syncing_map, _ = _request_status(w3, [])
     is_syncing = bool(syncing_map)
     return NodeStatus(
         is_syncing=is_syncing,
@@ -75,7 +127,7 @@ def _get_node_status_geth(w3, *, client_version):
 
 
 def get_node_status(w3):
-    client_version = w3.clientVersion
+    client_version = get_client_version(w3)
     if client_version.startswith("Parity"):
         logger.debug("Fetch parity node status")
         return _get_node_status_parity(w3, client_version=client_version)
@@ -0,0 +1,129 @@
+import logging
+from typing import Callable, Iterable, List, Optional, Set
+
+import gevent.lock
+from eth_utils import to_checksum_address
+
+from bridge.event_journal import EventJournal
+from bridge.webservice import get_internal_state_summary
+
+logger = logging.getLogger(__name__)
+
+
+class NonceManager:
+    """allocate the nonces of the validator's transactions locally
+
+    The next nonce is fetched from the node once and then incremented in
+    memory for every transaction. resync makes the manager fetch the
+    nonce from the node again for the next allocation, e.g. after the
+    node rejected a nonce as too low. If a journal is given, allocated
+    nonces are recorded there and the manager never hands out nonces
+    below the recorded one after a restart, even if the node has not seen
+    all of our transactions yet.
+
+    Allocated nonces are in flight until they are released, i.e. until
+    their transactions have been sent or given up. The next nonce never
+    goes below the highest nonce in flight, neither on resync nor when
+    filling a gap, as their transactions may still reach the node.
+    """
+
+    def __init__(
+        self,
+        fetch_next_nonce: Callable[[], int],
+        *,
+        address: bytes,
+        journal: Optional[EventJournal] = None,
+    ) -> None:
+        self.fetch_next_nonce = fetch_next_nonce
+        self.address = address
+        self.journal = journal
+        self.next_nonce: Optional[int] = None
+        self.num_resyncs = 0
+        self.in_flight_nonces: Set[int] = set()
+        self._lock = gevent.lock.RLock()
+
+    def _min_next_nonce(self) -> int:
+        if not self.in_flight_nonces:
+            return 0
+        return max(self.in_flight_nonces) + 1
+
+    def _seed(self) -> int:
+        next_nonce = self.fetch_next_nonce()
+        if self.journal is not None:
+            recorded_next_nonce = self.journal.get_next_nonce(self.address)
+            if recorded_next_nonce is not None and recorded_next_nonce > next_nonce:
+                logger.info(
+                    f"Node reports next nonce {next_nonce}, continuing with recorded "
+                    f"next nonce {recorded_next_nonce}"
+                )
+                next_nonce = recorded_next_nonce
+        return max(next_nonce, self._min_next_nonce())
+
+    def _set_next_nonce(self, next_nonce: int) -> None:
+        self.next_nonce = next_nonce
+        if self.journal is not None:
+            self.journal.record_next_nonce(self.address, next_nonce)
+
+    def allocate(self) -> int:
+        """return the nonce to use for the next transaction"""
+        return self.allocate_many(1)[0]
+
+    def allocate_many(self, count: int) -> List[int]:
+        """return consecutive nonces for the next count transactions
+
+        The nonces are in flight until they are released.
+        """
+        with self._lock:
+            if self.next_nonce is None:
+                self.next_nonce = self._seed()
+            nonces = list(range(self.next_nonce, self.next_nonce + count))
+            self._set_next_nonce(self.next_nonce + count)
+            self.in_flight_nonces.update(nonces)
+            return nonces
+
+    def release(self, nonces: Iterable[int]) -> None:
+        """mark the nonces as no longer in flight"""
+        with self._lock:
+            self.in_flight_nonces.difference_update(nonces)
+
+    def resync(self) -> None:
+        """fetch the next nonce from the node again on the next allocation"""
+        with self._lock:
+            logger.info("Resynchronizing the nonce with the node")
+            self.next_nonce = None
+            self.num_resyncs += 1
+            if self.journal is not None:
+                self.journal.record_next_nonce(self.address, None)
+
+    def check_for_gap(self) -> bool:
+        """continue with the node's next nonce if it is behind the local one
+
+        This happens if transactions got lost on the way to the node or
+        have been dropped from its transaction pool. Without filling the
+        gap, none of the following transactions can be included. Nonces
+        still in flight are not handed out again, the gap is filled once
+        they have been released.
+        """
+        with self._lock:
+            if self.next_nonce is None:
+                return False
+            node_next_nonce = max(self.fetch_next_nonce(), self._min_next_nonce())
+            if node_next_nonce >= self.next_nonce:
+                return False
+            logger.warning(
+                f"Node reports next nonce {node_next_nonce} for "
+                f"{to_checksum_address(self.address)}, but {self.next_nonce} was "
+                f"expected. Filling the gap."
+            )
+            self._set_next_nonce(node_next_nonce)
+            self.num_resyncs += 1
+            return True
+
+
+@get_internal_state_summary.register(NonceManager)
+def get_state_summary(nonce_manager):
+    return {
+        "next_nonce": nonce_manager.next_nonce,
+        "num_resyncs": nonce_manager.num_resyncs,
+        "num_in_flight_nonces": len(nonce_manager.in_flight_nonces),
+    }
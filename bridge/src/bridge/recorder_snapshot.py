@@ -0,0 +1,221 @@
+import logging
+import os
+import struct
+from typing import BinaryIO, Dict, Optional, Set
+
+import attr
+import gevent
+from eth_typing import Hash32
+from hexbytes import HexBytes
+
+from bridge.events import ChainRole, TransferEvent
+from bridge.transfer_recorder import TransferRecorder, TransferState
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_MAGIC = b"TLBRIDGE"
+SNAPSHOT_VERSION = 3
+
+# magic, version
+HEADER = struct.Struct(">8sH")
+# home and foreign fetched block numbers (-1: unknown), evicted orphans
+STATUS = struct.Struct(">qqQ")
+COUNT = struct.Struct(">Q")
+# transfer hash, state
+TRANSFER_STATE = struct.Struct(">32sB")
+# transaction hash, block number, transaction index, log index, sender,
+# receiver, value
+TRANSFER = struct.Struct(">32sQII20s20s32s")
+# transfer hash, home block timestamp watermark
+ORPHAN = struct.Struct(">32sq")
+HASH = struct.Struct(">32s")
+
+
+@attr.s(auto_attribs=True)
+class RecorderSnapshot:
+    fetched_block_numbers: Dict[ChainRole, int]
+    transfer_states: Dict[Hash32, TransferState]
+    transfer_events: Dict[Hash32, TransferEvent]
+    orphan_hashes: Dict[Hash32, int]
+    unwatermarked_orphan_hashes: Set[Hash32]
+    num_evicted_orphan_hashes: int
+
+
+def take_snapshot(recorder: TransferRecorder) -> RecorderSnapshot:
+    """copy the state of the recorder
+
+    This only copies references, the event records are immutable. The
+    snapshot can be written while the recorder keeps changing.
+    """
+    return RecorderSnapshot(
+        fetched_block_numbers=dict(recorder.fetched_block_numbers),
+        transfer_states=dict(recorder.transfer_states),
+        transfer_events=dict(recorder.transfer_events),
+        orphan_hashes=dict(recorder.orphan_hashes),
+        unwatermarked_orphan_hashes=set(recorder.unwatermarked_orphan_hashes),
+        num_evicted_orphan_hashes=recorder.num_evicted_orphan_hashes,
+    )
+
+
+def restore_snapshot(recorder: TransferRecorder, snapshot: RecorderSnapshot) -> None:
+    """restore the state of a fresh recorder from the snapshot
+
+    Transfers that have been scheduled for confirmation become ready
+    again, as their confirmation may not have been sent. Transfers we
+    have confirmed are marked as confirmed by our Confirmation events.
+
+    The validator status and balance are not part of the snapshot, the
+    recorder only starts confirming once fresh checks have come in.
+    """
+    recorder.fetched_block_numbers.update(snapshot.fetched_block_numbers)
+    recorder.num_evicted_orphan_hashes = snapshot.num_evicted_orphan_hashes
+    recorder.transfer_events.update(snapshot.transfer_events)
+    for transfer_hash, state in snapshot.transfer_states.items():
+        recorder._add_transfer_state(transfer_hash, state & ~TransferState.SCHEDULED)
+    # _add_transfer_state puts all orphans in unwatermarked_orphan_hashes
+    recorder.orphan_hashes.update(snapshot.orphan_hashes)
+    recorder.unwatermarked_orphan_hashes.clear()
+    recorder.unwatermarked_orphan_hashes.update(snapshot.unwatermarked_orphan_hashes)
+
+
+def write_snapshot_to_file(snapshot: RecorderSnapshot, file: BinaryIO) -> None:
+    file.write(HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION))
+    file.write(
+        STATUS.pack(
+            snapshot.fetched_block_numbers.get(ChainRole.home, -1),
+            snapshot.fetched_block_numbers.get(ChainRole.foreign, -1),
+            snapshot.num_evicted_orphan_hashes,
+        )
+    )
+
+    file.write(COUNT.pack(len(snapshot.transfer_states)))
+    for transfer_hash, state in snapshot.transfer_states.items():
+        file.write(TRANSFER_STATE.pack(transfer_hash, state))
+        if TransferState.TRANSFERRED in state:
+            event = snapshot.transfer_events[transfer_hash]
+            file.write(
+                TRANSFER.pack(
+                    event.transactionHash,
+                    event.blockNumber,
+                    event.transactionIndex,
+                    event.logIndex,
+                    event.sender,
+                    event.receiver,
+                    event.value.to_bytes(32, "big"),
+                )
+            )
+
+    file.write(COUNT.pack(len(snapshot.orphan_hashes)))
+    for transfer_hash, home_block_timestamp in snapshot.orphan_hashes.items():
+        file.write(ORPHAN.pack(transfer_hash, home_block_timestamp))
+
+    file.write(COUNT.pack(len(snapshot.unwatermarked_orphan_hashes)))
+    for transfer_hash in snapshot.unwatermarked_orphan_hashes:
+        file.write(HASH.pack(transfer_hash))
+
+
+def read_snapshot_from_bytes(data: bytes) -> RecorderSnapshot:
+    offset = 0
+
+    def unpack(struct_: struct.Struct):
+        nonlocal offset
+        values = struct_.unpack_from(data, offset)
+        offset += struct_.size
+        return values
+
+    try:
+        magic, version = unpack(HEADER)
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError("Not a recorder snapshot")
+        if version != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported snapshot version {version}")
+
+        (home_block_number, foreign_block_number, num_evicted_orphan_hashes,) = unpack(
+            STATUS
+        )
+        fetched_block_numbers = {
+            chain_role: block_number
+            for chain_role, block_number in [
+                (ChainRole.home, home_block_number),
+                (ChainRole.foreign, foreign_block_number),
+            ]
+            if block_number >= 0
+        }
+
+        transfer_states = {}
+        transfer_events = {}
+        (num_transfer_states,) = unpack(COUNT)
+        for _ in range(num_transfer_states):
+            transfer_hash, state = unpack(TRANSFER_STATE)
+            transfer_states[transfer_hash] = TransferState(state)
+            if TransferState.TRANSFERRED in TransferState(state):
+                (
+                    transaction_hash,
+                    block_number,
+                    transaction_index,
+                    log_index,
+                    sender,
+                    receiver,
+                    value,
+                ) = unpack(TRANSFER)
+                transfer_events[transfer_hash] = TransferEvent(
+                    transactionHash=HexBytes(transaction_hash),
+                    blockNumber=block_number,
+                    transactionIndex=transaction_index,
+                    logIndex=log_index,
+                    sender=sender,
+                    receiver=receiver,
+                    value=int.from_bytes(value, "big"),
+                )
+
+        (num_orphan_hashes,) = unpack(COUNT)
+        orphan_hashes = dict(unpack(ORPHAN) for _ in range(num_orphan_hashes))
+
+        (num_unwatermarked_orphan_hashes,) = unpack(COUNT)
+        unwatermarked_orphan_hashes = {
+            unpack(HASH)[0] for _ in range(num_unwatermarked_orphan_hashes)
+        }
+    except struct.error as error:
+        raise ValueError("Truncated recorder snapshot") from error
+
+    return RecorderSnapshot(
+        fetched_block_numbers=fetched_block_numbers,
+        transfer_states=transfer_states,
+        transfer_events=transfer_events,
+        orphan_hashes=orphan_hashes,
+        unwatermarked_orphan_hashes=unwatermarked_orphan_hashes,
+        num_evicted_orphan_hashes=num_evicted_orphan_hashes,
+    )
+
+
+def write_snapshot(snapshot: RecorderSnapshot, path: str) -> None:
+    """atomically replace the snapshot file at path"""
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, "wb") as file:
+        write_snapshot_to_file(snapshot, file)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary_path, path)
+
+
+def read_snapshot(path: str) -> Optional[RecorderSnapshot]:
+    """read the snapshot at path, returns None if there is none"""
+    try:
+        with open(path, "rb") as file:
+            data = file.read()
+    except FileNotFoundError:
+        return None
+    return read_snapshot_from_bytes(data)
+
+
+def save_recorder_snapshot(recorder: TransferRecorder, path: str) -> None:
+    """write a snapshot of the recorder to path
+
+    The snapshot is encoded and written in a thread of the gevent
+    threadpool, so that large states don't block the event loop.
+    """
+    snapshot = take_snapshot(recorder)
+    gevent.get_hub().threadpool.apply(write_snapshot, (snapshot, path))
+    logger.info(
+        f"Wrote snapshot of {len(snapshot.transfer_states)} transfer states to {path}"
+    )
@@ -0,0 +1,88 @@
+import json
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+from web3 import HTTPProvider
+from web3._utils.request import make_post_request
+
+from bridge.rpc_provider import (
+    HEAD_DEPENDENT_METHODS,
+    FailoverProvider,
+    PooledHTTPProvider,
+)
+
+
+class BatchRequestRejectedException(ValueError):
+    """the node did not answer a batch request with a response per call"""
+
+
+def supports_batch_requests(w3, methods: Iterable[str] = ()) -> bool:
+    """check if calls of the given methods can be sent as one batch request
+
+    The failover provider sends a batch request to a single endpoint,
+    which does not work for calls it routes by the heads of its endpoints.
+    """
+    if isinstance(w3.provider, FailoverProvider):
+        return not any(method in HEAD_DEPENDENT_METHODS for method in methods)
+    return isinstance(w3.provider, HTTPProvider)
+
+
+def make_raw_batch_request(w3, calls: Sequence[Tuple[str, List]]) -> List[Dict]:
+    """send the given (method, params) calls as a single JSON-RPC batch request
+
+    Returns the raw response object of every call in the order of the
+    calls, each having either a "result" or an "error" entry. Raises a
+    BatchRequestRejectedException if the node rejects the batch as a whole
+    or answers with something else than a list of responses. Only works
+    for HTTP providers, see supports_batch_requests.
+    """
+    provider = w3.provider
+    payload = [
+        {"jsonrpc": "2.0", "id": request_id, "method": method, "params": params}
+        for request_id, (method, params) in enumerate(calls)
+    ]
+    data = json.dumps(payload).encode()
+    if isinstance(provider, (PooledHTTPProvider, FailoverProvider)):
+        raw_response = provider.post(data, method="batch")
+    else:
+        raw_response = make_post_request(
+            provider.endpoint_uri, data, **provider.get_request_kwargs()
+        )
+    try:
+        responses = json.loads(raw_response)
+    except ValueError as exc:
+        raise BatchRequestRejectedException(
+            f"Malformed response to batch request: {exc}"
+        ) from exc
+    if not isinstance(responses, list):
+        # nodes answer with a single error if they can't handle the batch
+        if isinstance(responses, dict):
+            raise BatchRequestRejectedException(responses.get("error", responses))
+        raise BatchRequestRejectedException(responses)
+
+    responses_by_id = {
+        response.get("id"): response
+        for response in responses
+        if isinstance(response, dict)
+    }
+    return [
+        responses_by_id.get(
+            request_id,
+            {"error": {"message": f"Missing response to batched {method} request"}},
+        )
+        for request_id, (method, _) in enumerate(calls)
+    ]
+
+
+def make_batch_request(w3, calls: Sequence[Tuple[str, List]]) -> List[Any]:
+    """send the given (method, params) calls as a single JSON-RPC batch request
+
+    Returns the raw, unformatted results in the order of the calls. A
+    ValueError is raised if any call fails, like web3 does for single
+    requests. Only works for HTTP providers, see supports_batch_requests.
+    """
+    results = []
+    for response in make_raw_batch_request(w3, calls):
+        if "error" in response:
+            raise ValueError(response["error"])
+        results.append(response["result"])
+    return results
@@ -0,0 +1,418 @@
+import collections
+import logging
+import time
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import attr
+import gevent
+import gevent.lock
+import requests
+from requests.adapters import HTTPAdapter
+from web3 import HTTPProvider
+from web3.providers import BaseProvider
+
+from bridge.metrics import RPC_LATENCY_BUCKETS, Histogram, MetricFamily, collect_metrics
+from bridge.webservice import get_internal_state_summary
+
+logger = logging.getLogger(__name__)
+
+
+@attr.s(auto_attribs=True)
+class MethodStats:
+    count: int = 0
+    errors: int = 0
+    total_latency: float = 0.0
+    max_latency: float = 0.0
+    latency_histogram: Histogram = attr.Factory(lambda: Histogram(RPC_LATENCY_BUCKETS))
+
+    def record(self, latency: float, failed: bool) -> None:
+        self.count += 1
+        self.errors += failed
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+        self.latency_histogram.observe(latency)
+
+    @property
+    def mean_latency(self) -> float:
+        return self.total_latency / self.count if self.count else 0.0
+
+
+class PooledHTTPProvider(HTTPProvider):
+    """HTTP provider meant to be shared by all components talking to a node
+
+    Requests are sent over a pool of at most max_concurrent_requests
+    keep-alive connections. Further requests wait until a connection
+    becomes available. The number of requests, errors and their latency
+    is recorded per JSON-RPC method.
+    """
+
+    def __init__(
+        self, endpoint_uri: str, *, max_concurrent_requests: int, **kwargs: Any
+    ) -> None:
+        if max_concurrent_requests <= 0:
+            raise ValueError("Can not send requests with zero or negative concurrency!")
+        super().__init__(endpoint_uri, **kwargs)
+        self.max_concurrent_requests = max_concurrent_requests
+        self._semaphore = gevent.lock.BoundedSemaphore(max_concurrent_requests)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=max_concurrent_requests, pool_block=True
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.method_stats: Dict[str, MethodStats] = {}
+
+    def post(self, data: bytes, *, method: str) -> bytes:
+        """post raw request data, recording the latency under the given method"""
+        stats = self.method_stats.get(method)
+        if stats is None:
+            stats = self.method_stats[method] = MethodStats()
+        # always given to the constructor
+        assert self.endpoint_uri is not None
+        with self._semaphore:
+            start_time = time.monotonic()
+            failed = True
+            try:
+                response = self.session.post(
+                    self.endpoint_uri, data=data, **self.get_request_kwargs()
+                )
+                response.raise_for_status()
+                failed = False
+                return response.content
+            finally:
+                stats.record(time.monotonic() - start_time, failed)
+
+    def make_request(self, method, params):
+        request_data = self.encode_rpc_request(method, params)
+        raw_response = self.post(request_data, method=method)
+        response = self.decode_rpc_response(raw_response)
+        if "error" in response:
+            self.method_stats[method].errors += 1
+        return response
+
+
+@get_internal_state_summary.register(PooledHTTPProvider)
+def get_state_summary(provider):
+    return {
+        "max_concurrent_requests": provider.max_concurrent_requests,
+        "methods": {
+            method: {
+                "count": stats.count,
+                "errors": stats.errors,
+                "mean_latency": stats.mean_latency,
+                "max_latency": stats.max_latency,
+            }
+            for method, stats in provider.method_stats.items()
+        },
+    }
+
+
+def _collect_method_stats_metrics(method_stats: Dict[str, MethodStats], **labels):
+    latencies = MetricFamily(
+        "bridge_rpc_request_duration_seconds",
+        "histogram",
+        "Latency of the JSON-RPC requests sent to the node",
+    )
+    errors = MetricFamily(
+        "bridge_rpc_errors_total",
+        "counter",
+        "Number of failed JSON-RPC requests, including error responses",
+    )
+    for method, stats in method_stats.items():
+        latencies.add(stats.latency_histogram, method=method, **labels)
+        errors.add(stats.errors, method=method, **labels)
+    return [latencies, errors]
+
+
+@collect_metrics.register(PooledHTTPProvider)
+def collect_provider_metrics(provider):
+    return _collect_method_stats_metrics(provider.method_stats)
+
+
+# read calls that may be sent to a second endpoint while the first one
+# is still busy
+HEDGED_METHODS = {"eth_getLogs", "eth_call", "eth_getTransactionReceipt"}
+
+
+@attr.s(auto_attribs=True)
+class Endpoint:
+    provider: PooledHTTPProvider
+    latency: Optional[float] = None
+    consecutive_failures: int = 0
+    unhealthy_until: float = 0.0
+    head: Optional[int] = None
+
+    def is_healthy(self, now: float) -> bool:
+        return self.unhealthy_until <= now
+
+    def record_success(self, latency: float) -> None:
+        # exponentially weighted moving average of the request latency
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency = 0.8 * self.latency + 0.2 * latency
+        self.consecutive_failures = 0
+        self.unhealthy_until = 0.0
+
+    def record_failure(self, now: float, max_backoff: float) -> None:
+        self.consecutive_failures += 1
+        backoff = min(2 ** (self.consecutive_failures - 1), max_backoff)
+        self.unhealthy_until = now + backoff
+
+
+# the failover provider picks the endpoints for these calls by their heads,
+# they can't be part of a batch request sent to a single endpoint
+HEAD_DEPENDENT_METHODS = ("eth_blockNumber", "eth_getLogs")
+
+
+class NoSyncedEndpointException(Exception):
+    pass
+
+
+def _get_to_block_number(params: Any) -> Optional[int]:
+    to_block = params[0].get("toBlock") if params else None
+    if isinstance(to_block, int):
+        return to_block
+    if isinstance(to_block, str) and to_block.startswith("0x"):
+        return int(to_block, 16)
+    return None
+
+
+class FailoverProvider(BaseProvider):
+    """send requests to the best of multiple endpoints of the same chain
+
+    Endpoints are ordered by their health and latency. If a request to an
+    endpoint fails, the endpoint is considered unhealthy for an
+    exponentially growing backoff time and the request is sent to the
+    next one. With hedge_requests, the read calls in HEDGED_METHODS are
+    additionally sent to a second endpoint, if the first one takes longer
+    than the given percentile of the recent latencies of that call.
+
+    Endpoints whose head is more than max_head_lag blocks behind the best
+    head are lagging, e.g. because their node stopped syncing, and are
+    only used if no other endpoint is left. To stay consistent with the
+    reorg safety assumptions of the event fetchers, eth_blockNumber
+    returns the minimum head of all healthy endpoints that are not
+    lagging and getLogs is only sent to endpoints known to have reached
+    the requested block.
+    """
+
+    def __init__(
+        self,
+        providers: List[PooledHTTPProvider],
+        *,
+        hedge_requests: bool = False,
+        hedge_percentile: float = 0.95,
+        max_backoff: float = 60.0,
+        max_head_lag: int = 10,
+    ) -> None:
+        if not providers:
+            raise ValueError("Need at least one provider!")
+        if max_head_lag < 0:
+            raise ValueError("max_head_lag must not be negative")
+        self.endpoints = [Endpoint(provider) for provider in providers]
+        self.hedge_requests = hedge_requests
+        self.hedge_percentile = hedge_percentile
+        self.max_backoff = max_backoff
+        self.max_head_lag = max_head_lag
+        self._latencies: Dict[str, Deque[float]] = {}
+
+    def __str__(self) -> str:
+        return "Failover between " + ", ".join(
+            str(endpoint.provider) for endpoint in self.endpoints
+        )
+
+    def is_connected(self) -> bool:
+        return any(endpoint.provider.isConnected() for endpoint in self.endpoints)
+
+    isConnected = is_connected
+
+    def _best_head(self, now: float) -> Optional[int]:
+        heads = [
+            endpoint.head
+            for endpoint in self.endpoints
+            if endpoint.is_healthy(now) and endpoint.head is not None
+        ]
+        return max(heads, default=None)
+
+    def is_lagging(self, endpoint: Endpoint, now: float) -> bool:
+        best_head = self._best_head(now)
+        return (
+            best_head is not None
+            and endpoint.head is not None
+            and best_head - endpoint.head > self.max_head_lag
+        )
+
+    def _ordered_endpoints(self) -> List[Endpoint]:
+        now = time.monotonic()
+        return sorted(
+            self.endpoints,
+            key=lambda endpoint: (
+                not endpoint.is_healthy(now),
+                self.is_lagging(endpoint, now),
+                endpoint.unhealthy_until,
+                endpoint.latency if endpoint.latency is not None else 0.0,
+            ),
+        )
+
+    def _request_at(self, endpoint: Endpoint, method, params):
+        start_time = time.monotonic()
+        try:
+            response = endpoint.provider.make_request(method, params)
+        except Exception:
+            endpoint.record_failure(time.monotonic(), self.max_backoff)
+            raise
+        latency = time.monotonic() - start_time
+        endpoint.record_success(latency)
+        self._latencies.setdefault(method, collections.deque(maxlen=100)).append(
+            latency
+        )
+        return response
+
+    def post(self, data: bytes, *, method: str) -> bytes:
+        """post raw request data, e.g. a batch request, to the best endpoint
+
+        The endpoints are tried in order until one answers. Batch requests
+        must not contain calls of HEAD_DEPENDENT_METHODS.
+        """
+        last_exception: Optional[Exception] = None
+        for endpoint in self._ordered_endpoints():
+            start_time = time.monotonic()
+            try:
+                raw_response = endpoint.provider.post(data, method=method)
+            except Exception as exception:
+                endpoint.record_failure(time.monotonic(), self.max_backoff)
+                logger.warning(
+                    f"{method} request to {endpoint.provider.endpoint_uri} failed: {exception!r}"
+                )
+                last_exception = exception
+                continue
+            endpoint.record_success(time.monotonic() - start_time)
+            return raw_response
+        assert last_exception is not None
+        raise last_exception
+
+    def _hedge_delay(self, method) -> Optional[float]:
+        latencies = self._latencies.get(method)
+        if latencies is None or len(latencies) < 20:
+            return None
+        return sorted(latencies)[int(self.hedge_percentile * (len(latencies) - 1))]
+
+    def _request_with_failover(self, endpoints: List[Endpoint], method, params):
+        last_exception: Optional[Exception] = None
+        for endpoint in endpoints:
+            try:
+                return self._request_at(endpoint, method, params)
+            except Exception as exception:
+                logger.warning(
+                    f"{method} request to {endpoint.provider.endpoint_uri} failed: {exception!r}"
+                )
+                last_exception = exception
+        assert last_exception is not None
+        raise last_exception
+
+    def _hedged_request(self, endpoints: List[Endpoint], hedge_delay, method, params):
+        primary = gevent.spawn(self._request_at, endpoints[0], method, params)
+        primary.join(timeout=hedge_delay)
+        if primary.ready():
+            if primary.successful():
+                return primary.value
+            return self._request_with_failover(endpoints[1:], method, params)
+
+        # the first endpoint is slow, ask the next ones as well
+        secondary = gevent.spawn(
+            self._request_with_failover, endpoints[1:], method, params
+        )
+        greenlets = [primary, secondary]
+        try:
+            for greenlet in gevent.iwait(greenlets):
+                if greenlet.successful():
+                    return greenlet.value
+            raise secondary.exception
+        finally:
+            gevent.killall(greenlets, block=False)
+
+    def _request_min_head(self, endpoints: List[Endpoint], method, params):
+        greenlets = [
+            gevent.spawn(self._request_at, endpoint, method, params)
+            for endpoint in endpoints
+        ]
+        gevent.joinall(greenlets)
+        answers: List[Tuple[Endpoint, int, Any]] = []
+        for endpoint, greenlet in zip(endpoints, greenlets):
+            if greenlet.successful() and "result" in greenlet.value:
+                head = int(greenlet.value["result"], 16)
+                endpoint.head = head
+                answers.append((endpoint, head, greenlet.value))
+        # the heads are up to date now, leave out endpoints that fell behind
+        now = time.monotonic()
+        responses = [
+            (head, response)
+            for endpoint, head, response in answers
+            if not self.is_lagging(endpoint, now)
+        ]
+        if not responses:
+            # let the remaining endpoints have a go, raising the last error
+            return self._request_with_failover(
+                [endpoint for endpoint in self.endpoints if endpoint not in endpoints],
+                method,
+                params,
+            )
+        return min(responses, key=lambda head_and_response: head_and_response[0])[1]
+
+    def make_request(self, method, params):
+        endpoints = self._ordered_endpoints()
+        now = time.monotonic()
+        if method == "eth_blockNumber":
+            # ask lagging endpoints as well, so that they can catch up again
+            healthy_endpoints = [
+                endpoint for endpoint in endpoints if endpoint.is_healthy(now)
+            ] or endpoints[:1]
+            return self._request_min_head(healthy_endpoints, method, params)
+
+        if method == "eth_getLogs":
+            to_block_number = _get_to_block_number(params)
+            if to_block_number is not None:
+                # other endpoints could silently return incomplete logs
+                endpoints = [
+                    endpoint
+                    for endpoint in endpoints
+                    if endpoint.head is not None and endpoint.head >= to_block_number
+                ]
+                if not endpoints:
+                    raise NoSyncedEndpointException(
+                        f"No endpoint is known to have reached block {to_block_number}"
+                    )
+
+        if self.hedge_requests and method in HEDGED_METHODS and len(endpoints) > 1:
+            hedge_delay = self._hedge_delay(method)
+            if hedge_delay is not None:
+                return self._hedged_request(endpoints, hedge_delay, method, params)
+
+        return self._request_with_failover(endpoints, method, params)
+
+
+@get_internal_state_summary.register(FailoverProvider)
+def get_failover_state_summary(provider):
+    now = time.monotonic()
+    return {
+        endpoint.provider.endpoint_uri: {
+            "healthy": endpoint.is_healthy(now),
+            "lagging": provider.is_lagging(endpoint, now),
+            "latency": endpoint.latency,
+            "consecutive_failures": endpoint.consecutive_failures,
+            "head": endpoint.head,
+            **get_internal_state_summary(endpoint.provider),
+        }
+        for endpoint in provider.endpoints
+    }
+
+
+@collect_metrics.register(FailoverProvider)
+def collect_failover_provider_metrics(provider):
+    families = []
+    for endpoint in provider.endpoints:
+        families += _collect_method_stats_metrics(
+            endpoint.provider.method_stats, endpoint=endpoint.provider.endpoint_uri
+        )
+    return families
@@ -1,38 +1,72 @@
 import logging
-from typing import Any, Dict, List, Optional, Set
+from collections import OrderedDict
+from enum import IntFlag
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
 
 from eth_typing import Hash32
-from eth_utils import from_wei, is_same_address
+from eth_utils import from_wei
 from web3.datastructures import AttributeDict
 
 from bridge.constants import (
     COMPLETION_EVENT_NAME,
     CONFIRMATION_EVENT_NAME,
     TRANSFER_EVENT_NAME,
-    ZERO_ADDRESS,
+    ZERO_ADDRESS_BYTES,
 )
 from bridge.events import (
     BalanceCheck,
     ChainRole,
+    CompletionEvent,
+    ConfirmationEvent,
     Event,
     FetcherReachedHeadEvent,
     IsValidatorCheck,
+    TransferEvent,
 )
+from bridge.log_decoder import compact_transfer_event
 from bridge.utils import compute_transfer_hash, sort_events
 from bridge.webservice import get_internal_state_summary
 
 logger = logging.getLogger(__name__)
 
+# number of seconds the foreign event fetcher has to progress beyond the time
+# of a confirmation or completion without a transfer before it is evicted
+ORPHAN_EVICTION_MARGIN = 3600
+
+
+class TransferState(IntFlag):
+    TRANSFERRED = 1
+    CONFIRMED = 2
+    COMPLETED = 4
+    SCHEDULED = 8
+
 
 class TransferRecorder:
-    def __init__(self, minimum_balance: int) -> None:
-        self.transfer_events: Dict[Hash32, AttributeDict] = {}
+    def __init__(
+        self, minimum_balance: int, orphan_eviction_margin: int = ORPHAN_EVICTION_MARGIN
+    ) -> None:
+        self.transfer_events: Dict[Hash32, TransferEvent] = {}
 
-        self.transfer_hashes: Set[Hash32] = set()
-        self.confirmation_hashes: Set[Hash32] = set()
-        self.completion_hashes: Set[Hash32] = set()
+        # the state of every transfer hash we have seen an event for, as long
+        # as the transfer has not been both recorded and completed
+        self.transfer_states: Dict[Hash32, TransferState] = {}
 
+        # indices into transfer_states, updated with each state transition
+        self.ready_hashes: Set[Hash32] = set()
         self.scheduled_hashes: Set[Hash32] = set()
+        self.completion_hashes: Set[Hash32] = set()
+
+        # Transfer hashes we have only seen confirmations or completions for,
+        # mapped to the timestamp of a home block at or after the one of
+        # their confirmation or completion. The transfer must have been
+        # mined on the foreign chain before, so it can not show up anymore
+        # once the foreign event fetcher has fetched a block mined later.
+        # The timestamps are non-decreasing.
+        self.orphan_hashes: "OrderedDict[Hash32, int]" = OrderedDict()
+        # orphans seen since the home event fetcher last reached its head
+        self.unwatermarked_orphan_hashes: Set[Hash32] = set()
+        self.orphan_eviction_margin = orphan_eviction_margin
+        self.num_evicted_orphan_hashes = 0
 
         self.home_chain_synced_until = 0.0
 
@@ -43,6 +77,11 @@ class TransferRecorder:
         self.last_fetcher_reached_head_event: Dict[
             ChainRole, FetcherReachedHeadEvent
         ] = {}
+        # block numbers up to which the events of each chain have been
+        # applied. The confirmation task planner applies the events of a
+        # block together, so whenever a snapshot is taken, all events of
+        # these blocks have been applied and fetchers may resume after them.
+        self.fetched_block_numbers: Dict[ChainRole, int] = {}
 
     def log_current_state(self):
         if self.is_validator:
@@ -61,6 +100,7 @@ class TransferRecorder:
             f"    {len(self.transfer_events)} transfer events\n"
             f"    {len(self.scheduled_hashes)} scheduled for confirmation\n"
             f"    {len(self.completion_hashes)} completions seen\n"
+            f"    {self.num_evicted_orphan_hashes} orphan hashes evicted\n"
             f"====================================================\n"
         )
 
@@ -72,61 +112,124 @@ class TransferRecorder:
     def is_balance_sufficient(self):
         return self.balance is not None and self.balance >= self.minimum_balance
 
-    def clear_transfers(self) -> None:
-        transfer_hashes_to_remove = self.transfer_hashes & self.completion_hashes
-
-        self.transfer_hashes -= transfer_hashes_to_remove
-        self.confirmation_hashes -= transfer_hashes_to_remove
-        self.completion_hashes -= transfer_hashes_to_remove
-
-        self.scheduled_hashes -= transfer_hashes_to_remove
-
-        for transfer_hash in transfer_hashes_to_remove:
-            self.transfer_events.pop(transfer_hash, None)
-
-    def pull_transfers_to_confirm(self) -> List[AttributeDict]:
+    def pull_transfers_to_confirm(self) -> List[TransferEvent]:
         if self.is_validating:
-            unconfirmed_transfer_hashes = (
-                self.transfer_hashes
-                - self.confirmation_hashes
-                - self.completion_hashes
-                - self.scheduled_hashes
-            )
-            self.scheduled_hashes |= unconfirmed_transfer_hashes
+            ready_hashes, self.ready_hashes = self.ready_hashes, set()
+            for transfer_hash in ready_hashes:
+                self._add_transfer_state(transfer_hash, TransferState.SCHEDULED)
             confirmation_tasks = [
-                self.transfer_events[transfer_hash]
-                for transfer_hash in unconfirmed_transfer_hashes
+                self.transfer_events[transfer_hash] for transfer_hash in ready_hashes
             ]
         else:
             confirmation_tasks = []
 
-        self.clear_transfers()
         sort_events(confirmation_tasks)
         return confirmation_tasks
 
+    def _add_transfer_state(self, transfer_hash: Hash32, state: TransferState) -> None:
+        old_state = self.transfer_states.get(transfer_hash, TransferState(0))
+        new_state = old_state | state
+
+        if TransferState.TRANSFERRED in state:
+            self.orphan_hashes.pop(transfer_hash, None)
+            self.unwatermarked_orphan_hashes.discard(transfer_hash)
+        elif not old_state:
+            self._add_orphan_hash(transfer_hash)
+
+        if (
+            TransferState.TRANSFERRED in new_state
+            and TransferState.COMPLETED in new_state
+        ):
+            # nothing left to do for this transfer
+            self.transfer_states.pop(transfer_hash, None)
+            self.transfer_events.pop(transfer_hash, None)
+            self.ready_hashes.discard(transfer_hash)
+            self.scheduled_hashes.discard(transfer_hash)
+            self.completion_hashes.discard(transfer_hash)
+            return
+
+        self.transfer_states[transfer_hash] = new_state
+        if new_state == TransferState.TRANSFERRED:
+            self.ready_hashes.add(transfer_hash)
+        else:
+            self.ready_hashes.discard(transfer_hash)
+        if TransferState.SCHEDULED in new_state:
+            self.scheduled_hashes.add(transfer_hash)
+        if TransferState.COMPLETED in new_state:
+            self.completion_hashes.add(transfer_hash)
+
+    def _add_orphan_hash(self, transfer_hash: Hash32) -> None:
+        # the watermark is set once the home event fetcher reaches its head
+        self.unwatermarked_orphan_hashes.add(transfer_hash)
+
+    def _watermark_orphan_hashes(self, home_block_timestamp: int) -> None:
+        for transfer_hash in self.unwatermarked_orphan_hashes:
+            self.orphan_hashes[transfer_hash] = home_block_timestamp
+        self.unwatermarked_orphan_hashes.clear()
+
+    def _evict_orphan_hashes(self, foreign_block_timestamp: int) -> None:
+        while self.orphan_hashes:
+            transfer_hash, home_block_timestamp = next(iter(self.orphan_hashes.items()))
+            if (
+                home_block_timestamp + self.orphan_eviction_margin
+                > foreign_block_timestamp
+            ):
+                break
+            self.orphan_hashes.popitem(last=False)
+            self.transfer_states.pop(transfer_hash, None)
+            self.completion_hashes.discard(transfer_hash)
+            self.num_evicted_orphan_hashes += 1
+
+    def _update_fetched_block_number(
+        self, chain_role: ChainRole, block_number: int
+    ) -> None:
+        self.fetched_block_numbers[chain_role] = max(
+            self.fetched_block_numbers.get(chain_role, block_number), block_number
+        )
+
+    def _record_transfer(self, event: TransferEvent) -> None:
+        transfer_hash = compute_transfer_hash(event)
+        self.transfer_events[transfer_hash] = event
+        self._add_transfer_state(transfer_hash, TransferState.TRANSFERRED)
+
     def _apply_web3_event(self, event: Any) -> None:
         event_name = event.event
 
         if event_name == TRANSFER_EVENT_NAME:
-            if event.args.value == 0 or is_same_address(
-                event.args["from"], ZERO_ADDRESS
-            ):
-                logger.warning(f"skipping event {event}")
-                return
-            transfer_hash = compute_transfer_hash(event)
-            self.transfer_hashes.add(transfer_hash)
-            self.transfer_events[transfer_hash] = event
+            # only keep what is needed to confirm the transfer
+            self._apply_transfer_event(compact_transfer_event(event))
         elif event_name == CONFIRMATION_EVENT_NAME:
             transfer_hash = Hash32(bytes(event.args.transferHash))
             assert len(transfer_hash) == 32
-            self.confirmation_hashes.add(transfer_hash)
+            self._update_fetched_block_number(ChainRole.home, event.blockNumber)
+            self._add_transfer_state(transfer_hash, TransferState.CONFIRMED)
         elif event_name == COMPLETION_EVENT_NAME:
             transfer_hash = Hash32(bytes(event.args.transferHash))
             assert len(transfer_hash) == 32
-            self.completion_hashes.add(transfer_hash)
+            self._update_fetched_block_number(ChainRole.home, event.blockNumber)
+            self._add_transfer_state(transfer_hash, TransferState.COMPLETED)
         else:
             raise ValueError(f"Got unknown event {event}")
 
+    def _apply_transfer_event(self, event: TransferEvent) -> None:
+        self._update_fetched_block_number(ChainRole.foreign, event.blockNumber)
+        if event.value == 0 or event.sender == ZERO_ADDRESS_BYTES:
+            logger.warning(f"skipping event {event}")
+            return
+        self._record_transfer(event)
+
+    def _apply_confirmation_event(self, event: ConfirmationEvent) -> None:
+        self._update_fetched_block_number(ChainRole.home, event.blockNumber)
+        self._add_transfer_state(
+            Hash32(bytes(event.transferHash)), TransferState.CONFIRMED
+        )
+
+    def _apply_completion_event(self, event: CompletionEvent) -> None:
+        self._update_fetched_block_number(ChainRole.home, event.blockNumber)
+        self._add_transfer_state(
+            Hash32(bytes(event.transferHash)), TransferState.COMPLETED
+        )
+
     def _apply_is_validator_check(self, event: IsValidatorCheck):
         if event.is_validator and not self.is_validator:
             logger.info("Account is a member of the validator set")
@@ -156,12 +259,24 @@ class TransferRecorder:
 
     def _apply_fetcher_reached_head_event(self, event: FetcherReachedHeadEvent):
         self.last_fetcher_reached_head_event[event.chain_role] = event
+        self._update_fetched_block_number(
+            event.chain_role, event.last_fetched_block_number
+        )
+        if event.last_fetched_block_timestamp is None:
+            return
+        if event.chain_role == ChainRole.home:
+            self._watermark_orphan_hashes(event.last_fetched_block_timestamp)
+        else:
+            self._evict_orphan_hashes(event.last_fetched_block_timestamp)
 
-    dispatch_by_event_class = {
+    dispatch_by_event_class: Dict[type, Callable[["TransferRecorder", Any], None]] = {
         BalanceCheck: _apply_balance_check,
         IsValidatorCheck: _apply_is_validator_check,
         FetcherReachedHeadEvent: _apply_fetcher_reached_head_event,
         AttributeDict: _apply_web3_event,
+        TransferEvent: _apply_transfer_event,
+        ConfirmationEvent: _apply_confirmation_event,
+        CompletionEvent: _apply_completion_event,
     }
 
     def apply_event(self, event):
@@ -171,6 +286,15 @@ class TransferRecorder:
             raise ValueError(f"Received unknown event {event}")
         dispatch(self, event)
 
+    def apply_events(self, events: Iterable[Event]) -> None:
+        """apply the events in order, like calling apply_event for each of them"""
+        dispatch_by_event_class = self.dispatch_by_event_class
+        for event in events:
+            dispatch = dispatch_by_event_class.get(type(event), None)
+            if dispatch is None:
+                raise ValueError(f"Received unknown event {event}")
+            dispatch(self, event)
+
 
 @get_internal_state_summary.register(TransferRecorder)
 def get_state_summary(transfer_recorder):
@@ -180,6 +304,9 @@ def get_state_summary(transfer_recorder):
         "num_transfer_events": len(transfer_recorder.transfer_events),
         "num_scheduled_hashes": len(transfer_recorder.scheduled_hashes),
         "num_completions": len(transfer_recorder.completion_hashes),
+        "num_orphan_hashes": len(transfer_recorder.orphan_hashes)
+        + len(transfer_recorder.unwatermarked_orphan_hashes),
+        "num_evicted_orphan_hashes": transfer_recorder.num_evicted_orphan_hashes,
         "is_validating": transfer_recorder.is_validating,
         "is_balance_sufficient": transfer_recorder.is_balance_sufficient,
         "last_fetcher_reached_head_event": [
@@ -0,0 +1,64 @@
+import logging
+from typing import Optional
+
+import gevent
+import tenacity
+from eth_utils import is_canonical_address
+
+from bridge.chain_head_tracker import ChainHeadTracker
+from bridge.events import BalanceCheck
+
+logger = logging.getLogger(__name__)
+
+retry = tenacity.retry(
+    wait=tenacity.wait_exponential(multiplier=1, min=5, max=120),
+    before_sleep=tenacity.before_sleep_log(logger, logging.WARN),
+)
+
+
+class ValidatorStateSampler:
+    """sample the balance of the validator every poll_interval seconds
+
+    The balance is read at the latest block and put on the control queue as
+    BalanceCheck. If no new block has been mined since the last sample, the
+    balance is not read again. The validator status is reported by the
+    ValidatorStatusWatcher, which follows the changes of the validator set
+    instead of asking for it at every block.
+    """
+
+    def __init__(
+        self,
+        *,
+        w3,
+        validator_address: bytes,
+        control_queue,
+        poll_interval: float,
+        chain_head_tracker: Optional[ChainHeadTracker] = None,
+    ) -> None:
+        if not is_canonical_address(validator_address):
+            raise ValueError("Validator address must be given in canonical format")
+        self.w3 = w3
+        self.validator_address = validator_address
+        self.control_queue = control_queue
+        self.chain_head_tracker = chain_head_tracker
+        self.poll_interval = poll_interval
+        self.sampled_block_number: Optional[int] = None
+
+    @retry
+    def _rpc_latest_block(self) -> int:
+        if self.chain_head_tracker is not None:
+            return self.chain_head_tracker.get_node_status().block_number
+        return self.w3.eth.blockNumber
+
+    @retry
+    def sample(self, block_number: int) -> int:
+        """return the balance of the validator at the block"""
+        return self.w3.eth.getBalance(self.validator_address, block_number)
+
+    def run(self) -> None:
+        while True:
+            block_number = self._rpc_latest_block()
+            if block_number != self.sampled_block_number:
+                self.control_queue.put(BalanceCheck(self.sample(block_number)))
+                self.sampled_block_number = block_number
+            gevent.sleep(self.poll_interval)
@@ -1,13 +1,21 @@
 import logging
+import time
+from typing import Optional
 
 import gevent
 import tenacity
-from eth_utils import is_canonical_address, to_checksum_address
+from eth_utils import is_canonical_address, to_canonical_address, to_checksum_address
+from gevent.queue import Empty, Queue
 
+from bridge.constants import INITIATE_CHANGE_EVENT_NAME
 from bridge.events import IsValidatorCheck
 
 logger = logging.getLogger(__name__)
 
+# number of seconds between isValidator checks if the changes of the validator set are
+# followed via its events
+RECONCILIATION_INTERVAL = 600
+
 retry = tenacity.retry(
     wait=tenacity.wait_exponential(multiplier=1, min=5, max=120),
     before_sleep=tenacity.before_sleep_log(logger, logging.WARN),
@@ -15,6 +23,17 @@ retry = tenacity.retry(
 
 
 class ValidatorStatusWatcher:
+    """watch whether the validator is a member of the validator set
+
+    Without a validator_set_event_queue, the validator proxy is asked
+    every poll_interval seconds. Otherwise, the watcher follows the
+    InitiateChange events of the validator set contract put on that
+    queue. Once a change of our membership has been initiated, the proxy
+    is asked every poll_interval seconds until the change has been
+    finalized. Apart from that, the proxy is only asked every
+    reconciliation_interval seconds as a safety net.
+    """
+
     def __init__(
         self,
         validator_proxy_contract,
@@ -22,6 +41,8 @@ class ValidatorStatusWatcher:
         poll_interval,
         control_queue,
         stop_validating_callback,
+        validator_set_event_queue: Optional[Queue] = None,
+        reconciliation_interval: float = RECONCILIATION_INTERVAL,
     ) -> None:
         self.validator_proxy_contract = validator_proxy_contract
         if not is_canonical_address(validator_address):
@@ -31,6 +52,46 @@ class ValidatorStatusWatcher:
         self.poll_interval = poll_interval
         self.control_queue = control_queue
         self.stop_validating_callback = stop_validating_callback
+        self.validator_set_event_queue = validator_set_event_queue
+        self.reconciliation_interval = reconciliation_interval
+        # poll until this time, as a change of our membership has been initiated
+        self._poll_until = 0.0
+
+    def _wait_for_change(self, is_validator: bool) -> None:
+        """wait until the validator status may have changed from is_validator"""
+        now = time.monotonic()
+        if self.validator_set_event_queue is None:
+            gevent.sleep(self.poll_interval)
+            return
+        if now < self._poll_until:
+            # the proxy is asked anyway, the events are not needed
+            while not self.validator_set_event_queue.empty():
+                self.validator_set_event_queue.get_nowait()
+            gevent.sleep(self.poll_interval)
+            return
+
+        deadline = now + self.reconciliation_interval
+        while True:
+            try:
+                event = self.validator_set_event_queue.get(
+                    timeout=max(deadline - time.monotonic(), 0)
+                )
+            except Empty:
+                return
+            if getattr(event, "event", None) != INITIATE_CHANGE_EVENT_NAME:
+                continue
+            new_validators = {
+                to_canonical_address(address) for address in event.args._newSet
+            }
+            if (self.validator_address in new_validators) != is_validator:
+                logger.info(
+                    f"A change of the validator set has been initiated in block "
+                    f"{event.blockNumber}, which changes the validator status of "
+                    f"{to_checksum_address(self.validator_address)}"
+                )
+                # the validator proxy is updated when the change is finalized
+                self._poll_until = time.monotonic() + self.reconciliation_interval
+                return
 
     def _wait_for_validator_status(self):
         """wait until address has validator status"""
@@ -40,12 +101,14 @@ class ValidatorStatusWatcher:
                 f"member of the validator set at the moment. This status will be checked "
                 f"periodically."
             )
-            gevent.sleep(self.poll_interval)
+            self._wait_for_change(is_validator=False)
+        self._poll_until = 0.0
 
     def _wait_for_non_validator_status(self):
         """wait until address has lost its validator status"""
         while self.check_validator_status():
-            gevent.sleep(self.poll_interval)
+            self._wait_for_change(is_validator=True)
+        self._poll_until = 0.0
 
     def run(self) -> None:
         is_validator_from_beginning = self.check_validator_status()
@@ -56,7 +119,7 @@ class ValidatorStatusWatcher:
             self.control_queue.put(IsValidatorCheck(True))
         logger.info("The account is a member of the validator set")
 
-        gevent.sleep(self.poll_interval)  # wait until we poll again
+        self._wait_for_change(is_validator=True)
         self._wait_for_non_validator_status()
 
         logger.warning(
@@ -84,6 +84,9 @@ class InternalState:
             "version": get_bridge_version(),
         }
 
+    def add_reporter(self, name, reporter):
+        self.summary_reporters[name] = reporter
+
     def on_get(self, req, resp):
         resp.media = {
             "bridge": {
@@ -100,11 +103,18 @@ class Webservice:
 
         self.app = falcon.API()
         self.app.add_route("/", WelcomePage())
+        self.internal_state = None
+        self.metrics = None
         self.services = [Service("webservice", self.run)]
 
     def enable_internal_state(self, internal_state):
+        self.internal_state = internal_state
         self.app.add_route("/bridge/internal-state", internal_state)
 
+    def enable_metrics(self, metrics):
+        self.metrics = metrics
+        self.app.add_route("/metrics", metrics)
+
     def run(self):
         http_server = WSGIServer((self.host, self.port), self.app, log=logger)
         logger.info(f"Webservice is running on http://{self.host}:{self.port}".format())
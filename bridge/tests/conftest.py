@@ -1,5 +1,8 @@
+import json
+
 import gevent.monkey
 import gevent.pool
+import gevent.pywsgi
 import pytest
 import toml
 from deploy_tools import deploy_compiled_contract
@@ -17,6 +20,73 @@ if "time" not in gevent.monkey.saved:
     )
 
 
+class JsonRpcServer:
+    """stand-in for the JSON-RPC endpoint of a node answering with fixed results"""
+
+    def __init__(self, results, delay=0):
+        self.results = results
+        self.delay = delay
+        # error to answer batch requests with as a whole, if set
+        self.batch_error = None
+        self.requests = []
+        self.client_ports = set()
+        self.num_active_requests = 0
+        self.max_active_requests = 0
+        self.server = gevent.pywsgi.WSGIServer(
+            ("127.0.0.1", 0), self._application, log=None
+        )
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server.server_port}"
+
+    def _answer(self, request):
+        if request["method"] not in self.results:
+            return {
+                "jsonrpc": "2.0",
+                "id": request["id"],
+                "error": {"code": -32601, "message": "Method not found"},
+            }
+        return {
+            "jsonrpc": "2.0",
+            "id": request["id"],
+            "result": self.results[request["method"]],
+        }
+
+    def _application(self, environ, start_response):
+        request = json.loads(environ["wsgi.input"].read())
+        self.requests.append(request)
+        self.client_ports.add(environ["REMOTE_PORT"])
+        self.num_active_requests += 1
+        self.max_active_requests = max(
+            self.max_active_requests, self.num_active_requests
+        )
+        gevent.sleep(self.delay)
+        self.num_active_requests -= 1
+        if isinstance(request, list) and self.batch_error is not None:
+            response = {"jsonrpc": "2.0", "id": None, "error": self.batch_error}
+        elif isinstance(request, list):
+            # answer in reverse order, nodes are free to reorder responses
+            response = [self._answer(r) for r in reversed(request)]
+        else:
+            response = self._answer(request)
+        start_response("200 OK", [("Content-Type", "application/json")])
+        return [json.dumps(response).encode()]
+
+
+@pytest.fixture
+def make_json_rpc_server(request):
+    """returns a function that starts a JsonRpcServer answering with the given results"""
+
+    def make(results, delay=0):
+        server = JsonRpcServer(results, delay=delay)
+        server.server.start()
+        request.addfinalizer(server.server.stop)
+        return server
+
+    return make
+
+
 @pytest.fixture()
 def pool():
     """return a gevent pool object.
@@ -0,0 +1,78 @@
+import gevent
+import pytest
+
+from bridge.chain_head_tracker import ChainHeadTracker
+from bridge.events import ChainRole
+
+
+@pytest.fixture
+def chain_head_tracker(w3_home):
+    return ChainHeadTracker(w3_home, poll_interval=10, chain_role=ChainRole.home)
+
+
+def test_invalid_poll_interval(w3_home):
+    with pytest.raises(ValueError):
+        ChainHeadTracker(w3_home, poll_interval=0, chain_role=ChainRole.home)
+
+
+def test_update(chain_head_tracker, tester_home):
+    tester_home.mine_blocks(3)
+    chain_head_tracker.update()
+
+    assert chain_head_tracker.latest_block_number == 3
+    assert not chain_head_tracker.get_node_status().is_syncing
+
+
+def test_listeners_get_node_status(chain_head_tracker, tester_home):
+    node_statuses = []
+    chain_head_tracker.add_listener(node_statuses.append)
+
+    tester_home.mine_blocks(2)
+    chain_head_tracker.update()
+
+    assert [status.block_number for status in node_statuses] == [2]
+
+
+def test_get_node_status_waits_for_first_update(chain_head_tracker, spawn):
+    greenlet = spawn(chain_head_tracker.get_node_status)
+    gevent.sleep(0.01)
+    assert not greenlet.ready()
+
+    chain_head_tracker.update()
+    assert greenlet.get(timeout=0.1).block_number == 0
+
+
+def test_notify_new_head_triggers_update(chain_head_tracker, tester_home, spawn):
+    spawn(chain_head_tracker.run)
+    chain_head_tracker.get_node_status()
+
+    tester_home.mine_blocks(1)
+    chain_head_tracker.notify_new_head(1)
+
+    with gevent.Timeout(0.5):
+        chain_head_tracker.wait_for_next_block(0, timeout=10)
+    assert chain_head_tracker.latest_block_number == 1
+
+
+def test_wait_for_next_block_times_out(chain_head_tracker):
+    chain_head_tracker.update()
+    with gevent.Timeout(0.5):
+        chain_head_tracker.wait_for_next_block(0, timeout=0.05)
+    assert chain_head_tracker.latest_block_number == 0
+
+
+def test_get_block_time(chain_head_tracker, tester_home):
+    chain_head_tracker.update()
+    tester_home.mine_blocks(2)
+    chain_head_tracker.update()
+    time_seen = chain_head_tracker.node_status.timestamp
+    tester_home.mine_blocks(1)
+    chain_head_tracker.update()
+
+    # the first head might have been mined long before it has been seen
+    assert chain_head_tracker.get_block_time(0) is None
+    # block 1 has been skipped, it has been mined before block 2 was seen
+    assert chain_head_tracker.get_block_time(1) == time_seen
+    assert chain_head_tracker.get_block_time(2) == time_seen
+    assert chain_head_tracker.get_block_time(3) > time_seen
+    assert chain_head_tracker.get_block_time(4) is None
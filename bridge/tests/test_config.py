@@ -1,3 +1,6 @@
+import pytest
+from marshmallow.exceptions import ValidationError
+
 import bridge.config
 
 example_logging_config = """
@@ -40,3 +43,29 @@ def test_logging_key(write_config, minimal_config):
     assert cfg["logging"]["version"] == 1
     assert cfg["logging"]["incremental"] is True
     assert cfg["logging"]["loggers"]["bridge.main"] == {"level": "DEBUG"}
+
+
+def test_max_event_fetch_limit_smaller_than_event_fetch_limit(
+    minimal_config, load_config_from_string
+):
+    config = minimal_config.replace(
+        "[home_chain]\n",
+        "[home_chain]\nevent_fetch_limit = 100\nmax_event_fetch_limit = 10\n",
+    )
+    with pytest.raises(ValidationError):
+        load_config_from_string(config)
+
+
+@pytest.mark.parametrize(
+    "ws_url, valid",
+    [("ws://localhost:8547", True), ("wss://node.example", True), ("http://x", False)],
+)
+def test_ws_url(minimal_config, load_config_from_string, ws_url, valid):
+    config = minimal_config.replace(
+        "[home_chain]\n", f'[home_chain]\nws_url = "{ws_url}"\n'
+    )
+    if valid:
+        assert load_config_from_string(config)["home_chain"]["ws_url"] == ws_url
+    else:
+        with pytest.raises(ValidationError):
+            load_config_from_string(config)
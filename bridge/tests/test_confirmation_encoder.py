@@ -0,0 +1,98 @@
+import pytest
+from eth_keys.datatypes import PrivateKey
+from eth_utils import to_canonical_address
+from web3 import Web3
+
+from bridge.confirmation_encoder import (
+    decode_transaction,
+    encode_confirm_transfer,
+    sign_transaction,
+)
+from bridge.constants import CONFIRMATION_TRANSACTION_GAS_LIMIT
+from bridge.contract_abis import HOME_BRIDGE_ABI
+
+HOME_BRIDGE_ADDRESS = "0x731a10897d267e19B34503aD902d0A29173Ba4B1"
+RECIPIENT = "0x7E5F4552091A69125d5DfCb7b8C2659029395Bdf"
+PRIVATE_KEY = b"\x01" * 32
+
+
+@pytest.fixture
+def home_bridge_contract():
+    return Web3().eth.contract(address=HOME_BRIDGE_ADDRESS, abi=HOME_BRIDGE_ABI)
+
+
+def build_web3_transaction(home_bridge_contract, amount, nonce, chain_id):
+    return home_bridge_contract.functions.confirmTransfer(
+        transferHash=b"\x11" * 32,
+        transactionHash=b"\x22" * 32,
+        amount=amount,
+        recipient=RECIPIENT,
+    ).buildTransaction(
+        {
+            "gasPrice": 10 ** 9,
+            "nonce": nonce,
+            "gas": CONFIRMATION_TRANSACTION_GAS_LIMIT,
+            "chainId": chain_id,
+        }
+    )
+
+
+@pytest.mark.parametrize("amount", [1, 10 ** 25, 2 ** 256 - 1])
+def test_encode_confirm_transfer_like_web3(home_bridge_contract, amount):
+    transaction = build_web3_transaction(
+        home_bridge_contract, amount, nonce=0, chain_id=1
+    )
+    data = encode_confirm_transfer(
+        b"\x11" * 32, b"\x22" * 32, amount, to_canonical_address(RECIPIENT)
+    )
+    assert Web3.toHex(data) == transaction["data"]
+
+
+@pytest.mark.parametrize(
+    "transfer_hash, amount, recipient",
+    [
+        (b"\x11" * 31, 1, b"\x33" * 20),
+        (b"\x11" * 32, -1, b"\x33" * 20),
+        (b"\x11" * 32, 2 ** 256, b"\x33" * 20),
+        (b"\x11" * 32, 1, b"\x33" * 32),
+    ],
+)
+def test_encode_confirm_transfer_invalid(transfer_hash, amount, recipient):
+    with pytest.raises(ValueError):
+        encode_confirm_transfer(transfer_hash, b"\x22" * 32, amount, recipient)
+
+
+@pytest.mark.parametrize("nonce, chain_id", [(0, 1), (1234, 4660), (2 ** 40, 99)])
+def test_sign_transaction_like_web3(home_bridge_contract, nonce, chain_id):
+    transaction = build_web3_transaction(
+        home_bridge_contract, 10 ** 25, nonce, chain_id
+    )
+    web3_signed_transaction = Web3().eth.account.sign_transaction(
+        transaction, PRIVATE_KEY
+    )
+
+    signed_transaction = sign_transaction(
+        PrivateKey(PRIVATE_KEY),
+        nonce=nonce,
+        gas_price=10 ** 9,
+        gas=CONFIRMATION_TRANSACTION_GAS_LIMIT,
+        to=to_canonical_address(HOME_BRIDGE_ADDRESS),
+        data=encode_confirm_transfer(
+            b"\x11" * 32, b"\x22" * 32, 10 ** 25, to_canonical_address(RECIPIENT)
+        ),
+        chain_id=chain_id,
+    )
+    assert signed_transaction == web3_signed_transaction
+
+
+def test_decode_transaction():
+    fields = {
+        "nonce": 7,
+        "gas_price": 10 ** 9,
+        "gas": CONFIRMATION_TRANSACTION_GAS_LIMIT,
+        "to": to_canonical_address(HOME_BRIDGE_ADDRESS),
+        "data": b"\x01\x02",
+    }
+    signed_transaction = sign_transaction(PrivateKey(PRIVATE_KEY), chain_id=1, **fields)
+
+    assert decode_transaction(signed_transaction.rawTransaction) == fields
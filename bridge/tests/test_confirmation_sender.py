@@ -3,18 +3,26 @@ import logging
 import gevent
 import pytest
 import rlp
+import tenacity
 from eth.vm.forks.spurious_dragon.transactions import SpuriousDragonTransaction
+from eth_keys.datatypes import PrivateKey
 from eth_utils import decode_hex, keccak, to_checksum_address
 from gevent.queue import Queue
 from hexbytes import HexBytes
 from web3.datastructures import AttributeDict
 
+from bridge.chain_head_tracker import ChainHeadTracker
+from bridge.confirmation_encoder import sign_transaction
 from bridge.confirmation_sender import (
+    MAX_REJECTED_SEND_ATTEMPTS,
+    ConfirmationLatencies,
     ConfirmationSender,
     ConfirmationWatcher,
     make_sanity_check_transfer,
 )
-from bridge.constants import HOME_CHAIN_STEP_DURATION
+from bridge.constants import HOME_CHAIN_STEP_DURATION, NOOP_TRANSACTION_GAS_LIMIT
+from bridge.events import ChainRole
+from bridge.metrics import collect_metrics, format_metrics
 from bridge.utils import compute_transfer_hash
 
 
@@ -174,7 +182,7 @@ def test_transaction_sending(
         chain_id=int(w3_home.eth.chainId),
     )
     confirmation_sender.send_confirmation_transaction(transaction)
-    assert transaction == confirmation_sender.pending_transaction_queue.peek()
+    assert confirmation_sender.pending_transaction_queue.peek() == (transaction, None)
     tester_home.mine_block()
     receipt = w3_home.eth.getTransactionReceipt(transaction.hash)
     assert receipt is not None
@@ -190,6 +198,68 @@ def test_transaction_sending(
     assert event_args.validator == validator_address
 
 
+def test_confirmations_use_local_nonces(
+    confirmation_sender, w3_home, tester_home, transfer_event, validator_address
+):
+    first_nonce = w3_home.eth.getTransactionCount(validator_address, "pending")
+    confirmation_sender.send_confirmation_from_transfer_event(transfer_event)
+
+    # the node is not asked for the nonce anymore
+    w3_home.middleware_onion.add(disallow_w3_rpc, name="disallow")
+    nonce = confirmation_sender.nonce_manager.allocate()
+    w3_home.middleware_onion.remove("disallow")
+
+    assert nonce == first_nonce + 1
+
+
+def make_reject_raw_transactions(num_rejections):
+    def reject_raw_transactions(make_request, w3):
+        rejections = iter(range(num_rejections))
+
+        def middleware(method, params):
+            if (
+                method == "eth_sendRawTransaction"
+                and next(rejections, None) is not None
+            ):
+                raise ValueError({"code": -32010, "message": "Invalid transaction"})
+            return make_request(method, params)
+
+        return middleware
+
+    return reject_raw_transactions
+
+
+def test_rejected_confirmation_nonce_is_filled(
+    confirmation_sender,
+    w3_home,
+    tester_home,
+    transfer_event,
+    validator_address,
+    pending_transaction_queue,
+    monkeypatch,
+):
+    monkeypatch.setattr(
+        ConfirmationSender._rpc_send_raw_transaction.retry, "wait", tenacity.wait_none()
+    )
+    w3_home.middleware_onion.add(
+        make_reject_raw_transactions(MAX_REJECTED_SEND_ATTEMPTS)
+    )
+    first_nonce = w3_home.eth.getTransactionCount(validator_address, "pending")
+    confirmation_sender.send_confirmation_from_transfer_event(transfer_event)
+
+    noop_transaction, _ = pending_transaction_queue.peek()
+    transaction = rlp.decode(
+        bytes(noop_transaction.rawTransaction), SpuriousDragonTransaction
+    )
+    assert transaction.nonce == first_nonce
+    assert transaction.to == decode_hex(validator_address)
+    assert transaction.data == b""
+
+    tester_home.mine_block()
+    assert w3_home.eth.getTransactionCount(validator_address) == first_nonce + 1
+    assert confirmation_sender.num_filled_nonces == 1
+
+
 def test_transfers_are_handled(
     confirmation_sender,
     w3_home,
@@ -212,6 +282,44 @@ def test_transfers_are_handled(
     assert len(events) == 1
 
 
+def test_transfers_are_handled_by_multiple_workers(
+    home_bridge_contract,
+    validator_key,
+    foreign_bridge_contract,
+    w3_home,
+    transfer_queue,
+    transfer_event,
+    pending_transaction_queue,
+    spawn,
+):
+    confirmation_sender = ConfirmationSender(
+        transfer_event_queue=transfer_queue,
+        home_bridge_contract=home_bridge_contract,
+        private_key=validator_key.to_bytes(),
+        gas_price=1,
+        max_reorg_depth=5,
+        pending_transaction_queue=pending_transaction_queue,
+        sanity_check_transfer=make_sanity_check_transfer(
+            to_checksum_address(foreign_bridge_contract.address)
+        ),
+        num_workers=3,
+    )
+    assert len(confirmation_sender.services) == 3
+    for service in confirmation_sender.services:
+        spawn(service.run)
+
+    latest_block_number = w3_home.eth.blockNumber
+    for log_index in range(5):
+        transfer_queue.put(AttributeDict({**transfer_event, "logIndex": log_index}))
+
+    gevent.sleep(0.05)
+
+    events = home_bridge_contract.events.Confirmation.createFilter(
+        fromBlock=latest_block_number
+    ).get_all_entries()
+    assert len(events) == 5
+
+
 def test_pending_transfers_are_cleared(
     confirmation_sender,
     confirmation_watcher,
@@ -246,3 +354,324 @@ def test_pending_transfers_are_cleared(
     gevent.sleep(1.5 * HOME_CHAIN_STEP_DURATION)
 
     assert confirmed()
+
+
+def test_watcher_accepts_mined_replacement(
+    w3_home, tester_home, pending_transaction_queue, monkeypatch, spawn, caplog
+):
+    caplog.set_level(logging.INFO)
+    monkeypatch.setattr("bridge.confirmation_sender.HOME_CHAIN_STEP_DURATION", 0.01)
+    private_key = PrivateKey(tester_home.backend.account_keys[0].to_bytes())
+    address = private_key.public_key.to_canonical_address()
+
+    def sign(gas_price):
+        return sign_transaction(
+            private_key,
+            nonce=w3_home.eth.getTransactionCount(address),
+            gas_price=gas_price,
+            gas=NOOP_TRANSACTION_GAS_LIMIT,
+            to=address,
+            data=b"",
+            chain_id=int(w3_home.eth.chainId),
+        )
+
+    # the underpriced transaction never reaches a block
+    stuck_transaction = sign(gas_price=10 ** 10)
+    replacement = sign(gas_price=2 * 10 ** 10)
+    replaced_transactions = []
+
+    def replace_transaction(transaction):
+        replaced_transactions.append(transaction)
+        w3_home.eth.sendRawTransaction(replacement.rawTransaction)
+        return replacement
+
+    confirmation_watcher = ConfirmationWatcher(
+        w3=w3_home,
+        pending_transaction_queue=pending_transaction_queue,
+        max_reorg_depth=1,
+        replace_transaction=replace_transaction,
+        replacement_blocks=2,
+    )
+    spawn(confirmation_watcher.run)
+    pending_transaction_queue.put((stuck_transaction, None))
+    for _ in range(5):
+        gevent.sleep(0.05)
+        tester_home.mine_block()
+    gevent.sleep(0.05)
+
+    assert replaced_transactions == [stuck_transaction]
+    assert confirmation_watcher.pending_transactions == []
+    assert f"Transaction confirmed: {replacement.hash.hex()}" in caplog.messages
+
+
+def test_watcher_resolves_transactions_of_one_block_together(
+    w3_home, tester_home, pending_transaction_queue, monkeypatch, spawn
+):
+    monkeypatch.setattr("bridge.confirmation_sender.HOME_CHAIN_STEP_DURATION", 0.01)
+    private_keys = [
+        PrivateKey(account_key.to_bytes())
+        for account_key in tester_home.backend.account_keys[:3]
+    ]
+    transactions = [
+        sign_transaction(
+            private_key,
+            nonce=w3_home.eth.getTransactionCount(
+                private_key.public_key.to_checksum_address()
+            ),
+            gas_price=10 ** 10,
+            gas=NOOP_TRANSACTION_GAS_LIMIT,
+            to=private_key.public_key.to_canonical_address(),
+            data=b"",
+            chain_id=int(w3_home.eth.chainId),
+        )
+        for private_key in private_keys
+    ]
+    confirmation_watcher = ConfirmationWatcher(
+        w3=w3_home,
+        pending_transaction_queue=pending_transaction_queue,
+        max_reorg_depth=2,
+    )
+    spawn(confirmation_watcher.run)
+    gevent.sleep(0.01)
+    tester_home.disable_auto_mine_transactions()
+    for transaction in transactions:
+        w3_home.eth.sendRawTransaction(transaction.rawTransaction)
+        pending_transaction_queue.put((transaction, None))
+    tester_home.mine_block()
+    gevent.sleep(0.05)
+    assert len(confirmation_watcher.pending_transactions) == 3
+
+    tester_home.mine_blocks(2)
+    gevent.sleep(0.05)
+    assert confirmation_watcher.pending_transactions == []
+    assert len(pending_transaction_queue) == 0
+
+
+def test_watcher_resolves_transactions_mined_while_queued(
+    w3_home, tester_home, monkeypatch, spawn
+):
+    monkeypatch.setattr("bridge.confirmation_sender.HOME_CHAIN_STEP_DURATION", 0.01)
+    pending_transaction_queue = Queue(2)
+    private_keys = [
+        PrivateKey(account_key.to_bytes())
+        for account_key in tester_home.backend.account_keys[:4]
+    ]
+    transactions = [
+        sign_transaction(
+            private_key,
+            nonce=w3_home.eth.getTransactionCount(
+                private_key.public_key.to_checksum_address()
+            ),
+            gas_price=10 ** 10,
+            gas=NOOP_TRANSACTION_GAS_LIMIT,
+            to=private_key.public_key.to_canonical_address(),
+            data=b"",
+            chain_id=int(w3_home.eth.chainId),
+        )
+        for private_key in private_keys
+    ]
+    confirmation_watcher = ConfirmationWatcher(
+        w3=w3_home,
+        pending_transaction_queue=pending_transaction_queue,
+        max_reorg_depth=1,
+    )
+    spawn(confirmation_watcher.run)
+    gevent.sleep(0.01)
+    tester_home.disable_auto_mine_transactions()
+    for transaction in transactions:
+        w3_home.eth.sendRawTransaction(transaction.rawTransaction)
+    # the block is reorg-safe already when the first transactions are taken
+    tester_home.mine_blocks(2)
+
+    def put_transactions():
+        # like the sender, blocks while the queue is full
+        for transaction in transactions:
+            pending_transaction_queue.put((transaction, None))
+
+    sender = spawn(put_transactions)
+    for _ in range(4):
+        gevent.sleep(0.05)
+        tester_home.mine_block()
+    gevent.sleep(0.05)
+
+    assert sender.ready()
+    assert confirmation_watcher.pending_transactions == []
+    assert len(pending_transaction_queue) == 0
+
+
+def test_watcher_rebroadcasts_dropped_transaction(
+    w3_home, tester_home, pending_transaction_queue, monkeypatch, spawn
+):
+    monkeypatch.setattr("bridge.confirmation_sender.HOME_CHAIN_STEP_DURATION", 0.01)
+    private_key = PrivateKey(tester_home.backend.account_keys[0].to_bytes())
+    address = private_key.public_key.to_canonical_address()
+    # the node does not know the transaction, as if it had been dropped
+    dropped_transaction = sign_transaction(
+        private_key,
+        nonce=w3_home.eth.getTransactionCount(address),
+        gas_price=10 ** 10,
+        gas=NOOP_TRANSACTION_GAS_LIMIT,
+        to=address,
+        data=b"",
+        chain_id=int(w3_home.eth.chainId),
+    )
+    confirmation_watcher = ConfirmationWatcher(
+        w3=w3_home,
+        pending_transaction_queue=pending_transaction_queue,
+        max_reorg_depth=1,
+        rebroadcast_blocks=2,
+    )
+    spawn(confirmation_watcher.run)
+    pending_transaction_queue.put((dropped_transaction, None))
+    for _ in range(5):
+        gevent.sleep(0.05)
+        tester_home.mine_block()
+    gevent.sleep(0.05)
+
+    assert confirmation_watcher.num_dropped_transactions == 1
+    assert confirmation_watcher.num_rebroadcasts == 1
+    assert confirmation_watcher.pending_transactions == []
+
+
+def test_watcher_resolves_known_transaction_of_scanned_block(
+    w3_home, tester_home, pending_transaction_queue
+):
+    private_key = PrivateKey(tester_home.backend.account_keys[0].to_bytes())
+    address = private_key.public_key.to_canonical_address()
+    transaction = sign_transaction(
+        private_key,
+        nonce=w3_home.eth.getTransactionCount(address),
+        gas_price=10 ** 10,
+        gas=NOOP_TRANSACTION_GAS_LIMIT,
+        to=address,
+        data=b"",
+        chain_id=int(w3_home.eth.chainId),
+    )
+    w3_home.eth.sendRawTransaction(transaction.rawTransaction)
+    confirmation_watcher = ConfirmationWatcher(
+        w3=w3_home,
+        pending_transaction_queue=pending_transaction_queue,
+        max_reorg_depth=1,
+        rebroadcast_blocks=2,
+    )
+    latest_block = w3_home.eth.blockNumber
+    # the block of the transaction has been scanned before it was tracked
+    confirmation_watcher.last_scanned_block = latest_block
+    pending_transaction_queue.put((transaction, None))
+    confirmation_watcher.track_new_transactions(latest_block)
+    assert len(confirmation_watcher.pending_transactions) == 1
+
+    confirmation_watcher.rebroadcast_dropped_transactions(latest_block + 2)
+    assert confirmation_watcher.pending_transactions == []
+    assert confirmation_watcher.num_dropped_transactions == 0
+
+
+def test_watcher_confirms_transfer_again_if_nonce_used(
+    w3_home, tester_home, pending_transaction_queue, transfer_event, monkeypatch, spawn
+):
+    monkeypatch.setattr("bridge.confirmation_sender.HOME_CHAIN_STEP_DURATION", 0.01)
+    private_key = PrivateKey(tester_home.backend.account_keys[0].to_bytes())
+    address = private_key.public_key.to_canonical_address()
+
+    def sign(gas_price):
+        return sign_transaction(
+            private_key,
+            nonce=w3_home.eth.getTransactionCount(address),
+            gas_price=gas_price,
+            gas=NOOP_TRANSACTION_GAS_LIMIT,
+            to=address,
+            data=b"",
+            chain_id=int(w3_home.eth.chainId),
+        )
+
+    # the node dropped the transaction and another one used its nonce
+    dropped_transaction = sign(gas_price=10 ** 10)
+    w3_home.eth.sendRawTransaction(sign(gas_price=2 * 10 ** 10).rawTransaction)
+    w3_home.middleware_onion.add(make_reject_raw_transactions(1))
+    transfer_event_queue = Queue()
+    confirmation_watcher = ConfirmationWatcher(
+        w3=w3_home,
+        pending_transaction_queue=pending_transaction_queue,
+        max_reorg_depth=1,
+        rebroadcast_blocks=2,
+        transfer_event_queue=transfer_event_queue,
+    )
+    spawn(confirmation_watcher.run)
+    pending_transaction_queue.put((dropped_transaction, transfer_event))
+    for _ in range(5):
+        gevent.sleep(0.05)
+        tester_home.mine_block()
+    gevent.sleep(0.05)
+
+    assert confirmation_watcher.num_replaced_transactions == 1
+    assert confirmation_watcher.pending_transactions == []
+    assert len(transfer_event_queue) == 1
+    assert transfer_event_queue.get() == transfer_event
+
+
+def test_confirmation_latencies(w3_foreign, tester_foreign, w3_home, tester_home):
+    chain_head_trackers = {
+        chain_role: ChainHeadTracker(w3, poll_interval=10, chain_role=chain_role)
+        for chain_role, w3 in [
+            (ChainRole.foreign, w3_foreign),
+            (ChainRole.home, w3_home),
+        ]
+    }
+    for chain_head_tracker in chain_head_trackers.values():
+        chain_head_tracker.update()
+    confirmation_latencies = ConfirmationLatencies(
+        foreign_chain_head_tracker=chain_head_trackers[ChainRole.foreign],
+        home_chain_head_tracker=chain_head_trackers[ChainRole.home],
+    )
+
+    tester_foreign.mine_blocks(1)
+    chain_head_trackers[ChainRole.foreign].update()
+    # transfers in blocks seen before the tracker started are not measured
+    confirmation_latencies.record_sent(b"\x01" * 32, 0)
+    confirmation_latencies.record_sent(b"\x02" * 32, 1)
+    assert confirmation_latencies.until_sent.count == 1
+
+    tester_home.mine_blocks(1)
+    chain_head_trackers[ChainRole.home].update()
+    confirmation_latencies.record_mined(b"\x01" * 32, 1)
+    confirmation_latencies.record_mined(b"\x02" * 32, 1)
+    assert confirmation_latencies.until_mined.count == 1
+    assert (
+        confirmation_latencies.until_mined.sum >= confirmation_latencies.until_sent.sum
+    )
+
+
+def test_confirmation_latencies_forget_unmined_transactions(
+    w3_foreign, tester_foreign, w3_home, monkeypatch
+):
+    monkeypatch.setattr("bridge.confirmation_sender.MAX_MEASURED_TRANSACTIONS", 2)
+    foreign_chain_head_tracker = ChainHeadTracker(
+        w3_foreign, poll_interval=10, chain_role=ChainRole.foreign
+    )
+    foreign_chain_head_tracker.update()
+    confirmation_latencies = ConfirmationLatencies(
+        foreign_chain_head_tracker=foreign_chain_head_tracker,
+        home_chain_head_tracker=ChainHeadTracker(
+            w3_home, poll_interval=10, chain_role=ChainRole.home
+        ),
+    )
+    tester_foreign.mine_blocks(1)
+    foreign_chain_head_tracker.update()
+
+    for transaction_hash in [b"\x01" * 32, b"\x02" * 32, b"\x03" * 32]:
+        confirmation_latencies.record_sent(transaction_hash, 1)
+    confirmation_latencies.forget(b"\x03" * 32)
+
+    # the oldest transaction has been forgotten to make room for the last one
+    assert list(confirmation_latencies._transfer_block_times) == [b"\x02" * 32]
+
+
+def test_watcher_metrics(confirmation_watcher):
+    confirmation_watcher.num_dropped_transactions = 2
+    confirmation_watcher.num_rebroadcasts = 1
+    metrics = format_metrics(collect_metrics(confirmation_watcher))
+    assert "bridge_pending_transactions 0\n" in metrics
+    assert "# TYPE bridge_dropped_transactions_total counter\n" in metrics
+    assert "bridge_dropped_transactions_total 2\n" in metrics
+    assert "bridge_rebroadcast_transactions_total 1\n" in metrics
+    assert "bridge_replaced_transactions_total 0\n" in metrics
@@ -3,6 +3,7 @@ import time
 import gevent
 import pytest
 from gevent.queue import Queue
+from web3.datastructures import AttributeDict
 
 from bridge.confirmation_task_planner import ConfirmationTaskPlanner
 from bridge.events import ChainRole, Event, FetcherReachedHeadEvent
@@ -23,6 +24,9 @@ class TransferRecorderMock:
     def apply_event(self, event):
         self.events.append(event)
 
+    def apply_events(self, events):
+        self.events.extend(events)
+
     def pull_transfers_to_confirm(self):
         return self.transfers_to_confirm
 
@@ -157,3 +161,82 @@ def test_wrong_chain_fetcher_reached_head_event(
     # give control to confirmation planner
     gevent.sleep()
     assert len(confirmation_task_queue) == 0
+
+
+def test_process_events_in_batches(
+    transfer_recorder_mock,
+    control_queue,
+    transfer_event_queue,
+    home_bridge_event_queue,
+    confirmation_task_queue,
+):
+    confirmation_task_planner = ConfirmationTaskPlanner(
+        transfer_recorder_mock,
+        10,
+        control_queue,
+        transfer_event_queue,
+        home_bridge_event_queue,
+        confirmation_task_queue,
+        max_event_batch_size=2,
+    )
+    events = [Event(), Event(), Event()]
+    for event in events:
+        transfer_event_queue.put(event)
+
+    assert confirmation_task_planner.get_event_batch(transfer_event_queue) == (
+        events[:2]
+    )
+    assert confirmation_task_planner.get_event_batch(transfer_event_queue) == (
+        events[2:]
+    )
+
+
+def test_event_batch_ends_with_complete_block(
+    transfer_recorder_mock,
+    control_queue,
+    transfer_event_queue,
+    home_bridge_event_queue,
+    confirmation_task_queue,
+):
+    confirmation_task_planner = ConfirmationTaskPlanner(
+        transfer_recorder_mock,
+        10,
+        control_queue,
+        transfer_event_queue,
+        home_bridge_event_queue,
+        confirmation_task_queue,
+        max_event_batch_size=2,
+    )
+    events = [
+        AttributeDict({"blockNumber": block_number}) for block_number in [1, 2, 2, 2, 3]
+    ]
+    for event in events:
+        transfer_event_queue.put(event)
+
+    assert confirmation_task_planner.get_event_batch(transfer_event_queue) == (
+        events[:4]
+    )
+    assert confirmation_task_planner.get_event_batch(transfer_event_queue) == (
+        events[4:]
+    )
+
+
+def test_check_for_confirmation_tasks_once_per_batch(
+    confirmation_task_planner,
+    transfer_recorder_mock,
+    home_bridge_event_queue,
+    confirmation_task_queue,
+):
+    transfer_recorder_mock.transfers_to_confirm = [Event()]
+    events = [
+        FetcherReachedHeadEvent(time.time(), ChainRole.home, 0),
+        Event(),
+        FetcherReachedHeadEvent(time.time(), ChainRole.home, 1),
+    ]
+    for event in events:
+        home_bridge_event_queue.put(event)
+
+    # give control to confirmation planner
+    gevent.sleep(0.001)
+    assert transfer_recorder_mock.events == events
+    assert len(confirmation_task_queue) == 1
@@ -2,9 +2,17 @@ from typing import List
 
 import gevent
 import pytest
+import requests
 
+from bridge.chain_head_tracker import ChainHeadTracker
 from bridge.constants import TRANSFER_EVENT_NAME
-from bridge.event_fetcher import EventFetcher, FetcherReachedHeadEvent
+from bridge.event_fetcher import (
+    AdaptiveBlockRange,
+    EventFetcher,
+    FetcherReachedHeadEvent,
+    combine_topic_sets,
+    is_block_range_too_large_exception,
+)
 from bridge.events import ChainRole
 
 
@@ -131,6 +139,13 @@ def test_instantiate_event_fetcher_with_negative_start_block_number(
         make_transfer_event_fetcher(start_block_number=-1)
 
 
+def test_instantiate_event_fetcher_with_zero_fetch_concurrency(
+    make_transfer_event_fetcher,
+):
+    with pytest.raises(ValueError):
+        make_transfer_event_fetcher(fetch_concurrency=0)
+
+
 def test_fetch_events_in_range(
     transfer_event_fetcher,
     w3_foreign,
@@ -215,6 +230,30 @@ def test_fetch_some_events_with_different_transfer_counts(
     assert len(events) == transfer_count
 
 
+@pytest.mark.parametrize("transfer_count", [0, 7, 25, 51])
+def test_fetch_some_events_concurrently(
+    make_transfer_event_fetcher,
+    tester_foreign,
+    transfer_tokens_to_foreign_bridge,
+    foreign_chain_max_reorg_depth,
+    transfer_count,
+):
+    transfer_event_fetcher = make_transfer_event_fetcher(
+        event_fetch_limit=4, fetch_concurrency=3
+    )
+
+    for _ in range(transfer_count):
+        transfer_tokens_to_foreign_bridge()
+
+    tester_foreign.mine_blocks(foreign_chain_max_reorg_depth)
+    events = fetch_all_events(transfer_event_fetcher)
+    assert len(events) == transfer_count
+    assert events == sorted(
+        events,
+        key=lambda event: (event.blockNumber, event.transactionIndex, event.logIndex),
+    )
+
+
 def test_fetch_events_with_start_block_number(
     w3_foreign,
     tester_foreign,
@@ -277,6 +316,68 @@ def test_fetch_events_continuously(
         transfer_event_queue.get()
 
 
+def test_fetch_events_woken_up_by_new_block(
+    make_transfer_event_fetcher,
+    transfer_event_queue,
+    transfer_tokens_to_foreign_bridge,
+    w3_foreign,
+    spawn,
+):
+    poll_time = 10
+    transfer_event_fetcher = make_transfer_event_fetcher(max_reorg_depth=0)
+    spawn(transfer_event_fetcher.fetch_events, poll_time)
+    with gevent.Timeout(0.5):
+        assert isinstance(transfer_event_queue.get(), FetcherReachedHeadEvent)
+
+    transfer_tokens_to_foreign_bridge()
+    transfer_event_fetcher.notify_new_block(w3_foreign.eth.blockNumber)
+    with gevent.Timeout(0.5):
+        assert transfer_event_queue.get().event == TRANSFER_EVENT_NAME
+
+
+def test_fetch_events_not_woken_up_by_unsafe_block(
+    make_transfer_event_fetcher,
+    transfer_event_queue,
+    transfer_tokens_to_foreign_bridge,
+    w3_foreign,
+    spawn,
+):
+    poll_time = 10
+    transfer_event_fetcher = make_transfer_event_fetcher(max_reorg_depth=5)
+    spawn(transfer_event_fetcher.fetch_events, poll_time)
+    with gevent.Timeout(0.5):
+        assert isinstance(transfer_event_queue.get(), FetcherReachedHeadEvent)
+
+    transfer_tokens_to_foreign_bridge()
+    transfer_event_fetcher.notify_new_block(w3_foreign.eth.blockNumber)
+    gevent.sleep(0.2)
+    assert transfer_event_queue.empty()
+
+
+def test_fetch_events_woken_up_by_chain_head_tracker(
+    make_transfer_event_fetcher,
+    transfer_event_queue,
+    transfer_tokens_to_foreign_bridge,
+    w3_foreign,
+    spawn,
+):
+    chain_head_tracker = ChainHeadTracker(
+        w3_foreign, poll_interval=10, chain_role=ChainRole.foreign
+    )
+    transfer_event_fetcher = make_transfer_event_fetcher(
+        max_reorg_depth=0, chain_head_tracker=chain_head_tracker
+    )
+    chain_head_tracker.update()
+    spawn(transfer_event_fetcher.fetch_events, 10)
+    with gevent.Timeout(0.5):
+        assert isinstance(transfer_event_queue.get(), FetcherReachedHeadEvent)
+
+    transfer_tokens_to_foreign_bridge()
+    chain_head_tracker.update()
+    with gevent.Timeout(0.5):
+        assert transfer_event_queue.get().event == TRANSFER_EVENT_NAME
+
+
 def test_fetch_events_negative_poll_interval(transfer_event_fetcher):
     with pytest.raises(ValueError):
         transfer_event_fetcher.fetch_events(poll_interval=-1)
@@ -312,3 +413,196 @@ def test_fetch_multiple_events(
     ]  # there might be earlier events we don't care about
     event_names = [event.event for event in events]
     assert event_names == ["Transfer", "Approval", "Approval", "Transfer"]
+
+
+def reject_large_get_logs_ranges(max_blocks):
+    """return a web3 middleware that rejects getLogs requests for more than max_blocks blocks"""
+
+    def middleware_factory(make_request, w3):
+        def middleware(method, params):
+            if method == "eth_getLogs":
+                from_block = int(params[0]["fromBlock"], 16)
+                to_block = int(params[0]["toBlock"], 16)
+                if to_block - from_block + 1 > max_blocks:
+                    raise ValueError(
+                        {
+                            "code": -32005,
+                            "message": "query returned more than 10000 results",
+                        }
+                    )
+            return make_request(method, params)
+
+        return middleware
+
+    return middleware_factory
+
+
+def test_fetch_some_events_bisects_rejected_ranges(
+    make_transfer_event_fetcher,
+    w3_foreign,
+    tester_foreign,
+    transfer_tokens_to_foreign_bridge,
+    foreign_chain_max_reorg_depth,
+):
+    transfer_event_fetcher = make_transfer_event_fetcher(event_fetch_limit=25)
+
+    for _ in range(12):
+        transfer_tokens_to_foreign_bridge()
+    tester_foreign.mine_blocks(foreign_chain_max_reorg_depth)
+
+    w3_foreign.middleware_onion.add(reject_large_get_logs_ranges(4))
+    events = fetch_all_events(transfer_event_fetcher)
+
+    assert len(events) == 12
+    assert transfer_event_fetcher.block_range.size <= 4
+
+
+def test_fetch_some_events_grows_block_range(
+    make_transfer_event_fetcher, tester_foreign, foreign_chain_max_reorg_depth
+):
+    transfer_event_fetcher = make_transfer_event_fetcher(
+        event_fetch_limit=2, max_event_fetch_limit=16
+    )
+
+    tester_foreign.mine_blocks(64 + foreign_chain_max_reorg_depth)
+    fetch_all_events(transfer_event_fetcher)
+
+    assert transfer_event_fetcher.block_range.size == 16
+    assert transfer_event_fetcher.block_range.last_latency is not None
+
+
+def test_block_range_grows_when_fast_and_sparse():
+    block_range = AdaptiveBlockRange(initial_size=10, max_size=100)
+    block_range.record_success(num_blocks=10, num_events=0, latency=0.1)
+    assert block_range.size == 20
+    assert block_range.last_latency == 0.1
+
+    for _ in range(5):
+        block_range.record_success(
+            num_blocks=block_range.size, num_events=0, latency=0.1
+        )
+    assert block_range.size == 100
+
+
+def test_block_range_does_not_grow_on_partial_range():
+    block_range = AdaptiveBlockRange(initial_size=10, max_size=100)
+    block_range.record_success(num_blocks=3, num_events=0, latency=0.1)
+    assert block_range.size == 10
+
+
+@pytest.mark.parametrize("num_events, latency", [(0, 5.0), (5000, 0.1)])
+def test_block_range_shrinks_when_slow_or_dense(num_events, latency):
+    block_range = AdaptiveBlockRange(initial_size=10, max_size=100)
+    block_range.record_success(num_blocks=10, num_events=num_events, latency=latency)
+    assert block_range.size == 5
+
+
+def test_block_range_grows_slowly_after_rejected_range():
+    block_range = AdaptiveBlockRange(initial_size=10, max_size=1000)
+    block_range.size = 80
+    block_range.record_range_too_large(80)
+    assert block_range.size == 40
+
+    block_range.record_success(num_blocks=40, num_events=0, latency=0.1)
+    assert block_range.size == 50
+
+
+def test_block_range_does_not_shrink_below_minimum():
+    block_range = AdaptiveBlockRange(initial_size=2, max_size=100)
+    block_range.record_range_too_large(2)
+    block_range.record_range_too_large(1)
+    assert block_range.size == 1
+
+
+def test_block_range_invalid_sizes():
+    with pytest.raises(ValueError):
+        AdaptiveBlockRange(initial_size=10, max_size=5)
+
+
+@pytest.mark.parametrize(
+    "exception, expected",
+    [
+        (requests.exceptions.ReadTimeout(), True),
+        (
+            ValueError(
+                {"code": -32005, "message": "query returned more than 10000 results"}
+            ),
+            True,
+        ),
+        (ValueError({"code": -32000, "message": "Request timed out"}), True),
+        (
+            ValueError({"code": -32000, "message": "exceed maximum block range: 5000"}),
+            True,
+        ),
+        (ValueError({"code": -32000, "message": "header not found"}), False),
+        (ValueError("foo"), False),
+        (ConnectionError(), False),
+    ],
+)
+def test_is_block_range_too_large_exception(exception, expected):
+    assert is_block_range_too_large_exception(exception) == expected
+
+
+def test_fetch_multiple_events_combined(
+    make_transfer_event_fetcher,
+    token_contract,
+    premint_token_address,
+    tester_foreign,
+    foreign_chain_max_reorg_depth,
+):
+    transfer_and_approval_fetcher = make_transfer_event_fetcher(
+        filter_definition={"Transfer": {}, "Approval": {}}, combine_filters=True
+    )
+
+    token_contract.functions.transfer(premint_token_address, 1).transact(
+        {"from": premint_token_address}
+    )
+    token_contract.functions.approve(premint_token_address, 1).transact(
+        {"from": premint_token_address}
+    )
+    token_contract.functions.transfer(premint_token_address, 1).transact(
+        {"from": premint_token_address}
+    )
+
+    tester_foreign.mine_blocks(foreign_chain_max_reorg_depth)
+    events = fetch_all_events(transfer_and_approval_fetcher)[-3:]
+    event_names = [event.event for event in events]
+    assert event_names == ["Transfer", "Approval", "Transfer"]
+
+
+def test_fetch_events_in_range_combined_applies_argument_filters(
+    make_transfer_event_fetcher,
+    w3_foreign,
+    transfer_tokens_to,
+    transfer_tokens_to_foreign_bridge,
+    token_contract,
+    premint_token_address,
+    foreign_bridge_contract,
+):
+    fetcher = make_transfer_event_fetcher(
+        filter_definition={
+            "Transfer": {"to": foreign_bridge_contract.address},
+            "Approval": {},
+        },
+        combine_filters=True,
+    )
+    transfer_tokens_to("0xbB1046b0Fe450aA48DEafF6Fa474AdBf972840dD")
+    transfer_tokens_to_foreign_bridge()
+    token_contract.functions.approve(premint_token_address, 1).transact(
+        {"from": premint_token_address}
+    )
+
+    events = fetcher.fetch_events_in_range(0, w3_foreign.eth.blockNumber)
+
+    assert [event.event for event in events] == ["Transfer", "Approval"]
+    assert events[0].args["to"] == foreign_bridge_contract.address
+
+
+def test_combine_topic_sets_matches_all_signatures():
+    assert combine_topic_sets([["0xa1", None, "0xb1"], ["0xa2"]]) == [["0xa1", "0xa2"]]
+
+
+def test_combine_topic_sets_keeps_common_restrictions():
+    assert combine_topic_sets(
+        [["0xa1", None, "0xb1"], ["0xa2", "0xc1", ["0xb1", "0xb2"]]]
+    ) == [["0xa1", "0xa2"], None, ["0xb1", "0xb2"]]
@@ -0,0 +1,155 @@
+import pytest
+from eth_utils import int_to_big_endian
+from hexbytes import HexBytes
+from web3.datastructures import AttributeDict
+
+from bridge.constants import (
+    COMPLETION_EVENT_NAME,
+    CONFIRMATION_EVENT_NAME,
+    TRANSFER_EVENT_NAME,
+)
+from bridge.event_journal import EventJournal, decode_event, encode_event
+from bridge.events import ChainRole, TransferEvent
+from bridge.utils import compute_transfer_hash
+
+
+def make_transfer_event(block_number, log_index=0):
+    return AttributeDict(
+        {
+            "event": TRANSFER_EVENT_NAME,
+            "transactionHash": HexBytes(
+                int_to_big_endian(block_number).rjust(32, b"\x00")
+            ),
+            "blockHash": HexBytes(b"\x11" * 32),
+            "address": "0xF2E246BB76DF876Cef8b38ae84130F4F55De395b",
+            "blockNumber": block_number,
+            "transactionIndex": 0,
+            "logIndex": log_index,
+            "args": AttributeDict(
+                {
+                    "from": "0x345DeAd084E056dc78a0832E70B40C14B6323458",
+                    "to": "0x1ADb0A4853bf1D564BbAD7565b5D50b33D20af60",
+                    "value": 10 ** 25,
+                }
+            ),
+        }
+    )
+
+
+def make_transfer_hash_event(event_name, transfer_hash, block_number):
+    return AttributeDict(
+        {
+            "event": event_name,
+            "transactionHash": HexBytes(b"\x22" * 32),
+            "blockNumber": block_number,
+            "transactionIndex": 0,
+            "logIndex": 0,
+            "args": AttributeDict(
+                {
+                    "transferHash": HexBytes(transfer_hash),
+                    "coinTransferSuccessful": True,
+                }
+            ),
+        }
+    )
+
+
+@pytest.fixture
+def journal_path(tmp_path):
+    return str(tmp_path / "journal.sqlite")
+
+
+@pytest.fixture
+def journal(journal_path):
+    journal = EventJournal(journal_path)
+    yield journal
+    journal.close()
+
+
+def test_encode_decode_event():
+    event = make_transfer_event(5)
+    decoded_event = decode_event(encode_event(event))
+    assert decoded_event == event
+    assert isinstance(decoded_event.transactionHash, HexBytes)
+    assert decoded_event.args.value == 10 ** 25
+
+
+def test_encode_decode_event_record():
+    record = TransferEvent(
+        transactionHash=HexBytes(b"\x11" * 32),
+        blockNumber=5,
+        transactionIndex=0,
+        logIndex=1,
+        sender=b"\x34" * 20,
+        receiver=b"\x1a" * 20,
+        value=10 ** 25,
+    )
+    assert decode_event(encode_event(record)) == record
+
+
+def test_checkpoint_of_fresh_journal(journal):
+    assert journal.get_checkpoint(ChainRole.foreign) is None
+
+
+def test_record_events(journal):
+    events = [make_transfer_event(3), make_transfer_event(4)]
+    journal.record(ChainRole.foreign, events, 10)
+
+    assert journal.get_checkpoint(ChainRole.foreign) == 10
+    assert journal.get_checkpoint(ChainRole.home) is None
+    assert list(journal.get_events()) == events
+
+
+def test_record_events_persistent(journal, journal_path):
+    events = [make_transfer_event(3)]
+    journal.record(ChainRole.foreign, events, 7)
+    journal.close()
+
+    reopened_journal = EventJournal(journal_path)
+    assert reopened_journal.get_checkpoint(ChainRole.foreign) == 7
+    assert list(reopened_journal.get_events()) == events
+
+
+def test_record_events_twice(journal):
+    events = [make_transfer_event(3)]
+    journal.record(ChainRole.foreign, events, 3)
+    journal.record(ChainRole.foreign, events, 5)
+
+    assert journal.get_checkpoint(ChainRole.foreign) == 5
+    assert list(journal.get_events()) == events
+
+
+def test_compact_removes_completed_transfers(journal):
+    completed_transfer = make_transfer_event(3)
+    pending_transfer = make_transfer_event(4)
+    transfer_hash = compute_transfer_hash(completed_transfer)
+    home_events = [
+        make_transfer_hash_event(CONFIRMATION_EVENT_NAME, transfer_hash, 1),
+        make_transfer_hash_event(COMPLETION_EVENT_NAME, transfer_hash, 2),
+    ]
+    journal.record(ChainRole.foreign, [completed_transfer, pending_transfer], 5)
+    journal.record(ChainRole.home, home_events, 5)
+
+    assert journal.compact() == 3
+    assert list(journal.get_events()) == [pending_transfer]
+
+
+def test_compact_keeps_completions_without_transfer(journal):
+    completion_event = make_transfer_hash_event(COMPLETION_EVENT_NAME, b"\x33" * 32, 1)
+    journal.record(ChainRole.home, [completion_event], 5)
+
+    assert journal.compact() == 0
+    assert list(journal.get_events()) == [completion_event]
+
+
+def test_record_next_nonce(journal, journal_path):
+    address = b"\x44" * 20
+    assert journal.get_next_nonce(address) is None
+
+    journal.record_next_nonce(address, 3)
+    journal.close()
+
+    reopened_journal = EventJournal(journal_path)
+    assert reopened_journal.get_next_nonce(address) == 3
+    reopened_journal.record_next_nonce(address, None)
+    assert reopened_journal.get_next_nonce(address) is None
@@ -0,0 +1,153 @@
+import base64
+import hashlib
+import json
+import socket
+import struct
+
+import gevent
+import gevent.queue
+import gevent.server
+import pytest
+
+from bridge.head_subscription import NewHeadsSubscription
+
+WEBSOCKET_GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+class WebsocketConnection:
+    """server side of a WebSocket connection, only supporting small text frames"""
+
+    def __init__(self, connection_socket):
+        self.socket = connection_socket
+        self.file = connection_socket.makefile("rb")
+        self._handshake()
+
+    def _handshake(self):
+        headers = {}
+        self.file.readline()
+        for line in iter(self.file.readline, b"\r\n"):
+            name, _, value = line.decode().partition(":")
+            headers[name.strip().lower()] = value.strip()
+        accept = base64.b64encode(
+            hashlib.sha1(
+                headers["sec-websocket-key"].encode() + WEBSOCKET_GUID
+            ).digest()
+        )
+        self.socket.sendall(
+            b"HTTP/1.1 101 Switching Protocols\r\n"
+            b"Upgrade: websocket\r\n"
+            b"Connection: Upgrade\r\n"
+            b"Sec-WebSocket-Accept: " + accept + b"\r\n\r\n"
+        )
+
+    def receive(self):
+        _, length = self.file.read(2)
+        length &= 0x7F
+        if length == 126:
+            (length,) = struct.unpack("!H", self.file.read(2))
+        mask = self.file.read(4)
+        payload = self.file.read(length)
+        return json.loads(bytes(b ^ mask[i % 4] for i, b in enumerate(payload)))
+
+    def send(self, message):
+        payload = json.dumps(message).encode()
+        assert len(payload) < 126
+        self.socket.sendall(bytes([0x81, len(payload)]) + payload)
+
+    def close(self):
+        self.socket.shutdown(socket.SHUT_RDWR)
+        self.file.close()
+        self.socket.close()
+
+
+class NewHeadsServer:
+    """stand-in for the WebSocket JSON-RPC endpoint of a node"""
+
+    def __init__(self):
+        self.connections = gevent.queue.Queue()
+        self.server = gevent.server.StreamServer(("127.0.0.1", 0), self._handle)
+
+    @property
+    def url(self):
+        return f"ws://127.0.0.1:{self.server.server_port}"
+
+    def _handle(self, connection_socket, address):
+        connection = WebsocketConnection(connection_socket)
+        request = connection.receive()
+        assert request["method"] == "eth_subscribe"
+        assert request["params"] == ["newHeads"]
+        connection.send({"jsonrpc": "2.0", "id": request["id"], "result": "0x1"})
+        self.connections.put(connection)
+        # keep the connection open until the test closes it
+        gevent.sleep(10)
+
+    def send_head(self, connection, block_number):
+        connection.send(
+            {
+                "jsonrpc": "2.0",
+                "method": "eth_subscription",
+                "params": {
+                    "subscription": "0x1",
+                    "result": {"number": hex(block_number)},
+                },
+            }
+        )
+
+
+@pytest.fixture
+def new_heads_server():
+    server = NewHeadsServer()
+    server.server.start()
+    yield server
+    server.server.stop()
+
+
+@pytest.fixture
+def subscription(new_heads_server):
+    return NewHeadsSubscription(new_heads_server.url, reconnect_interval=0.01)
+
+
+@pytest.fixture
+def received_heads(subscription):
+    heads = gevent.queue.Queue()
+    subscription.add_listener(heads.put)
+    return heads
+
+
+def test_subscription_notifies_listeners(
+    spawn, new_heads_server, subscription, received_heads
+):
+    spawn(subscription.run)
+    connection = new_heads_server.connections.get(timeout=1)
+
+    new_heads_server.send_head(connection, 10)
+    new_heads_server.send_head(connection, 11)
+
+    assert received_heads.get(timeout=1) == 10
+    assert received_heads.get(timeout=1) == 11
+    assert subscription.latest_block_number == 11
+    assert subscription.is_connected
+
+
+def test_subscription_resubscribes_after_disconnect(
+    spawn, new_heads_server, subscription, received_heads
+):
+    spawn(subscription.run)
+    new_heads_server.connections.get(timeout=1).close()
+
+    connection = new_heads_server.connections.get(timeout=1)
+    new_heads_server.send_head(connection, 12)
+
+    assert received_heads.get(timeout=1) == 12
+
+
+def test_subscription_ignores_other_messages(
+    spawn, new_heads_server, subscription, received_heads
+):
+    spawn(subscription.run)
+    connection = new_heads_server.connections.get(timeout=1)
+
+    connection.send({"jsonrpc": "2.0", "method": "eth_subscription", "params": {}})
+    new_heads_server.send_head(connection, 13)
+
+    assert received_heads.get(timeout=1) == 13
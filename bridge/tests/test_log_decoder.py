@@ -0,0 +1,130 @@
+import pytest
+from eth_abi import encode_abi
+from eth_utils import encode_hex, keccak, to_canonical_address
+from hexbytes import HexBytes
+from web3 import Web3
+from web3.datastructures import AttributeDict
+
+from bridge.contract_abis import HOME_BRIDGE_ABI, MINIMAL_ERC20_TOKEN_ABI
+from bridge.events import CompletionEvent, ConfirmationEvent, TransferEvent
+from bridge.log_decoder import (
+    COMPLETION_EVENT_TOPIC,
+    CONFIRMATION_EVENT_TOPIC,
+    TRANSFER_EVENT_TOPIC,
+    compact_transfer_event,
+    decode_log,
+)
+
+CONTRACT_ADDRESS = "0x731a10897d267e19B34503aD902d0A29173Ba4B1"
+SENDER = "0x345DeAd084E056dc78a0832E70B40C14B6323458"
+RECEIVER = "0x1ADb0A4853bf1D564BbAD7565b5D50b33D20af60"
+
+
+def address_topic(address):
+    return to_canonical_address(address).rjust(32, b"\x00")
+
+
+def make_log(topics, data):
+    return AttributeDict(
+        {
+            "address": CONTRACT_ADDRESS,
+            "topics": [HexBytes(topic) for topic in topics],
+            "data": encode_hex(data),
+            "blockNumber": 5,
+            "blockHash": HexBytes(b"\x12" * 32),
+            "transactionHash": HexBytes(b"\x11" * 32),
+            "transactionIndex": 2,
+            "logIndex": 3,
+            "removed": False,
+        }
+    )
+
+
+@pytest.fixture
+def contract():
+    return Web3().eth.contract(
+        address=CONTRACT_ADDRESS, abi=MINIMAL_ERC20_TOKEN_ABI + HOME_BRIDGE_ABI
+    )
+
+
+def make_transfer_log():
+    return make_log(
+        [TRANSFER_EVENT_TOPIC, address_topic(SENDER), address_topic(RECEIVER)],
+        encode_abi(["uint256"], [10 ** 25]),
+    )
+
+
+def make_confirmation_log():
+    return make_log(
+        [CONFIRMATION_EVENT_TOPIC, address_topic(SENDER)],
+        encode_abi(
+            ["bytes32", "bytes32", "uint256", "address"],
+            [b"\x01" * 32, b"\x02" * 32, 10 ** 18, RECEIVER],
+        ),
+    )
+
+
+def make_completion_log():
+    return make_log(
+        [COMPLETION_EVENT_TOPIC],
+        encode_abi(
+            ["bytes32", "bytes32", "uint256", "address", "bool"],
+            [b"\x01" * 32, b"\x02" * 32, 10 ** 18, RECEIVER, True],
+        ),
+    )
+
+
+@pytest.mark.parametrize(
+    "log, record_class, event_name",
+    [
+        (make_transfer_log(), TransferEvent, "Transfer"),
+        (make_confirmation_log(), ConfirmationEvent, "Confirmation"),
+        (make_completion_log(), CompletionEvent, "TransferCompleted"),
+    ],
+)
+def test_decode_log_like_web3(contract, log, record_class, event_name):
+    web3_event = contract.events[event_name]().processLog(log)
+    event = decode_log(log)
+
+    assert isinstance(event, record_class)
+    assert event.event == web3_event.event
+    assert event.args == web3_event.args
+    for key in ["transactionHash", "blockNumber", "transactionIndex", "logIndex"]:
+        assert getattr(event, key) == web3_event[key]
+
+
+def test_decode_log_unknown_topic():
+    assert (
+        decode_log(make_log([keccak(text="Approval(address,address,uint256)")], b""))
+        is None
+    )
+
+
+def test_decode_log_unexpected_layout():
+    # an ERC721 Transfer has the same signature, but an indexed token id
+    log = make_log(
+        [
+            TRANSFER_EVENT_TOPIC,
+            address_topic(SENDER),
+            address_topic(RECEIVER),
+            (1).to_bytes(32, "big"),
+        ],
+        b"",
+    )
+    assert decode_log(log) is None
+
+
+def test_decode_log_raw_hex():
+    log = make_transfer_log()
+    raw_log = {
+        **log,
+        "topics": [encode_hex(topic) for topic in log.topics],
+    }
+    assert decode_log(raw_log) == decode_log(log)
+
+
+def test_compact_transfer_event(contract):
+    log = make_transfer_log()
+    web3_event = contract.events.Transfer().processLog(log)
+
+    assert compact_transfer_event(web3_event) == decode_log(log)
@@ -3,6 +3,8 @@ import logging
 import bridge.config
 import bridge.main
 import bridge.webservice
+from bridge.event_journal import EventJournal
+from bridge.events import ChainRole, FetcherReachedHeadEvent
 
 
 def test_reload_logging_config(write_config, caplog, minimal_config):
@@ -65,3 +67,95 @@ def test_make_webservice(minimal_config, webservice_config, load_config_from_str
         config=config, recorder=bridge.main.make_recorder(config)
     )
     assert isinstance(ws, bridge.webservice.Webservice)
+
+
+def test_event_fetch_start_block_number_without_journal(
+    minimal_config, load_config_from_string
+):
+    config = load_config_from_string(minimal_config)
+    assert (
+        bridge.main.get_event_fetch_start_block_number(config, ChainRole.home, None)
+        == 0
+    )
+
+
+def test_event_fetch_start_block_number_after_checkpoint(
+    minimal_config, load_config_from_string, tmp_path
+):
+    config = load_config_from_string(minimal_config)
+    journal = EventJournal(str(tmp_path / "journal.sqlite"))
+    journal.record(ChainRole.home, [], 41)
+
+    assert (
+        bridge.main.get_event_fetch_start_block_number(config, ChainRole.home, journal)
+        == 42
+    )
+    assert (
+        bridge.main.get_event_fetch_start_block_number(
+            config, ChainRole.foreign, journal
+        )
+        == 0
+    )
+
+
+def test_event_fetch_start_block_number_after_fetched_block_number(
+    minimal_config, load_config_from_string, tmp_path
+):
+    config = load_config_from_string(minimal_config)
+    journal = EventJournal(str(tmp_path / "journal.sqlite"))
+    journal.record(ChainRole.home, [], 41)
+
+    assert (
+        bridge.main.get_event_fetch_start_block_number(
+            config, ChainRole.home, journal, 50
+        )
+        == 51
+    )
+    assert (
+        bridge.main.get_event_fetch_start_block_number(
+            config, ChainRole.home, journal, 30
+        )
+        == 42
+    )
+
+
+def test_snapshot_save_and_load(minimal_config, load_config_from_string, tmp_path):
+    snapshot_path = tmp_path / "snapshot.bin"
+    config = load_config_from_string(
+        minimal_config + f'\n[persistence]\nsnapshot_path = "{snapshot_path}"\n'
+    )
+    recorder = bridge.main.make_recorder(config)
+    recorder.apply_event(
+        FetcherReachedHeadEvent(
+            timestamp=0.0, chain_role=ChainRole.home, last_fetched_block_number=41
+        )
+    )
+    bridge.main.save_snapshot(config, recorder)
+    assert snapshot_path.exists()
+
+    restored_recorder = bridge.main.make_recorder(config)
+    bridge.main.load_snapshot(config, restored_recorder)
+    assert restored_recorder.fetched_block_numbers == {ChainRole.home: 41}
+
+
+def test_make_journal_no_config(minimal_config, load_config_from_string):
+    config = load_config_from_string(minimal_config)
+    assert bridge.main.make_journal(config) is None
+
+
+def test_make_journal(minimal_config, load_config_from_string, tmp_path):
+    journal_path = tmp_path / "journal.sqlite"
+    config = load_config_from_string(
+        minimal_config + f'\n[persistence]\njournal_path = "{journal_path}"\n'
+    )
+    assert isinstance(bridge.main.make_journal(config), EventJournal)
+    assert journal_path.exists()
+
+
+def test_make_w3_shares_provider(minimal_config, load_config_from_string):
+    config = load_config_from_string(minimal_config)
+    w3_home = bridge.main.make_w3(config, ChainRole.home)
+    assert bridge.main.make_w3(config, ChainRole.home).provider is w3_home.provider
+    assert bridge.main.make_w3(config, ChainRole.foreign).provider is not (
+        w3_home.provider
+    )
@@ -0,0 +1,64 @@
+import pytest
+from gevent.queue import Queue
+
+from bridge.metrics import Histogram, MetricFamily, Metrics, format_metrics
+
+
+def test_histogram_observe():
+    histogram = Histogram([1.0, 2.0])
+    for value in [0.5, 1.0, 1.5, 3.0]:
+        histogram.observe(value)
+
+    assert histogram.count == 4
+    assert histogram.sum == 6.0
+    assert histogram.cumulative_counts() == [(1.0, 2), (2.0, 3), (float("inf"), 4)]
+
+
+def test_histogram_unsorted_bounds():
+    with pytest.raises(ValueError):
+        Histogram([2.0, 1.0])
+
+
+def test_format_histogram():
+    histogram = Histogram([0.1])
+    histogram.observe(0.05)
+
+    assert format_metrics(
+        [
+            MetricFamily("latency_seconds", "histogram", "Latency").add(
+                histogram, method="eth_call"
+            )
+        ]
+    ) == (
+        "# HELP latency_seconds Latency\n"
+        "# TYPE latency_seconds histogram\n"
+        'latency_seconds_bucket{method="eth_call",le="0.1"} 1\n'
+        'latency_seconds_bucket{method="eth_call",le="+Inf"} 1\n'
+        'latency_seconds_sum{method="eth_call"} 0.05\n'
+        'latency_seconds_count{method="eth_call"} 1\n'
+    )
+
+
+def test_format_merges_families_of_same_name():
+    text = format_metrics(
+        [
+            MetricFamily("errors_total", "counter", "Errors").add(1, chain="home"),
+            MetricFamily("errors_total", "counter", "Errors").add(2, chain="foreign"),
+        ]
+    )
+
+    assert text.count("# TYPE errors_total counter") == 1
+    assert 'errors_total{chain="home"} 1\n' in text
+    assert 'errors_total{chain="foreign"} 2\n' in text
+
+
+def test_collector_labels_and_queue_size():
+    queue = Queue()
+    queue.put(1)
+    queue.put(2)
+    metrics = Metrics()
+    metrics.add_collector(queue, queue="control_queue")
+
+    assert 'bridge_queue_size{queue="control_queue"} 2\n' in format_metrics(
+        metrics.collect()
+    )
@@ -0,0 +1,106 @@
+import pytest
+from web3 import HTTPProvider, Web3
+
+from bridge.node_status import get_node_status
+from bridge.rpc_batch import (
+    BatchRequestRejectedException,
+    make_batch_request,
+    make_raw_batch_request,
+)
+
+PARITY_RESULTS = {
+    "web3_clientVersion": "Parity-Ethereum//v2.7.2-stable/x86_64-linux-gnu/rustc1.41.0",
+    "eth_blockNumber": "0x64",
+    "eth_syncing": {
+        "startingBlock": "0x0",
+        "currentBlock": "0x50",
+        "highestBlock": "0x64",
+    },
+    "parity_chainStatus": {"blockGap": None},
+    "parity_nodeKind": {"availability": "personal", "capability": "full"},
+}
+
+GETH_RESULTS = {
+    "web3_clientVersion": "Geth/v1.9.25-stable/linux-amd64/go1.15.6",
+    "eth_blockNumber": "0x64",
+    "eth_syncing": False,
+}
+
+
+@pytest.fixture
+def make_node(make_json_rpc_server):
+    def make(results):
+        node = make_json_rpc_server(results)
+        return node, Web3(HTTPProvider(node.url))
+
+    return make
+
+
+def test_get_node_status_parity(make_node):
+    node, w3 = make_node(PARITY_RESULTS)
+    node_status = get_node_status(w3)
+
+    assert node_status.client_version == PARITY_RESULTS["web3_clientVersion"]
+    assert node_status.block_number == 100
+    assert node_status.is_syncing
+    assert node_status.latest_synced_block == 80
+    assert node_status.syncing_map.highestBlock == 100
+    assert node_status.is_light_node is False
+    assert node_status.block_gap is None
+
+
+def test_get_node_status_geth(make_node):
+    node, w3 = make_node(GETH_RESULTS)
+    node_status = get_node_status(w3)
+
+    assert node_status.block_number == 100
+    assert not node_status.is_syncing
+    assert node_status.latest_synced_block == 100
+    assert node_status.syncing_map is None
+
+
+def test_get_node_status_batches_requests(make_node):
+    node, w3 = make_node(PARITY_RESULTS)
+    get_node_status(w3)
+    node.requests.clear()
+
+    get_node_status(w3)
+
+    assert len(node.requests) == 1
+    assert [request["method"] for request in node.requests[0]] == [
+        "eth_blockNumber",
+        "eth_syncing",
+        "parity_chainStatus",
+        "parity_nodeKind",
+    ]
+
+
+def test_get_node_status_without_batch_support(w3_foreign):
+    node_status = get_node_status(w3_foreign)
+
+    assert node_status.block_number == w3_foreign.eth.blockNumber
+    assert not node_status.is_syncing
+
+
+def test_make_batch_request_error(make_node):
+    node, w3 = make_node(GETH_RESULTS)
+    with pytest.raises(ValueError):
+        make_batch_request(w3, [("eth_blockNumber", []), ("parity_nodeKind", [])])
+
+
+def test_make_raw_batch_request_returns_errors_per_call(make_node):
+    node, w3 = make_node(GETH_RESULTS)
+    block_number_response, node_kind_response = make_raw_batch_request(
+        w3, [("eth_blockNumber", []), ("parity_nodeKind", [])]
+    )
+
+    assert block_number_response["result"] == GETH_RESULTS["eth_blockNumber"]
+    assert node_kind_response["error"]["code"] == -32601
+
+
+def test_make_raw_batch_request_rejected(make_node):
+    node, w3 = make_node(GETH_RESULTS)
+    node.batch_error = {"code": -32600, "message": "Batch requests not supported"}
+
+    with pytest.raises(BatchRequestRejectedException):
+        make_raw_batch_request(w3, [("eth_blockNumber", []), ("eth_syncing", [])])
@@ -0,0 +1,124 @@
+import pytest
+
+from bridge.event_journal import EventJournal
+from bridge.nonce_manager import NonceManager
+
+ADDRESS = b"\x44" * 20
+
+
+class NodeMock:
+    def __init__(self, next_nonce):
+        self.next_nonce = next_nonce
+        self.num_requests = 0
+
+    def fetch_next_nonce(self):
+        self.num_requests += 1
+        return self.next_nonce
+
+
+@pytest.fixture
+def node():
+    return NodeMock(next_nonce=5)
+
+
+@pytest.fixture
+def journal(tmp_path):
+    journal = EventJournal(str(tmp_path / "journal.sqlite"))
+    yield journal
+    journal.close()
+
+
+def test_allocate_fetches_nonce_once(node):
+    nonce_manager = NonceManager(node.fetch_next_nonce, address=ADDRESS)
+
+    assert [nonce_manager.allocate() for _ in range(300)] == list(range(5, 305))
+    assert node.num_requests == 1
+
+
+def test_allocate_many(node):
+    nonce_manager = NonceManager(node.fetch_next_nonce, address=ADDRESS)
+
+    assert nonce_manager.allocate() == 5
+    assert nonce_manager.allocate_many(3) == [6, 7, 8]
+    assert nonce_manager.allocate() == 9
+    assert node.num_requests == 1
+
+
+def test_resync(node):
+    nonce_manager = NonceManager(node.fetch_next_nonce, address=ADDRESS)
+    nonce_manager.allocate()
+
+    node.next_nonce = 10
+    nonce_manager.resync()
+
+    assert nonce_manager.allocate() == 10
+    assert node.num_requests == 2
+
+
+def test_check_for_gap(node):
+    nonce_manager = NonceManager(node.fetch_next_nonce, address=ADDRESS)
+    for _ in range(3):
+        nonce_manager.release([nonce_manager.allocate()])
+
+    node.next_nonce = 8
+    assert not nonce_manager.check_for_gap()
+    # the transactions with nonces 6 and 7 got lost
+    node.next_nonce = 6
+    assert nonce_manager.check_for_gap()
+    assert nonce_manager.allocate() == 6
+
+
+def test_recorded_nonce_survives_restart(node, journal):
+    nonce_manager = NonceManager(
+        node.fetch_next_nonce, address=ADDRESS, journal=journal
+    )
+    for _ in range(3):
+        nonce_manager.allocate()
+
+    # the node has not seen the last transactions yet
+    restarted_nonce_manager = NonceManager(
+        node.fetch_next_nonce, address=ADDRESS, journal=journal
+    )
+    assert restarted_nonce_manager.allocate() == 8
+
+
+def test_node_nonce_ahead_of_recorded_nonce(node, journal):
+    journal.record_next_nonce(ADDRESS, 3)
+    nonce_manager = NonceManager(
+        node.fetch_next_nonce, address=ADDRESS, journal=journal
+    )
+
+    assert nonce_manager.allocate() == 5
+
+
+def test_resync_forgets_recorded_nonce(node, journal):
+    nonce_manager = NonceManager(
+        node.fetch_next_nonce, address=ADDRESS, journal=journal
+    )
+    nonce_manager.allocate()
+    nonce_manager.resync()
+
+    assert journal.get_next_nonce(ADDRESS) is None
+
+
+def test_check_for_gap_keeps_nonces_in_flight(node):
+    nonce_manager = NonceManager(node.fetch_next_nonce, address=ADDRESS)
+    sent_nonce = nonce_manager.allocate()
+    in_flight_nonces = nonce_manager.allocate_many(2)
+    nonce_manager.release([sent_nonce])
+
+    # the node has not seen the transactions in flight yet
+    assert not nonce_manager.check_for_gap()
+    nonce_manager.release([nonce_manager.allocate()])
+
+    nonce_manager.release(in_flight_nonces)
+    assert nonce_manager.check_for_gap()
+    assert nonce_manager.allocate() == 5
+
+
+def test_resync_keeps_nonces_in_flight(node):
+    nonce_manager = NonceManager(node.fetch_next_nonce, address=ADDRESS)
+    nonce_manager.allocate_many(3)
+
+    nonce_manager.resync()
+    assert nonce_manager.allocate() == 8
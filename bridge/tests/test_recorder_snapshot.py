@@ -0,0 +1,169 @@
+import io
+
+import gevent
+import pytest
+from hexbytes import HexBytes
+
+from bridge.events import (
+    BalanceCheck,
+    ChainRole,
+    CompletionEvent,
+    ConfirmationEvent,
+    FetcherReachedHeadEvent,
+    IsValidatorCheck,
+    TransferEvent,
+)
+from bridge.recorder_snapshot import (
+    read_snapshot,
+    read_snapshot_from_bytes,
+    restore_snapshot,
+    save_recorder_snapshot,
+    take_snapshot,
+    write_snapshot_to_file,
+)
+from bridge.transfer_recorder import TransferRecorder
+from bridge.utils import compute_transfer_hash
+
+MINIMUM_BALANCE = 10 ** 18
+
+
+def make_transfer(i):
+    return TransferEvent(
+        transactionHash=HexBytes(i.to_bytes(32, "big")),
+        blockNumber=10 + i,
+        transactionIndex=i,
+        logIndex=0,
+        sender=b"\x34" * 20,
+        receiver=b"\x1a" * 20,
+        value=10 ** 25 + i,
+    )
+
+
+def make_transfer_hash_record(record_class, transfer_hash, **kwargs):
+    return record_class(
+        transactionHash=HexBytes(b"\x22" * 32),
+        blockNumber=20,
+        transactionIndex=0,
+        logIndex=0,
+        transferHash=HexBytes(transfer_hash),
+        transferTransactionHash=HexBytes(b"\x33" * 32),
+        amount=1,
+        recipient=b"\x34" * 20,
+        **kwargs,
+    )
+
+
+@pytest.fixture
+def recorder():
+    recorder = TransferRecorder(minimum_balance=MINIMUM_BALANCE)
+    recorder.apply_event(BalanceCheck(MINIMUM_BALANCE))
+    recorder.apply_event(IsValidatorCheck(True))
+
+    scheduled_transfer, confirmed_transfer, ready_transfer = [
+        make_transfer(i) for i in range(3)
+    ]
+    recorder.apply_event(scheduled_transfer)
+    recorder.pull_transfers_to_confirm()
+    recorder.apply_event(confirmed_transfer)
+    recorder.apply_event(
+        make_transfer_hash_record(
+            ConfirmationEvent,
+            compute_transfer_hash(confirmed_transfer),
+            validator=b"\x44" * 20,
+        )
+    )
+    recorder.apply_event(ready_transfer)
+
+    # one orphan before and one after the home fetcher reached its head
+    recorder.apply_event(
+        make_transfer_hash_record(
+            CompletionEvent, b"\x55" * 32, coinTransferSuccessful=True
+        )
+    )
+    recorder.apply_event(
+        FetcherReachedHeadEvent(
+            timestamp=0.0,
+            chain_role=ChainRole.home,
+            last_fetched_block_number=19,
+            last_fetched_block_timestamp=1000,
+        )
+    )
+    recorder.apply_event(
+        FetcherReachedHeadEvent(
+            timestamp=0.0, chain_role=ChainRole.foreign, last_fetched_block_number=30
+        )
+    )
+    recorder.apply_event(
+        make_transfer_hash_record(
+            CompletionEvent, b"\x66" * 32, coinTransferSuccessful=True
+        )
+    )
+    return recorder
+
+
+def roundtrip(snapshot):
+    file = io.BytesIO()
+    write_snapshot_to_file(snapshot, file)
+    return read_snapshot_from_bytes(file.getvalue())
+
+
+def test_snapshot_roundtrip(recorder):
+    snapshot = take_snapshot(recorder)
+    assert roundtrip(snapshot) == snapshot
+
+
+def test_snapshot_roundtrip_fresh_recorder():
+    snapshot = take_snapshot(TransferRecorder(minimum_balance=MINIMUM_BALANCE))
+    restored_snapshot = roundtrip(snapshot)
+
+    assert restored_snapshot == snapshot
+
+
+def test_restore_snapshot(recorder):
+    restored_recorder = TransferRecorder(minimum_balance=MINIMUM_BALANCE)
+    restore_snapshot(restored_recorder, roundtrip(take_snapshot(recorder)))
+
+    # the validator status is only taken from fresh checks
+    assert restored_recorder.is_validator is None
+    assert restored_recorder.balance is None
+    assert not restored_recorder.is_validating
+    restored_recorder.apply_event(IsValidatorCheck(True))
+    restored_recorder.apply_event(BalanceCheck(MINIMUM_BALANCE))
+    assert restored_recorder.fetched_block_numbers == {
+        ChainRole.foreign: 30,
+        ChainRole.home: 20,
+    }
+    assert restored_recorder.transfer_events == recorder.transfer_events
+    assert restored_recorder.orphan_hashes == recorder.orphan_hashes
+    assert restored_recorder.completion_hashes == recorder.completion_hashes
+    # scheduled transfers might not have been confirmed
+    assert not restored_recorder.scheduled_hashes
+    assert [
+        compute_transfer_hash(event)
+        for event in restored_recorder.pull_transfers_to_confirm()
+    ] == [compute_transfer_hash(make_transfer(i)) for i in (0, 2)]
+
+
+def test_read_snapshot_invalid():
+    with pytest.raises(ValueError):
+        read_snapshot_from_bytes(b"not a snapshot")
+
+
+def test_read_snapshot_truncated(recorder):
+    file = io.BytesIO()
+    write_snapshot_to_file(take_snapshot(recorder), file)
+    with pytest.raises(ValueError):
+        read_snapshot_from_bytes(file.getvalue()[:-1])
+
+
+def test_read_snapshot_missing(tmp_path):
+    assert read_snapshot(str(tmp_path / "snapshot.bin")) is None
+
+
+def test_save_recorder_snapshot(recorder, tmp_path):
+    path = str(tmp_path / "snapshot.bin")
+    greenlet = gevent.spawn(save_recorder_snapshot, recorder, path)
+    greenlet.get(timeout=5)
+
+    assert read_snapshot(path) == take_snapshot(recorder)
+    assert not (tmp_path / "snapshot.bin.tmp").exists()
@@ -0,0 +1,214 @@
+import time
+
+import gevent
+import pytest
+import requests
+from web3 import Web3
+
+from bridge.metrics import Metrics, format_metrics
+from bridge.rpc_batch import make_batch_request, supports_batch_requests
+from bridge.rpc_provider import (
+    FailoverProvider,
+    NoSyncedEndpointException,
+    PooledHTTPProvider,
+)
+
+RESULTS = {"eth_blockNumber": "0x64", "eth_chainId": "0x1"}
+
+
+@pytest.fixture
+def make_w3(make_json_rpc_server):
+    def make(max_concurrent_requests=4, delay=0):
+        node = make_json_rpc_server(RESULTS, delay=delay)
+        provider = PooledHTTPProvider(
+            node.url, max_concurrent_requests=max_concurrent_requests
+        )
+        return node, Web3(provider)
+
+    return make
+
+
+def test_invalid_max_concurrent_requests():
+    with pytest.raises(ValueError):
+        PooledHTTPProvider("http://localhost:8545", max_concurrent_requests=0)
+
+
+def test_requests_reuse_connection(make_w3):
+    node, w3 = make_w3()
+    for _ in range(5):
+        assert w3.eth.blockNumber == 100
+
+    assert len(node.requests) == 5
+    assert len(node.client_ports) == 1
+
+
+def test_shared_provider_limits_concurrent_requests(make_w3):
+    node, w3 = make_w3(max_concurrent_requests=2, delay=0.02)
+    # components share the provider, but have their own web3 instances
+    web3_instances = [Web3(w3.provider) for _ in range(6)]
+
+    greenlets = [
+        gevent.spawn(lambda w3: w3.eth.blockNumber, w3) for w3 in web3_instances
+    ]
+    gevent.joinall(greenlets, raise_error=True)
+
+    assert [greenlet.value for greenlet in greenlets] == [100] * 6
+    assert node.max_active_requests == 2
+    assert len(node.client_ports) == 2
+
+
+def test_method_stats(make_w3):
+    node, w3 = make_w3()
+    w3.eth.blockNumber
+    w3.eth.blockNumber
+    with pytest.raises(ValueError):
+        w3.manager.request_blocking("parity_nodeKind", [])
+    make_batch_request(w3, [("eth_blockNumber", []), ("eth_chainId", [])])
+
+    stats = w3.provider.method_stats
+    assert stats["eth_blockNumber"].count == 2
+    assert stats["eth_blockNumber"].errors == 0
+    assert stats["eth_blockNumber"].mean_latency > 0
+    assert stats["parity_nodeKind"].errors == 1
+    assert stats["batch"].count == 1
+
+
+def test_provider_metrics(make_w3):
+    node, w3 = make_w3()
+    w3.eth.blockNumber
+    with pytest.raises(ValueError):
+        w3.manager.request_blocking("parity_nodeKind", [])
+
+    metrics = Metrics()
+    metrics.add_collector(w3.provider, chain="home")
+    text = format_metrics(metrics.collect())
+
+    assert (
+        'bridge_rpc_request_duration_seconds_count{chain="home",method="eth_blockNumber"} 1\n'
+        in text
+    )
+    assert 'bridge_rpc_errors_total{chain="home",method="parity_nodeKind"} 1\n' in text
+
+
+@pytest.fixture
+def make_failover_w3(make_json_rpc_server):
+    def make(results_per_endpoint, **kwargs):
+        nodes = [
+            make_json_rpc_server(dict(results)) for results in results_per_endpoint
+        ]
+        provider = FailoverProvider(
+            [PooledHTTPProvider(node.url, max_concurrent_requests=4) for node in nodes],
+            **kwargs,
+        )
+        return nodes, Web3(provider)
+
+    return make
+
+
+def test_failover_to_next_endpoint(make_failover_w3):
+    (node, fallback_node), w3 = make_failover_w3([RESULTS, RESULTS])
+    node.server.stop()
+
+    assert w3.eth.chainId == 1
+    assert w3.eth.chainId == 1
+
+    primary, fallback = w3.provider.endpoints
+    assert not primary.is_healthy(time.monotonic())
+    assert primary.consecutive_failures == 1
+    assert fallback.is_healthy(time.monotonic())
+    assert len(fallback_node.requests) == 2
+
+
+def test_failover_batch_request(make_failover_w3):
+    (node, fallback_node), w3 = make_failover_w3([RESULTS, RESULTS])
+    node.server.stop()
+
+    assert supports_batch_requests(w3, ["eth_chainId"])
+    assert make_batch_request(w3, [("eth_chainId", []), ("eth_chainId", [])]) == [
+        "0x1",
+        "0x1",
+    ]
+    assert len(fallback_node.requests) == 1
+    assert w3.provider.endpoints[0].consecutive_failures == 1
+
+
+def test_failover_no_batch_requests_for_head_dependent_methods(make_failover_w3):
+    nodes, w3 = make_failover_w3([RESULTS, RESULTS])
+
+    assert not supports_batch_requests(w3, ["eth_blockNumber", "eth_syncing"])
+
+
+def test_failover_all_endpoints_failing(make_failover_w3):
+    nodes, w3 = make_failover_w3([RESULTS, RESULTS])
+    for node in nodes:
+        node.server.stop()
+
+    with pytest.raises(requests.exceptions.ConnectionError):
+        w3.eth.chainId
+
+
+def test_failover_block_number_is_minimum_head(make_failover_w3):
+    nodes, w3 = make_failover_w3(
+        [{"eth_blockNumber": "0x64"}, {"eth_blockNumber": "0x60"}]
+    )
+    assert w3.eth.blockNumber == 0x60
+    assert [endpoint.head for endpoint in w3.provider.endpoints] == [0x64, 0x60]
+
+
+def test_failover_block_number_ignores_lagging_endpoint(make_failover_w3):
+    (node, stalled_node), w3 = make_failover_w3(
+        [{"eth_blockNumber": "0x64"}, {"eth_blockNumber": "0x50"}], max_head_lag=10
+    )
+    assert w3.eth.blockNumber == 0x64
+
+    # the endpoint is still asked and used again once it has caught up
+    stalled_node.results["eth_blockNumber"] = "0x60"
+    assert w3.eth.blockNumber == 0x60
+
+
+def test_failover_get_logs_raises_if_no_endpoint_reached_block(make_failover_w3):
+    nodes, w3 = make_failover_w3([{"eth_blockNumber": "0x50", "eth_getLogs": []}] * 2)
+    w3.eth.blockNumber
+    with pytest.raises(NoSyncedEndpointException):
+        w3.eth.getLogs({"fromBlock": 0x40, "toBlock": 0x60})
+    assert all(
+        request["method"] == "eth_blockNumber"
+        for node in nodes
+        for request in node.requests
+    )
+
+
+def test_failover_get_logs_only_from_synced_endpoints(make_failover_w3):
+    (node, lagging_node), w3 = make_failover_w3(
+        [
+            {"eth_blockNumber": "0x64", "eth_getLogs": []},
+            {"eth_blockNumber": "0x50", "eth_getLogs": []},
+        ]
+    )
+    w3.eth.blockNumber
+    for _ in range(3):
+        w3.eth.getLogs({"fromBlock": 0x40, "toBlock": 0x60})
+
+    assert len(node.requests) == 4
+    assert len(lagging_node.requests) == 1
+
+
+def test_hedged_request(make_failover_w3):
+    nodes, w3 = make_failover_w3(
+        [{**RESULTS, "eth_call": "0x01"}, {**RESULTS, "eth_call": "0x01"}],
+        hedge_requests=True,
+    )
+    # use the provider directly, web3's middlewares add unhedged eth_chainId calls
+    provider = w3.provider
+    call = {"to": "0x731a10897d267e19B34503aD902d0A29173Ba4B1", "data": "0x"}
+    for _ in range(20):
+        provider.make_request("eth_call", [call, "latest"])
+
+    slow_endpoint = provider._ordered_endpoints()[0]
+    slow_node = next(
+        node for node in nodes if node.url == slow_endpoint.provider.endpoint_uri
+    )
+    slow_node.delay = 1.0
+
+    with gevent.Timeout(0.5):
+        assert provider.make_request("eth_call", [call, "latest"])["result"] == "0x01"
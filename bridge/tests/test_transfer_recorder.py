@@ -13,8 +13,21 @@ from bridge.constants import (
     TRANSFER_EVENT_NAME,
     ZERO_ADDRESS,
 )
-from bridge.events import BalanceCheck, IsValidatorCheck
-from bridge.transfer_recorder import TransferRecorder
+from bridge.events import (
+    BalanceCheck,
+    ChainRole,
+    CompletionEvent,
+    ConfirmationEvent,
+    FetcherReachedHeadEvent,
+    IsValidatorCheck,
+    TransferEvent,
+)
+from bridge.log_decoder import compact_transfer_event
+from bridge.transfer_recorder import (
+    ORPHAN_EVICTION_MARGIN,
+    TransferRecorder,
+    TransferState,
+)
 from bridge.utils import compute_transfer_hash
 
 
@@ -55,12 +68,43 @@ def make_transfer_hash_event(
         {
             "event": event_name,
             "transactionHash": HexBytes(transaction_hash),
+            "blockNumber": 2,
             "logIndex": 0,
             "args": AttributeDict({"transferHash": HexBytes(transfer_hash)}),
         }
     )
 
 
+def make_transfer_record(
+    transaction_hash: Hash32 = Hash32(int_to_big_endian(12345).rjust(32, b"\x00")),
+    sender=b"\x34" * 20,
+    value=1,
+) -> TransferEvent:
+    return TransferEvent(
+        transactionHash=HexBytes(transaction_hash),
+        blockNumber=1,
+        transactionIndex=0,
+        logIndex=0,
+        sender=sender,
+        receiver=b"\x1a" * 20,
+        value=value,
+    )
+
+
+def make_transfer_hash_record(record_class, transfer_hash: Hash32, **kwargs):
+    return record_class(
+        transactionHash=HexBytes(b"\x22" * 32),
+        blockNumber=2,
+        transactionIndex=0,
+        logIndex=0,
+        transferHash=HexBytes(transfer_hash),
+        transferTransactionHash=HexBytes(b"\x33" * 32),
+        amount=1,
+        recipient=b"\x34" * 20,
+        **kwargs,
+    )
+
+
 @pytest.fixture
 def transfer_events(hashes):
     """A generator that produces an infinite, non-repeatable sequence of transfer events."""
@@ -176,7 +220,7 @@ def test_recorder_pull_transfers(recorder):
     recorder.apply_event(event)
     assert recorder.transfer_events
     to_confirm = recorder.pull_transfers_to_confirm()
-    assert to_confirm == [event]
+    assert to_confirm == [compact_transfer_event(event)]
 
     to_confirm = recorder.pull_transfers_to_confirm()
     assert to_confirm == []
@@ -184,12 +228,16 @@ def test_recorder_pull_transfers(recorder):
 
 def test_recorder_plans_transfers(recorder, transfer_event):
     recorder.apply_event(transfer_event)
-    assert recorder.pull_transfers_to_confirm() == [transfer_event]
+    assert recorder.pull_transfers_to_confirm() == [
+        compact_transfer_event(transfer_event)
+    ]
 
 
 def test_recorder_does_not_plan_transfers_twice(recorder, transfer_event):
     recorder.apply_event(transfer_event)
-    assert recorder.pull_transfers_to_confirm() == [transfer_event]
+    assert recorder.pull_transfers_to_confirm() == [
+        compact_transfer_event(transfer_event)
+    ]
     assert len(recorder.pull_transfers_to_confirm()) == 0
 
 
@@ -225,7 +273,9 @@ def test_recorder_does_not_plan_transfers_if_not_validating(
 
     recorder.apply_event(BalanceCheck(minimum_balance))
     assert recorder.is_validating
-    assert recorder.pull_transfers_to_confirm() == [transfer_event]
+    assert recorder.pull_transfers_to_confirm() == [
+        compact_transfer_event(transfer_event)
+    ]
 
 
 def test_recorder_not_validating_if_balance_below_minimum(recorder, minimum_balance):
@@ -253,3 +303,219 @@ def test_transfer_recorder_drops_completed_transfers(recorder, hashes):
     recorder.apply_event(transfer_event)
     recorder.apply_event(completion_event)
     assert len(recorder.pull_transfers_to_confirm()) == 0
+
+
+def test_recorder_stores_compact_transfer_records(recorder, transfer_event):
+    recorder.apply_event(transfer_event)
+    (transfer_record,) = recorder.transfer_events.values()
+
+    assert isinstance(transfer_record, TransferEvent)
+    assert transfer_record.args == transfer_event.args
+    assert compute_transfer_hash(transfer_record) == compute_transfer_hash(
+        transfer_event
+    )
+
+
+def test_recorder_plans_transfer_record(recorder):
+    transfer_record = make_transfer_record()
+    recorder.apply_event(transfer_record)
+    assert recorder.pull_transfers_to_confirm() == [transfer_record]
+
+
+def test_skip_bad_transfer_record(recorder):
+    recorder.apply_event(make_transfer_record(value=0))
+    recorder.apply_event(make_transfer_record(sender=bytes(20)))
+    assert not recorder.transfer_events
+
+
+def test_recorder_does_not_plan_confirmed_transfer_record(recorder):
+    transfer_record = make_transfer_record()
+    recorder.apply_event(transfer_record)
+    recorder.apply_event(
+        make_transfer_hash_record(
+            ConfirmationEvent,
+            compute_transfer_hash(transfer_record),
+            validator=b"\x44" * 20,
+        )
+    )
+    assert recorder.pull_transfers_to_confirm() == []
+
+
+def test_recorder_clears_completed_transfer_record(recorder):
+    transfer_record = make_transfer_record()
+    recorder.apply_event(transfer_record)
+    recorder.apply_event(
+        make_transfer_hash_record(
+            CompletionEvent,
+            compute_transfer_hash(transfer_record),
+            coinTransferSuccessful=True,
+        )
+    )
+    assert recorder.pull_transfers_to_confirm() == []
+    assert not recorder.transfer_events
+
+
+def test_recorder_clears_transfer_completed_before_recorded(recorder):
+    transfer_record = make_transfer_record()
+    recorder.apply_event(
+        make_transfer_hash_record(
+            CompletionEvent,
+            compute_transfer_hash(transfer_record),
+            coinTransferSuccessful=True,
+        )
+    )
+    assert recorder.completion_hashes
+
+    recorder.apply_event(transfer_record)
+    assert not recorder.transfer_events
+    assert not recorder.transfer_states
+    assert not recorder.completion_hashes
+    assert recorder.pull_transfers_to_confirm() == []
+
+
+def test_recorder_tracks_transfer_state(recorder):
+    transfer_record = make_transfer_record()
+    transfer_hash = compute_transfer_hash(transfer_record)
+
+    recorder.apply_event(transfer_record)
+    assert recorder.transfer_states[transfer_hash] == TransferState.TRANSFERRED
+    assert recorder.ready_hashes == {transfer_hash}
+
+    recorder.pull_transfers_to_confirm()
+    assert recorder.transfer_states[transfer_hash] == (
+        TransferState.TRANSFERRED | TransferState.SCHEDULED
+    )
+    assert not recorder.ready_hashes
+    assert recorder.scheduled_hashes == {transfer_hash}
+
+    # applying the same transfer again must not schedule it twice
+    recorder.apply_event(transfer_record)
+    assert recorder.pull_transfers_to_confirm() == []
+
+    recorder.apply_event(
+        make_transfer_hash_record(
+            CompletionEvent, transfer_hash, coinTransferSuccessful=True
+        )
+    )
+    assert not recorder.transfer_states
+    assert not recorder.scheduled_hashes
+
+
+def test_recorder_keeps_ready_transfers_while_not_validating(recorder, minimum_balance):
+    recorder.apply_event(BalanceCheck(minimum_balance - 1))
+    transfer_record = make_transfer_record()
+    recorder.apply_event(transfer_record)
+
+    assert recorder.pull_transfers_to_confirm() == []
+    assert recorder.ready_hashes == {compute_transfer_hash(transfer_record)}
+
+
+def reached_head(chain_role, block_timestamp, block_number=10):
+    return FetcherReachedHeadEvent(
+        timestamp=0.0,
+        chain_role=chain_role,
+        last_fetched_block_number=block_number,
+        last_fetched_block_timestamp=block_timestamp,
+    )
+
+
+def foreign_reached_head(block_timestamp, block_number=10):
+    return reached_head(ChainRole.foreign, block_timestamp, block_number)
+
+
+def home_reached_head(block_timestamp, block_number=10):
+    return reached_head(ChainRole.home, block_timestamp, block_number)
+
+
+def test_recorder_evicts_orphan_hashes(recorder):
+    orphan_hash = Hash32(b"\x55" * 32)
+    recorder.apply_event(
+        make_transfer_hash_record(
+            CompletionEvent, orphan_hash, coinTransferSuccessful=True
+        )
+    )
+    recorder.apply_event(home_reached_head(1000))
+    assert orphan_hash in recorder.transfer_states
+
+    recorder.apply_event(foreign_reached_head(1000 + ORPHAN_EVICTION_MARGIN - 1))
+    assert orphan_hash in recorder.completion_hashes
+
+    recorder.apply_event(foreign_reached_head(1000 + ORPHAN_EVICTION_MARGIN))
+    assert not recorder.transfer_states
+    assert not recorder.completion_hashes
+    assert not recorder.orphan_hashes
+    assert recorder.num_evicted_orphan_hashes == 1
+
+
+def test_recorder_does_not_evict_orphan_hashes_before_home_head(recorder):
+    recorder.apply_event(
+        make_transfer_hash_record(
+            ConfirmationEvent, Hash32(b"\x55" * 32), validator=b"\x44" * 20
+        )
+    )
+    # the time of the confirmation is not known yet
+    recorder.apply_event(foreign_reached_head(10 ** 10))
+    assert recorder.unwatermarked_orphan_hashes
+    assert recorder.num_evicted_orphan_hashes == 0
+
+    recorder.apply_event(home_reached_head(1000))
+    assert not recorder.unwatermarked_orphan_hashes
+    recorder.apply_event(foreign_reached_head(10 ** 10))
+    assert recorder.num_evicted_orphan_hashes == 1
+
+
+def test_recorder_orphan_eviction_follows_foreign_block_time(minimum_balance):
+    """a lagging foreign fetcher does not evict orphans, whatever its block number"""
+    recorder = TransferRecorder(minimum_balance, orphan_eviction_margin=60)
+    recorder.apply_event(
+        make_transfer_hash_record(
+            ConfirmationEvent, Hash32(b"\x55" * 32), validator=b"\x44" * 20
+        )
+    )
+    recorder.apply_event(home_reached_head(1000, block_number=10 ** 6))
+
+    recorder.apply_event(foreign_reached_head(1059, block_number=10 ** 7))
+    assert recorder.transfer_states
+    recorder.apply_event(foreign_reached_head(1060, block_number=10 ** 7))
+    assert not recorder.transfer_states
+
+
+def test_recorder_does_not_evict_matched_hashes(recorder):
+    transfer_record = make_transfer_record()
+    recorder.apply_event(
+        make_transfer_hash_record(
+            ConfirmationEvent,
+            compute_transfer_hash(transfer_record),
+            validator=b"\x44" * 20,
+        )
+    )
+    recorder.apply_event(home_reached_head(1000))
+    recorder.apply_event(transfer_record)
+    assert not recorder.orphan_hashes
+
+    recorder.apply_event(foreign_reached_head(1000 + ORPHAN_EVICTION_MARGIN))
+    assert recorder.transfer_events
+    assert recorder.num_evicted_orphan_hashes == 0
+
+
+def test_recorder_apply_events(recorder):
+    transfer_record = make_transfer_record()
+    recorder.apply_events([foreign_reached_head(10), transfer_record])
+
+    assert recorder.fetched_block_numbers[ChainRole.foreign] == 10
+    assert recorder.pull_transfers_to_confirm() == [transfer_record]
+
+
+def test_recorder_fetched_block_number_includes_block_of_last_event(recorder):
+    transfer_record = make_transfer_record()
+    recorder.apply_event(transfer_record)
+
+    # a snapshot must not make the fetcher fetch the transfer again
+    assert (
+        recorder.fetched_block_numbers[ChainRole.foreign] == transfer_record.blockNumber
+    )
+
+
+def test_recorder_apply_events_unknown_event(recorder):
+    with pytest.raises(ValueError):
+        recorder.apply_events([object()])
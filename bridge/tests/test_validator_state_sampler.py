@@ -0,0 +1,66 @@
+import gevent
+import pytest
+from gevent import Timeout
+from gevent.queue import Queue
+from web3 import HTTPProvider, Web3
+
+from bridge.events import BalanceCheck
+from bridge.validator_state_sampler import ValidatorStateSampler
+
+VALIDATOR_ADDRESS = b"\x44" * 20
+
+RESULTS = {"eth_blockNumber": "0x10", "eth_getBalance": "0x64"}
+
+
+@pytest.fixture
+def node(make_json_rpc_server):
+    return make_json_rpc_server(dict(RESULTS))
+
+
+@pytest.fixture
+def control_queue():
+    return Queue()
+
+
+@pytest.fixture
+def sampler(node, control_queue):
+    return ValidatorStateSampler(
+        w3=Web3(HTTPProvider(node.url)),
+        validator_address=VALIDATOR_ADDRESS,
+        control_queue=control_queue,
+        poll_interval=0.01,
+    )
+
+
+def test_sample_balance_at_block(sampler, node):
+    assert sampler.sample(16) == 100
+
+    (balance_request,) = node.requests
+    assert balance_request["method"] == "eth_getBalance"
+    assert balance_request["params"][1] == "0x10"
+
+
+def test_sampler_reports_balance_once_per_block(sampler, node, control_queue, spawn):
+    spawn(sampler.run)
+    with Timeout(1):
+        assert control_queue.get() == BalanceCheck(100)
+
+    gevent.sleep(0.05)
+    # same block, nothing sampled or reported again
+    assert len(control_queue) == 0
+    assert [request["method"] for request in node.requests].count("eth_getBalance") == 1
+
+    node.results["eth_blockNumber"] = "0x11"
+    node.results["eth_getBalance"] = "0x0"
+    with Timeout(1):
+        assert control_queue.get() == BalanceCheck(0)
+
+
+def test_invalid_validator_address(sampler):
+    with pytest.raises(ValueError):
+        ValidatorStateSampler(
+            w3=sampler.w3,
+            validator_address="0x" + "44" * 20,
+            control_queue=Queue(),
+            poll_interval=1,
+        )
@@ -4,6 +4,7 @@ import gevent
 from eth_utils import to_canonical_address
 from gevent import Timeout
 from gevent.queue import Queue
+from web3.datastructures import AttributeDict
 
 from bridge.events import IsValidatorCheck
 from bridge.validator_status_watcher import ValidatorStatusWatcher
@@ -111,3 +112,80 @@ def test_watcher_notices_validator_set_leaving(
         initial_status_check = control_queue.get()
     assert initial_status_check == IsValidatorCheck(False)
     stop_callback.assert_called_once()
+
+
+class ValidatorProxyMock:
+    def __init__(self, is_validator):
+        self.is_validator = is_validator
+        self.num_calls = 0
+        self.functions = self
+
+    def isValidator(self, address):
+        return self
+
+    def call(self):
+        self.num_calls += 1
+        return self.is_validator
+
+
+def make_initiate_change_event(new_validators):
+    return AttributeDict(
+        {
+            "event": "InitiateChange",
+            "args": AttributeDict(
+                {"_parentHash": b"\x00" * 32, "_newSet": new_validators}
+            ),
+            "blockNumber": 1,
+        }
+    )
+
+
+def test_watcher_follows_validator_set_events(spawn):
+    validator_address = "0x7E5F4552091A69125d5DfCb7b8C2659029395Bdf"
+    other_validator_address = "0x2B5AD5c4795c026514f8317c7a215E218DcCD6cF"
+    control_queue = Queue()
+    validator_set_event_queue = Queue()
+    stop_callback = Mock()
+    validator_proxy = ValidatorProxyMock(is_validator=True)
+    validator_status_watcher = ValidatorStatusWatcher(
+        validator_proxy,
+        to_canonical_address(validator_address),
+        poll_interval=0.01,
+        control_queue=control_queue,
+        stop_validating_callback=stop_callback,
+        validator_set_event_queue=validator_set_event_queue,
+        reconciliation_interval=10,
+    )
+
+    spawn(validator_status_watcher.run)
+    with Timeout(0.1):
+        assert control_queue.get() == IsValidatorCheck(True)
+    gevent.sleep(0.1)
+    # the proxy is not polled while the validator set does not change
+    assert validator_proxy.num_calls == 1
+
+    # a change that keeps us in the validator set
+    validator_set_event_queue.put(
+        make_initiate_change_event([validator_address, other_validator_address])
+    )
+    gevent.sleep(0.05)
+    assert validator_proxy.num_calls == 1
+
+    validator_set_event_queue.put(make_initiate_change_event([other_validator_address]))
+    gevent.sleep(0.05)
+    # the change has not been finalized yet, the proxy is polled
+    assert validator_proxy.num_calls > 2
+    stop_callback.assert_not_called()
+
+    # events are not piling up while the proxy is polled
+    for _ in range(3):
+        validator_set_event_queue.put(
+            make_initiate_change_event([other_validator_address])
+        )
+    gevent.sleep(0.05)
+    assert validator_set_event_queue.empty()
+
+    validator_proxy.is_validator = False
+    with Timeout(0.1):
+        assert control_queue.get() == IsValidatorCheck(False)
+    stop_callback.assert_called_once()
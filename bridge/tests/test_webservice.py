@@ -34,3 +34,9 @@ def test_internal_state(client):
     print(r)
     assert isinstance(r, dict)
     assert "bridge" in r
+
+
+def test_metrics(client):
+    result = client.simulate_get("/metrics")
+    assert result.status == "200 OK"
+    assert result.headers["content-type"].startswith("text/plain; version=0.0.4")